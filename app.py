@@ -1,15 +1,76 @@
 import streamlit as st
 import os
-import glob
+import fnmatch
+import hashlib
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from PIL import Image
 import requests
+from requests.adapters import HTTPAdapter
 from io import BytesIO
 
+# 미리보기 썸네일 디스크 캐시 위치 / 최대 크기
+THUMBNAIL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumb_cache")
+THUMBNAIL_SIZE = (960, 960)
+IMAGE_EXTENSIONS = (".jpg", ".png")
+
 # -----------------------------------------------------------------
 # 1. 함수 정의를 파일 상단 (사용되는 곳보다 위)으로 이동
 # -----------------------------------------------------------------
 
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """API 호출용 커넥션 풀 세션 (Streamlit 재실행 간 재사용)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _scan_image_dir(test_dir: str, dir_mtime: float) -> list:
+    """폴더 내 이미지 목록 (dir_mtime이 캐시 키에 포함되어 파일 추가/삭제 시 자동 무효화)"""
+    with os.scandir(test_dir) as it:
+        files = [
+            entry.path for entry in it
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+    files.sort()
+    return files
+
+
+def list_image_files(test_dir: str) -> list:
+    """폴더 인덱스를 디렉토리 mtime 기준으로 캐시하여 반환"""
+    return _scan_image_dir(test_dir, os.stat(test_dir).st_mtime)
+
+
+def get_thumbnail(image_path: str) -> str:
+    """
+    미리보기용 썸네일 경로를 반환합니다 (디스크 캐시).
+    원본 경로·크기·수정시각으로 키를 만들어 원본이 바뀌면 새로 생성합니다.
+    """
+    stat = os.stat(image_path)
+    key = hashlib.sha1(
+        f"{os.path.abspath(image_path)}|{stat.st_size}|{stat.st_mtime_ns}|{THUMBNAIL_SIZE}".encode("utf-8")
+    ).hexdigest()
+    thumb_path = os.path.join(THUMBNAIL_DIR, key[:2], key + ".jpg")
+    if os.path.exists(thumb_path):
+        return thumb_path
+
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    with Image.open(image_path) as img:
+        # JPEG는 draft 모드로 DCT 축소 디코딩 → 대용량 원본도 빠르게 열림
+        img.draft("RGB", THUMBNAIL_SIZE)
+        img = img.convert("RGB")
+        img.thumbnail(THUMBNAIL_SIZE)
+        tmp_path = thumb_path + ".tmp"
+        img.save(tmp_path, "JPEG", quality=85)
+    os.replace(tmp_path, thumb_path)
+    return thumb_path
+
+
 def process_image(image_data: (str | bytes), api_url: str, result_column, filename: str = None):
     """이미지 처리 및 결과 표시 (파일 경로 또는 바이트 데이터 처리)"""
     
@@ -31,7 +92,7 @@ def process_image(image_data: (str | bytes), api_url: str, result_column, filena
 
     with st.spinner("YOLO 탐지 및 경고(TTS) 생성 중..."):
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 f"{api_url}/detect",
                 files=files,
                 timeout=30 # TTS 생성 시간을 고려해 timeout 넉넉하게
@@ -39,7 +100,7 @@ def process_image(image_data: (str | bytes), api_url: str, result_column, filena
             
             if response.status_code == 200:
                 result = response.json()
-                display_results(result, result_column)
+                display_results(result, result_column, api_url)
             else:
                 st.error(f"API 오류: {response.status_code} - {response.text}")
         
@@ -53,7 +114,7 @@ def process_image(image_data: (str | bytes), api_url: str, result_column, filena
                 f.close()
 
 
-def display_results(result: dict, result_column):
+def display_results(result: dict, result_column, api_url: str = "http://localhost:8000"):
     """탐지 결과 표시 (동적 TTS 재생 기능으로 수정)"""
     
     with result_column:
@@ -90,8 +151,17 @@ def display_results(result: dict, result_column):
     st.markdown(f"**권장 조치:** {warning.get('action', '')}")
     
     # --- 2. 동적 TTS 음성 재생 (신규) ---
+    # 서버가 오디오를 참조(audio_url)로 주면 브라우저가 /audio/{id}를 스트리밍 재생
+    audio_url = warning.get("audio_url")
     audio_base64 = warning.get("audio_base64")
-    if audio_base64:
+    if audio_url:
+        audio_html = f"""
+        <audio autoplay="true">
+            <source src="{api_url}{audio_url}" type="audio/mpeg">
+        </audio>
+        """
+        st.components.v1.html(audio_html, height=0)
+    elif audio_base64:
         audio_html = f"""
         <audio autoplay="true">
             <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
@@ -103,6 +173,117 @@ def display_results(result: dict, result_column):
     with st.expander("상세 정보"):
         st.json(result)
 
+# --- 폴더 일괄 탐지 ---
+# 경고 레벨 정렬 순서 (위험도 높은 순)
+LEVEL_ORDER = {"경보": 0, "주의": 1, "안전": 2, "오류": 3}
+# 결과 표 컬럼 (모든 요청이 실패해도 정렬 컬럼이 존재하도록)
+BATCH_COLUMNS = [
+    "filename", "path", "level", "objects", "classes", "max_confidence",
+    "closest", "summary", "processing_time", "error"
+]
+
+
+def _error_row(row: dict, error: str) -> dict:
+    return {**row, "level": "오류", "objects": 0, "classes": "", "error": error}
+
+
+def _detect_one(image_path: str, api_url: str, session: requests.Session) -> dict:
+    """
+    이미지 1장을 /detect에 보내고 결과 표의 한 행으로 요약 (작업 스레드에서 실행)
+    session은 스크립트 스레드에서 받아 넘김 (st.cache_resource 게터를 작업 스레드에서 부르지 않도록)
+    """
+    row = {"filename": os.path.basename(image_path), "path": image_path}
+    try:
+        with open(image_path, "rb") as f:
+            response = session.post(
+                f"{api_url}/detect",
+                files={"file": (row["filename"], f, "image/jpeg")},
+                # 일괄 모드는 표에 필요한 필드만 받아 응답 크기를 줄임
+                params={"fields": "detections,warning,processing_time", "compact": "true"},
+                timeout=60
+            )
+        if response.status_code != 200:
+            return _error_row(row, f"{response.status_code}: {response.text[:200]}")
+
+        result = response.json()
+        detections = result.get("detections", [])
+        warning = result.get("warning", {})
+        classes = sorted({d["class_name"] for d in detections})
+        return {
+            **row,
+            "level": warning.get("level", "N/A"),
+            "objects": len(detections),
+            "classes": ", ".join(classes),
+            "max_confidence": max((d["confidence"] for d in detections), default=None),
+            "closest": next(
+                (s for s in ("매우 가까움", "중간 거리", "멀리 있음")
+                 if any(d["distance_status"] == s for d in detections)),
+                ""
+            ),
+            "summary": warning.get("summary", ""),
+            "processing_time": result.get("processing_time"),
+            "error": ""
+        }
+    except Exception as e:
+        return _error_row(row, str(e))
+
+
+def run_batch_detection(image_paths: list, api_url: str, concurrency: int) -> list:
+    """폴더 이미지를 동시 요청 수 제한 하에 /detect로 보내며 진행률을 표시"""
+    rows = []
+    progress = st.progress(0.0, text="일괄 탐지 준비 중...")
+    status = st.empty()
+
+    session = get_http_session()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_detect_one, path, api_url, session) for path in image_paths]
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows.append(row)
+            progress.progress(done / len(futures), text=f"{done}/{len(futures)} 처리 완료")
+            if row["level"] in ("경보", "주의"):
+                status.warning(f"[{row['level']}] {row['filename']} - {row.get('summary', '')}")
+    return rows
+
+
+def batch_results_frame(rows: list, sort_by: str) -> pd.DataFrame:
+    """결과 행을 DataFrame으로 만들고 경고 레벨 또는 클래스 기준으로 정렬"""
+    df = pd.DataFrame(rows, columns=BATCH_COLUMNS)
+    if df.empty:
+        return df
+    df["_level_rank"] = df["level"].map(LEVEL_ORDER).fillna(len(LEVEL_ORDER))
+    if sort_by == "클래스":
+        df = df.sort_values(["classes", "_level_rank", "filename"], na_position="last")
+    else:
+        df = df.sort_values(["_level_rank", "objects", "filename"], ascending=[True, False, True])
+    return df.drop(columns=["_level_rank"]).reset_index(drop=True)
+
+
+def export_buttons(df: pd.DataFrame):
+    """CSV / Parquet 다운로드 버튼"""
+    cols = st.columns(2)
+    with cols[0]:
+        st.download_button(
+            "CSV 내보내기",
+            df.to_csv(index=False).encode("utf-8-sig"), # 엑셀 한글 깨짐 방지
+            file_name="batch_detections.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+    with cols[1]:
+        try:
+            buf = BytesIO()
+            df.to_parquet(buf, index=False)
+            st.download_button(
+                "Parquet 내보내기",
+                buf.getvalue(),
+                file_name="batch_detections.parquet",
+                mime="application/octet-stream",
+                use_container_width=True
+            )
+        except ImportError:
+            st.caption("Parquet 내보내기는 pyarrow 설치가 필요합니다.")
+
 # -----------------------------------------------------------------
 # 2. Streamlit UI 코드 시작 (함수 정의 이후)
 # -----------------------------------------------------------------
@@ -132,8 +313,7 @@ with tab1:
     )
     
     if os.path.exists(test_dir):
-        image_files = glob.glob(os.path.join(test_dir, "*.jpg")) + \
-                      glob.glob(os.path.join(test_dir, "*.png"))
+        image_files = list_image_files(test_dir)
         
         if not image_files:
             st.warning("해당 폴더에 이미지가 없습니다.")
@@ -151,8 +331,7 @@ with tab1:
                 with col1:
                     st.markdown("#### 원본 이미지")
                     try:
-                        img = Image.open(selected_img)
-                        st.image(img, use_column_width=True)
+                        st.image(get_thumbnail(selected_img), use_column_width=True)
                     except Exception as e:
                         st.error(f"이미지 로드 실패: {e}")
                 
@@ -160,6 +339,37 @@ with tab1:
                     api_url = "http://localhost:8000" # 임시 하드코딩
                     # 이제 process_image 함수가 위쪽에 정의되어 있으므로 정상입니다.
                     process_image(selected_img, api_url, col2)
+
+            # --- 폴더 일괄 탐지 ---
+            st.markdown("---")
+            st.markdown("#### 폴더 일괄 탐지")
+            batch_cols = st.columns([2, 1, 1])
+            with batch_cols[0]:
+                name_filter = st.text_input(
+                    "파일명 필터 (와일드카드)", value="*",
+                    help="예: I2_S0_C5_* (비워두면 전체)"
+                )
+            with batch_cols[1]:
+                concurrency = st.slider("동시 요청 수", 1, 16, 4)
+            with batch_cols[2]:
+                sort_by = st.selectbox("정렬 기준", ["경고 레벨", "클래스"])
+
+            batch_targets = [
+                p for p in image_files
+                if fnmatch.fnmatch(os.path.basename(p), name_filter or "*")
+            ]
+            st.caption(f"대상 이미지: {len(batch_targets)}개")
+
+            if st.button("폴더 일괄 탐지 실행", use_container_width=True, disabled=not batch_targets):
+                api_url = "http://localhost:8000" # 임시 하드코딩
+                st.session_state["batch_results"] = run_batch_detection(batch_targets, api_url, concurrency)
+
+            if st.session_state.get("batch_results"):
+                df = batch_results_frame(st.session_state["batch_results"], sort_by)
+                summary = df["level"].value_counts()
+                st.markdown(" | ".join(f"**{lvl}** {cnt}건" for lvl, cnt in summary.items()))
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                export_buttons(df)
     else:
         st.error(f"폴더를 찾을 수 없습니다: {test_dir}")
 
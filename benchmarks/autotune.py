@@ -0,0 +1,171 @@
+"""
+CPU 추론 오토튠 (torch 스레드 수 × 추론 워커 수 × 배치 크기 × 입력 크기)
+
+대상 장비에서 샘플 프레임으로 조합마다 처리량(프레임/초)과 호출 지연 백분위수를 측정하고,
+- --slo-ms 지정 시: p95 지연이 SLO 이내인 조합 중 처리량 최대
+- 미지정 시: 처리량 최대
+인 조합을 추론 프로파일(inference_profile.json)로 저장합니다. main_api.load_model이 시작 시 적용합니다.
+
+조합마다 새 프로세스(워커 수만큼)에서 모델을 로드하고, 모두 워밍업을 마친 뒤 동시에 측정합니다.
+지연은 배치 1회 호출 시간(포화 상태의 서비스 시간)이며, 배치를 채우는 대기(batch_window)는 포함하지 않습니다.
+
+실행:
+    # 단일 프로세스 서버 (워커 1개, 스레드/배치/입력 크기 탐색)
+    python -m benchmarks.autotune --images data/Filtered/Val/images --slo-ms 250
+    # 추론 서비스 분리 모드 (워커 수까지 탐색)
+    python -m benchmarks.autotune --images data/Filtered/Val/images --workers 1 2 4 --threads 1 2 4
+"""
+import argparse
+import glob
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.common import percentiles, write_result
+from modules.detector import MODEL_PATH
+from modules.inference_profile import DEFAULT_PROFILE, PROFILE_PATH, apply_threads, save_profile
+
+
+def default_threads() -> List[int]:
+    """1, 2, 4, ... CPU 수까지"""
+    cpus = os.cpu_count() or 1
+    values = [1 << i for i in range(cpus.bit_length()) if (1 << i) <= cpus]
+    return values + ([cpus] if values[-1] != cpus else [])
+
+
+# ==================== 측정 (워커 프로세스) ====================
+def _bench_worker(model_path: str, image_paths: List[str], threads: int, batch: int, imgsz: int,
+                  conf: float, duration: float, barrier) -> Dict:
+    import cv2
+    from ultralytics import YOLO
+
+    apply_threads(threads)
+    model = YOLO(model_path, task="detect")
+    frames = [img for img in (cv2.imread(p) for p in image_paths) if img is not None]
+    batches = itertools.cycle([frames[i:i + batch] for i in range(0, len(frames) - batch + 1, batch)])
+
+    # 워밍업 (첫 호출의 그래프 준비·메모리 할당 제외)
+    for _ in range(2):
+        model.predict(next(batches), verbose=False, imgsz=imgsz, conf=conf)
+    # 모든 워커가 준비된 뒤 동시에 측정 시작 → 코어 경합까지 반영
+    barrier.wait()
+
+    latencies, count = [], 0
+    t_start = time.perf_counter()
+    while time.perf_counter() - t_start < duration:
+        chunk = next(batches)
+        t0 = time.perf_counter()
+        model.predict(chunk, verbose=False, imgsz=imgsz, conf=conf)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        count += len(chunk)
+    return {"latencies": latencies, "frames": count, "elapsed": time.perf_counter() - t_start}
+
+
+def measure_config(model_path: str, image_paths: List[str], workers: int, threads: int, batch: int,
+                   imgsz: int, conf: float, duration: float) -> Dict:
+    """조합 1개: 워커 수만큼 프로세스를 띄워 동시에 추론하고 합산"""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager, ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        barrier = manager.Barrier(workers)
+        futures = [
+            executor.submit(_bench_worker, model_path, image_paths, threads, batch, imgsz, conf, duration, barrier)
+            for _ in range(workers)
+        ]
+        parts = [f.result() for f in futures]
+
+    latencies = [v for p in parts for v in p["latencies"]]
+    elapsed = max(p["elapsed"] for p in parts)
+    return {
+        "workers": workers,
+        "threads": threads,
+        "batch": batch,
+        "imgsz": imgsz,
+        "fps": round(sum(p["frames"] for p in parts) / elapsed, 2),
+        **{f"{k}_ms": round(v, 1) for k, v in percentiles(latencies).items()},
+        "calls": len(latencies),
+    }
+
+
+# ==================== 선택 ====================
+def pick_best(rows: List[Dict], slo_ms: Optional[float] = None) -> Optional[Dict]:
+    """SLO(p95) 이내 조합 중 처리량 최대. SLO를 만족하는 조합이 없으면 p95가 가장 낮은 조합"""
+    ok = [r for r in rows if "error" not in r]
+    if not ok:
+        return None
+    if slo_ms is not None:
+        meeting = [r for r in ok if r["p95_ms"] is not None and r["p95_ms"] <= slo_ms]
+        if not meeting:
+            print(f"⚠️ p95 {slo_ms}ms를 만족하는 조합이 없어 지연이 가장 낮은 조합을 선택합니다")
+            return min(ok, key=lambda r: r["p95_ms"])
+        ok = meeting
+    # 처리량이 같으면 CPU를 덜 쓰는 조합
+    return max(ok, key=lambda r: (r["fps"], -r["workers"] * r["threads"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU 추론 설정 오토튠 → 추론 프로파일 저장")
+    parser.add_argument("--images", default="data/Filtered/Val/images", help="샘플 프레임 폴더")
+    parser.add_argument("--limit", type=int, default=32, help="사용할 샘플 프레임 수")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--threads", type=int, nargs="+", default=None, help="기본: 1, 2, 4, ... CPU 수")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1],
+                        help="추론 프로세스 수 후보 (추론 서비스 분리 모드에서만 1 초과 사용)")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640],
+                        help="입력 크기 후보 (작을수록 빠르지만 원거리 소형 객체 정확도가 떨어짐)")
+    parser.add_argument("--slo-ms", type=float, default=None, help="p95 지연 목표. 생략 시 처리량 최대")
+    parser.add_argument("--duration", type=float, default=10.0, help="조합별 측정 시간(초)")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_PROFILE["batch_window"])
+    parser.add_argument("--profile", default=PROFILE_PATH, help="저장할 프로파일 경로")
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+
+    image_paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")))[:args.limit]
+    if not image_paths:
+        raise SystemExit(f"❌ 샘플 프레임이 없습니다: {args.images}")
+
+    cpus = os.cpu_count() or 1
+    grid = [
+        (w, t, b, s)
+        for w, t, b, s in itertools.product(args.workers, args.threads or default_threads(), args.batch, args.imgsz)
+        if w * t <= cpus and b <= len(image_paths)  # 코어 초과 구독 조합은 제외
+    ]
+    print(f"🔧 {len(grid)}개 조합 측정 (조합당 {args.duration:.0f}초, CPU {cpus}개)")
+
+    rows = []
+    for workers, threads, batch, imgsz in grid:
+        try:
+            row = measure_config(args.model, image_paths, workers, threads, batch, imgsz, args.conf, args.duration)
+        except Exception as e:
+            row = {"workers": workers, "threads": threads, "batch": batch, "imgsz": imgsz, "error": str(e)}
+            print(f"   ❌ workers={workers} threads={threads} batch={batch} imgsz={imgsz}: {e}")
+        else:
+            print(f"   workers={workers} threads={threads} batch={batch} imgsz={imgsz}: "
+                  f"{row['fps']:.1f} fps, p50 {row['p50_ms']}ms, p95 {row['p95_ms']}ms")
+        rows.append(row)
+
+    best = pick_best(rows, args.slo_ms)
+    report = {"config": {k: v for k, v in vars(args).items() if k != "out_dir"}, "results": rows, "selected": best}
+    write_result("autotune", report, **({"out_dir": args.out_dir} if args.out_dir else {}))
+    if best is None:
+        raise SystemExit("❌ 측정에 성공한 조합이 없습니다")
+
+    profile = {
+        "threads": best["threads"],
+        "workers": best["workers"],
+        "batch": best["batch"],
+        "batch_window": args.batch_window if best["batch"] > 1 else 0.0,
+        "imgsz": best["imgsz"],
+        "objective": f"p95<={args.slo_ms}ms" if args.slo_ms is not None else "throughput",
+        "measured": best,
+        "model": args.model,
+        "meta": report["meta"],
+    }
+    save_profile(profile, args.profile)
+    print(f"\n✅ 선택: workers={best['workers']} threads={best['threads']} batch={best['batch']} "
+          f"imgsz={best['imgsz']} → {best['fps']:.1f} fps, p95 {best['p95_ms']}ms")
+    print(f"📄 프로파일 저장: {args.profile} (서버 재시작 시 적용)")
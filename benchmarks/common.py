@@ -0,0 +1,88 @@
+"""벤치마크 공통 유틸리티 (실행 환경 메타데이터, 백분위수, 결과 JSON 저장)"""
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:  # 선택 의존성: Windows 최대 메모리 측정용
+    psutil = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def run_metadata() -> Dict:
+    """커밋 간 비교를 위해 결과에 함께 기록할 실행 환경 정보"""
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "host": socket.gethostname(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def percentiles(values: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """최근접 순위(nearest-rank) 방식 백분위수"""
+    if not values:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(values)
+    n = len(ordered)
+    return {
+        f"p{p}": ordered[min(n - 1, max(0, -(-p * n // 100) - 1))]
+        for p in points
+    }
+
+
+def peak_memory_mb() -> Optional[float]:
+    """현재 프로세스의 최대 RSS (MB). 측정 불가 시 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    return None
+
+
+def current_memory_mb() -> Optional[float]:
+    """현재 프로세스의 RSS (MB). 측정 불가 시 None"""
+    if psutil is not None:
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def write_result(name: str, data: Dict, out_dir: str = RESULTS_DIR) -> str:
+    """결과를 '<name>_<commit>_<시각>.json'으로 저장하고 경로를 반환"""
+    os.makedirs(out_dir, exist_ok=True)
+    meta = data.setdefault("meta", run_metadata())
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(out_dir, f"{name}_{meta['commit']}_{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"📄 결과 저장: {path}")
+    return path
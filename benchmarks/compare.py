@@ -0,0 +1,70 @@
+"""
+두 벤치마크 결과 JSON 비교 (커밋 간 성능 회귀 확인)
+
+지연/시간 지표(*_ms, p50/p95/p99)는 증가, 처리량(requests_per_sec)은 감소를 회귀로 봅니다.
+
+실행:
+    python -m benchmarks.compare benchmarks/results/microbench_abc123_*.json benchmarks/results/microbench_def456_*.json
+"""
+import argparse
+import json
+from typing import Dict, Iterator, Tuple
+
+HIGHER_IS_BETTER = ("requests_per_sec",)
+
+
+def _flatten(data, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            label = value.get("concurrency", i) if isinstance(value, dict) else i
+            yield from _flatten(value, f"{prefix}[{label}]")
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, float(data)
+
+
+def _is_metric(key: str) -> bool:
+    leaf = key.rsplit(".", 1)[-1]
+    return leaf.endswith("_ms") or leaf in ("p50", "p95", "p99") or leaf in HIGHER_IS_BETTER
+
+
+def compare(base: Dict, head: Dict, threshold: float = 0.10):
+    """base 대비 head 변화율. threshold 이상 나빠진 지표를 회귀로 표시"""
+    base_section = base.get("results", base.get("runs"))
+    head_section = head.get("results", head.get("runs"))
+    base_vals = dict(_flatten(base_section))
+    head_vals = dict(_flatten(head_section))
+
+    rows = []
+    for key in sorted(base_vals.keys() & head_vals.keys()):
+        if not _is_metric(key) or base_vals[key] == 0:
+            continue
+        change = (head_vals[key] - base_vals[key]) / base_vals[key]
+        worse = -change if key.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change
+        rows.append((key, base_vals[key], head_vals[key], change, worse >= threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="회귀로 판단할 변화율 (기본 10%)")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+
+    print(f"📊 {base.get('meta', {}).get('commit')} → {head.get('meta', {}).get('commit')}")
+    rows = compare(base, head, args.threshold)
+    for key, b, h, change, regressed in rows:
+        mark = "❌" if regressed else "  "
+        print(f"{mark} {key:<60} {b:>12.3f} → {h:>12.3f} ({change:+.1%})")
+
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"\n회귀 {regressions}건 / 비교 지표 {len(rows)}건")
+    raise SystemExit(1 if regressions else 0)
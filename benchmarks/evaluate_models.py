@@ -0,0 +1,325 @@
+"""
+모델/런타임 후보 정확도 + 지연 평가 (배포 선택용 스코어보드)
+
+best.pt, yolov8n.pt, ONNX/OpenVINO 내보내기·양자화 모델 등 후보마다 Filtered/Val에서
+- 클래스별 AP@0.5, AP@0.5:0.95 (mAP)
+- calculate_distance_status 거리 판정 일치율 (정답 박스와 매칭된 예측 박스 기준) + 근접 객체 미탐지율
+- 배치 크기별 CPU 지연 백분위수(이미지당 ms)와 처리량
+- 메모리(RSS): 모델 로드 전/후, 추론 후 최대값
+를 측정해 하나의 JSON 스코어보드로 저장합니다.
+정확도 평가는 모든 프레임과 예측을 쥐고 있으므로, 지연·메모리는 후보마다 측정용 배치 프레임만
+읽는 별도의 새 프로세스에서 잽니다 (서버 한 프로세스의 메모리에 가까운 값).
+
+실행:
+    python -m benchmarks.evaluate_models --models runs/army_project_clean_yolo11s/weights/best.pt yolov8n.pt best.onnx \\
+        --data data/Filtered/Val --limit 500 --batch-sizes 1 4 8
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# main_api → llm_module 임포트 시 OpenAI 클라이언트가 키를 요구하므로 더미 값 지정
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.common import current_memory_mb, peak_memory_mb, percentiles, write_result  # noqa: E402
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+# COCO 사전학습 모델 클래스 → 우리 클래스 (이름이 같은 클래스는 자동 매칭)
+CLASS_ALIASES = {"person": "사람"}
+
+GtBox = Tuple[int, List[float]]          # (클래스, xyxy)
+PredBox = Tuple[int, float, List[float]]  # (클래스, 신뢰도, xyxy)
+
+
+# ==================== 정답 / 예측 ====================
+def load_ground_truth(lbl_path: str, img_w: int, img_h: int) -> List[GtBox]:
+    """YOLO 정규화 라벨 → 픽셀 xyxy"""
+    boxes = []
+    if not os.path.exists(lbl_path):
+        return boxes
+    with open(lbl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            cls_id = int(parts[0])
+            xc, yc, w, h = (float(v) for v in parts[1:5])
+            boxes.append((cls_id, [
+                (xc - w / 2) * img_w, (yc - h / 2) * img_h,
+                (xc + w / 2) * img_w, (yc + h / 2) * img_h,
+            ]))
+    return boxes
+
+
+def class_mapping(model_names: Dict[int, str], dataset_names: Dict[int, str]) -> Dict[int, int]:
+    """모델 클래스 ID → 데이터셋 클래스 ID (대응 없는 클래스는 제외)"""
+    by_name = {name: cls_id for cls_id, name in dataset_names.items()}
+    mapping = {}
+    for cls_id, name in model_names.items():
+        target = by_name.get(name, by_name.get(CLASS_ALIASES.get(name, "")))
+        if target is not None:
+            mapping[cls_id] = target
+    return mapping
+
+
+def _iou(box: List[float], others: np.ndarray) -> np.ndarray:
+    if len(others) == 0:
+        return np.zeros(0)
+    x1 = np.maximum(box[0], others[:, 0])
+    y1 = np.maximum(box[1], others[:, 1])
+    x2 = np.minimum(box[2], others[:, 2])
+    y2 = np.minimum(box[3], others[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def average_precision(recall: np.ndarray, precision: np.ndarray) -> float:
+    """101점 보간 AP (COCO 방식)"""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return float(np.trapezoid(np.interp(x, mrec, mpre), x))
+
+
+def per_class_ap(preds: Dict[str, List[PredBox]], gts: Dict[str, List[GtBox]],
+                 class_ids: List[int]) -> Dict[int, Dict[str, Optional[float]]]:
+    """클래스별 AP@0.5, AP@0.5:0.95 (정답이 없는 클래스는 None)"""
+    result = {}
+    for cls_id in class_ids:
+        gt_by_img = {
+            img: np.array([xyxy for c, xyxy in boxes if c == cls_id]).reshape(-1, 4)
+            for img, boxes in gts.items()
+        }
+        n_gt = sum(len(v) for v in gt_by_img.values())
+        if n_gt == 0:
+            result[cls_id] = {"ap50": None, "ap50_95": None, "instances": 0}
+            continue
+        dets = sorted(
+            ((conf, img, xyxy) for img, boxes in preds.items() for c, conf, xyxy in boxes if c == cls_id),
+            key=lambda d: -d[0]
+        )
+        aps = []
+        for thr in IOU_THRESHOLDS:
+            used = {img: np.zeros(len(v), dtype=bool) for img, v in gt_by_img.items()}
+            tp = np.zeros(len(dets))
+            for k, (_, img, xyxy) in enumerate(dets):
+                ious = _iou(xyxy, gt_by_img.get(img, np.zeros((0, 4))))
+                if len(ious) == 0:
+                    continue
+                ious[used[img]] = -1
+                best = int(ious.argmax())
+                if ious[best] >= thr:
+                    used[img][best] = True
+                    tp[k] = 1
+            ctp = np.cumsum(tp)
+            recall = ctp / n_gt
+            precision = ctp / np.arange(1, len(dets) + 1) if len(dets) else np.zeros(0)
+            aps.append(average_precision(recall, precision))
+        result[cls_id] = {"ap50": round(aps[0], 4), "ap50_95": round(float(np.mean(aps)), 4), "instances": n_gt}
+    return result
+
+
+def distance_agreement(preds: Dict[str, List[PredBox]], gts: Dict[str, List[GtBox]],
+                       img_heights: Dict[str, int], deploy_conf: float) -> Dict:
+    """
+    배포 신뢰도 이상 예측과 정답을 IoU 0.5로 매칭한 뒤 calculate_distance_status 판정을 비교
+    (경고 레벨은 거리 판정으로 결정되므로 박스 높이 오차가 경보를 바꾸는지 확인)
+    """
+    from main_api import calculate_distance_status
+
+    agree = total = 0
+    confusion: Dict[str, Dict[str, int]] = {}
+    missed_close = close_total = 0
+    for img, gt_boxes in gts.items():
+        img_h = img_heights[img]
+        cand = [(c, xyxy) for c, conf, xyxy in preds.get(img, []) if conf >= deploy_conf]
+        cand_xyxy = np.array([xyxy for _, xyxy in cand]).reshape(-1, 4)
+        used = np.zeros(len(cand), dtype=bool)
+        for cls_id, xyxy in gt_boxes:
+            gt_band = calculate_distance_status(xyxy[3] - xyxy[1], img_h)
+            close_total += gt_band == "매우 가까움"
+            ious = _iou(xyxy, cand_xyxy)
+            if len(ious):
+                ious[used | np.array([c != cls_id for c, _ in cand], dtype=bool)] = -1
+            if not len(ious) or ious.max() < 0.5:
+                missed_close += gt_band == "매우 가까움"
+                continue
+            best = int(ious.argmax())
+            used[best] = True
+            pred_xyxy = cand[best][1]
+            pred_band = calculate_distance_status(pred_xyxy[3] - pred_xyxy[1], img_h)
+            confusion.setdefault(gt_band, {}).setdefault(pred_band, 0)
+            confusion[gt_band][pred_band] += 1
+            agree += gt_band == pred_band
+            total += 1
+    return {
+        "matched_boxes": total,
+        "agreement": round(agree / total, 4) if total else None,
+        "confusion": confusion,  # 정답 거리 → 예측 거리 → 개수
+        "close_miss_rate": round(missed_close / close_total, 4) if close_total else None,
+    }
+
+
+# ==================== 지연 ====================
+def measure_latency(model, images: List[np.ndarray], batch_sizes: List[int], repeat: int,
+                    imgsz: int, conf: float) -> Dict[str, Dict]:
+    """배치 크기별 이미지당 지연 백분위수(ms)와 처리량"""
+    result = {}
+    for batch in batch_sizes:
+        batches = [images[i:i + batch] for i in range(0, len(images) - batch + 1, batch)][:repeat]
+        if not batches:
+            continue
+        # 워밍업 (첫 호출의 그래프 준비·메모리 할당 제외)
+        for _ in range(2):
+            model.predict(batches[0], verbose=False, imgsz=imgsz, conf=conf)
+        per_image = []
+        t_total = time.perf_counter()
+        for chunk in batches:
+            t0 = time.perf_counter()
+            model.predict(chunk, verbose=False, imgsz=imgsz, conf=conf)
+            per_image.append((time.perf_counter() - t0) * 1000 / len(chunk))
+        elapsed = time.perf_counter() - t_total
+        result[str(batch)] = {
+            **{k: round(v, 2) for k, v in percentiles(per_image).items()},
+            "images_per_sec": round(len(batches) * batch / elapsed, 2),
+            "batches": len(batches),
+        }
+    return result
+
+
+# ==================== 후보 1개 평가 ====================
+def evaluate_candidate(model_path: str, data_dir: str, limit: int, batch_sizes: List[int],
+                       repeat: int, imgsz: int, deploy_conf: float) -> Dict:
+    import cv2
+    from ultralytics import YOLO
+    from main_api import CLASS_NAMES
+
+    t0 = time.perf_counter()
+    model = YOLO(model_path, task="detect")
+    load_sec = time.perf_counter() - t0
+    mapping = class_mapping(dict(model.names), CLASS_NAMES)
+
+    img_paths = sorted(glob.glob(os.path.join(data_dir, "images", "*.jpg")))[:limit]
+    preds: Dict[str, List[PredBox]] = {}
+    gts: Dict[str, List[GtBox]] = {}
+    img_heights: Dict[str, int] = {}
+    latency_paths: List[str] = []
+
+    for path in img_paths:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        name = os.path.basename(path)
+        h, w = img.shape[:2]
+        img_heights[name] = h
+        gts[name] = load_ground_truth(
+            os.path.join(data_dir, "labels", os.path.splitext(name)[0] + ".txt"), w, h
+        )
+        # mAP는 낮은 신뢰도까지 포함해 계산 (ultralytics val과 동일하게 0.001)
+        result = model.predict(img, verbose=False, imgsz=imgsz, conf=0.001)[0]
+        boxes = []
+        if result.boxes is not None:
+            for cls_id, conf, xyxy in zip(result.boxes.cls.tolist(), result.boxes.conf.tolist(),
+                                          result.boxes.xyxy.tolist()):
+                if int(cls_id) in mapping:
+                    boxes.append((mapping[int(cls_id)], conf, xyxy))
+        preds[name] = boxes
+        if len(latency_paths) < max(batch_sizes) * repeat:
+            latency_paths.append(path)
+
+    ap = per_class_ap(preds, gts, sorted(CLASS_NAMES))
+    valid = [v for v in ap.values() if v["ap50"] is not None]
+    return {
+        "model": model_path,
+        "size_mb": round(os.path.getsize(model_path) / 1e6, 1) if os.path.isfile(model_path) else None,
+        "load_sec": round(load_sec, 2),
+        "images": len(gts),
+        "unmapped_classes": sorted(name for cls_id, name in model.names.items() if cls_id not in mapping),
+        "map50": round(float(np.mean([v["ap50"] for v in valid])), 4) if valid else None,
+        "map50_95": round(float(np.mean([v["ap50_95"] for v in valid])), 4) if valid else None,
+        "per_class": {CLASS_NAMES[c]: v for c, v in ap.items()},
+        "distance": distance_agreement(preds, gts, img_heights, deploy_conf),
+        "latency_paths": latency_paths,
+    }
+
+
+def measure_runtime(model_path: str, image_paths: List[str], batch_sizes: List[int], repeat: int,
+                    imgsz: int, conf: float) -> Dict:
+    """새 프로세스에서 모델과 측정용 배치 프레임만 들고 지연과 메모리(RSS)를 측정"""
+    import cv2
+    from ultralytics import YOLO
+
+    before_load = current_memory_mb()
+    model = YOLO(model_path, task="detect")
+    after_load = current_memory_mb()
+    images = [img for img in (cv2.imread(p) for p in image_paths) if img is not None]
+    latency = measure_latency(model, images, batch_sizes, repeat, imgsz, conf)
+    return {
+        "latency_ms": latency,
+        "memory_mb": {
+            "before_load": before_load,
+            "after_load": after_load,
+            "model": round(after_load - before_load, 1) if before_load is not None and after_load is not None else None,
+            "after_inference": current_memory_mb(),
+            "peak": peak_memory_mb(),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="모델/런타임 후보 정확도 + CPU 지연 스코어보드")
+    parser.add_argument("--models", nargs="+", required=True, help=".pt / .onnx / *_openvino_model 등")
+    parser.add_argument("--data", default="data/Filtered/Val", help="images/, labels/ 를 포함한 폴더")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--repeat", type=int, default=20, help="배치 크기별 측정 배치 수")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25, help="배포 신뢰도 (거리 판정·지연 측정용)")
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+
+    scoreboard = []
+    # 후보마다 정확도/지연 각각 새 프로세스 → 메모리와 torch 스레드 상태가 서로 영향을 주지 않음
+    ctx = multiprocessing.get_context("spawn")
+    for model_path in args.models:
+        print(f"🔍 평가 중: {model_path}")
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                entry = executor.submit(
+                    evaluate_candidate, model_path, args.data, args.limit, args.batch_sizes,
+                    args.repeat, args.imgsz, args.conf
+                ).result()
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                runtime = executor.submit(
+                    measure_runtime, model_path, entry.pop("latency_paths"), args.batch_sizes,
+                    args.repeat, args.imgsz, args.conf
+                ).result()
+            entry.update(runtime, peak_memory_mb=runtime["memory_mb"]["peak"])
+        except Exception as e:
+            print(f"   ❌ 평가 실패: {e}")
+            entry = {"model": model_path, "error": str(e)}
+        scoreboard.append(entry)
+
+    print(f"\n{'모델':40s} {'mAP50':>7s} {'mAP50-95':>9s} {'거리일치':>8s} {'p95(b=1)':>9s} {'메모리MB':>9s}")
+    for entry in sorted(scoreboard, key=lambda e: -(e.get("map50") or 0)):
+        if "error" in entry:
+            print(f"{entry['model']:40s} 실패")
+            continue
+        p95 = entry["latency_ms"].get("1", {}).get("p95")
+        print(f"{entry['model']:40s} {entry['map50'] or 0:7.3f} {entry['map50_95'] or 0:9.3f} "
+              f"{entry['distance']['agreement'] or 0:8.3f} {p95 or 0:9.1f} {entry['peak_memory_mb'] or 0:9.1f}")
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "out_dir"},
+        "scoreboard": scoreboard,
+    }
+    write_result("model_eval", report, **({"out_dir": args.out_dir} if args.out_dir else {}))
@@ -0,0 +1,123 @@
+"""
+/detect 부하 테스트
+
+실제 검증 이미지(Filtered/Val/images)를 지정한 동시성으로 /detect 에 보내고
+p50/p95/p99 지연과 초당 요청 수를 JSON으로 기록합니다.
+LLM/TTS는 benchmarks.stub_openai 스텁 서버를 쓰도록 API 서버를 띄워야
+외부 네트워크와 무관하게 재현 가능한 수치가 나옵니다.
+
+실행 예:
+    python -m benchmarks.stub_openai --llm-delay 0.3 --tts-delay 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=stub uvicorn main_api:app --port 8000
+    python -m benchmarks.load_test --images data/Filtered/Val/images --concurrency 8 --requests 400
+"""
+import argparse
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+import requests
+
+from benchmarks.common import percentiles, write_result
+
+
+def load_images(image_dir: str, limit: int):
+    paths = sorted(
+        glob.glob(os.path.join(image_dir, "*.jpg")) + glob.glob(os.path.join(image_dir, "*.png"))
+    )[:limit]
+    # 디스크 I/O가 측정에 섞이지 않도록 미리 메모리에 올림
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+    return images
+
+
+def run_load(api_url: str, images, concurrency: int, total_requests: int,
+             warmup: int = 5, timeout: float = 60.0, params: dict = None):
+    """고정 개수의 요청을 concurrency 개 스레드로 보내고 요청별 지연을 수집"""
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def send(item):
+        filename, data = item
+        t0 = time.perf_counter()
+        try:
+            resp = session().post(
+                f"{api_url}/detect",
+                files={"file": (filename, data, "image/jpeg")},
+                params=params,
+                timeout=timeout
+            )
+            ok = resp.status_code == 200
+            status = resp.status_code
+        except requests.RequestException as e:
+            ok, status = False, type(e).__name__
+        return time.perf_counter() - t0, ok, status
+
+    source = cycle(images)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # 워밍업 (모델/커넥션 초기화) - 측정에서 제외
+        list(pool.map(send, [next(source) for _ in range(warmup)]))
+
+        t_start = time.perf_counter()
+        outcomes = list(pool.map(send, [next(source) for _ in range(total_requests)]))
+        wall = time.perf_counter() - t_start
+
+    latencies = [lat for lat, ok, _ in outcomes if ok]
+    errors = {}
+    for _, ok, status in outcomes:
+        if not ok:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+
+    return {
+        "requests": total_requests,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "requests_per_sec": round(len(latencies) / wall, 2) if wall else None,
+        "latency_ms": {
+            k: round(v * 1000, 1) if v is not None else None
+            for k, v in percentiles(latencies).items()
+        },
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/detect 부하 테스트")
+    parser.add_argument("--api-url", default="http://localhost:8000")
+    parser.add_argument("--images", default="data/Filtered/Val/images")
+    parser.add_argument("--limit", type=int, default=200, help="사용할 이미지 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=200, help="동시성 단계별 요청 수")
+    parser.add_argument("--sliced", action="store_true", help="/detect?sliced=true 로 요청")
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.limit)
+    if not images:
+        print(f"❌ {args.images}에 이미지가 없습니다.")
+        raise SystemExit(1)
+
+    params = {"sliced": "true"} if args.sliced else None
+    report = {"config": vars(args), "runs": []}
+    print(f"🔄 이미지 {len(images)}개 | 동시성 {args.concurrency} | 단계별 {args.requests}건")
+    for concurrency in args.concurrency:
+        run = run_load(args.api_url, images, concurrency, args.requests, params=params)
+        run["concurrency"] = concurrency
+        report["runs"].append(run)
+        lat = run["latency_ms"]
+        print(
+            f"   동시성 {concurrency:>3}: {run['requests_per_sec']} req/s | "
+            f"p50 {lat['p50']}ms p95 {lat['p95']}ms p99 {lat['p99']}ms | 오류 {sum(run['errors'].values())}"
+        )
+
+    write_result("load_test", report, **({"out_dir": args.out_dir} if args.out_dir else {}))
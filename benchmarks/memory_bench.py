@@ -0,0 +1,117 @@
+"""
+/detect 업로드·디코딩 경로 메모리 벤치마크
+
+대형 드론 사진(기본 20MP)을 동시에 N건 처리할 때의 최대 RSS를
+- baseline : 압축 바이트와 디코딩 이미지를 응답 직전까지 유지 (기존 방식)
+- bounded  : 전역 바이트 예산(MemoryBudget) + 디코딩 직후/LLM 대기 전 조기 해제
+두 방식으로 비교합니다. YOLO/LLM은 고정 지연으로 대체하므로 모델·네트워크 없이 재현됩니다.
+방식마다 새 프로세스에서 측정해 최대 RSS가 섞이지 않습니다.
+
+실행:
+    python -m benchmarks.memory_bench --concurrency 50 --megapixels 20 --full-res
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+
+import cv2
+import numpy as np
+
+from benchmarks.common import peak_memory_mb, write_result
+from modules.image_decode import decode_image, estimate_decoded_bytes, is_jpeg, read_image_size
+from modules.upload_limits import MemoryBudget, Reservation, UploadRejected
+
+
+def make_jpeg(megapixels: float, quality: int = 95) -> bytes:
+    """압축이 잘 안 되는(노이즈 섞인) 3:2 비율 합성 JPEG"""
+    h = int((megapixels * 1e6 / 1.5) ** 0.5)
+    w = int(h * 1.5)
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+async def _request(data: bytes, budget: MemoryBudget, bounded: bool, target_size,
+                   infer_delay: float, llm_delay: float) -> str:
+    reservation = Reservation(budget, timeout=60.0) if bounded else None
+    try:
+        if bounded:
+            await reservation.grow(len(data))
+        contents = bytes(data)  # 업로드 읽기 → 요청별 버퍼
+        if bounded:
+            await reservation.grow(
+                estimate_decoded_bytes(read_image_size(contents), target_size, jpeg=is_jpeg(contents))
+            )
+        img, _ = await asyncio.to_thread(decode_image, contents, target_size)
+        if bounded:
+            reservation.shrink(len(contents))
+            contents = None
+        await asyncio.sleep(infer_delay)  # YOLO 추론
+        if bounded:
+            reservation.shrink(img.nbytes)
+            img = None
+        await asyncio.sleep(llm_delay)    # LLM/TTS 대기
+        return "ok"
+    except UploadRejected as e:
+        return e.reason
+    finally:
+        if reservation is not None:
+            reservation.close()
+
+
+def run_mode(mode: str, megapixels: float, concurrency: int, full_res: bool, budget_mb: int,
+             infer_delay: float, llm_delay: float) -> Dict:
+    data = make_jpeg(megapixels)
+    target_size = None if full_res else 640
+    before = peak_memory_mb()
+
+    async def main():
+        budget = MemoryBudget(budget_mb * 1024 * 1024)
+        return await asyncio.gather(*[
+            _request(data, budget, mode == "bounded", target_size, infer_delay, llm_delay)
+            for _ in range(concurrency)
+        ])
+
+    t0 = time.perf_counter()
+    outcomes = asyncio.run(main())
+    elapsed = time.perf_counter() - t0
+    after = peak_memory_mb()
+    return {
+        "mode": mode,
+        "upload_mb": round(len(data) / 1e6, 1),
+        "peak_rss_mb": after,
+        "peak_delta_mb": round(after - before, 1) if before is not None and after is not None else None,
+        "wall_sec": round(elapsed, 2),
+        "outcomes": {k: outcomes.count(k) for k in set(outcomes)},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="업로드·디코딩 경로 최대 메모리 비교")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--megapixels", type=float, default=20.0)
+    parser.add_argument("--full-res", action="store_true", help="원본 해상도 디코딩 (슬라이스 모드와 동일)")
+    parser.add_argument("--budget-mb", type=int, default=512)
+    parser.add_argument("--infer-delay", type=float, default=0.2)
+    parser.add_argument("--llm-delay", type=float, default=1.0)
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for mode in ("baseline", "bounded"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+            row = executor.submit(
+                run_mode, mode, args.megapixels, args.concurrency, args.full_res,
+                args.budget_mb, args.infer_delay, args.llm_delay
+            ).result()
+        print(f"{mode:>8}: 최대 RSS {row['peak_rss_mb']}MB (증가 {row['peak_delta_mb']}MB), "
+              f"{row['wall_sec']}s, {row['outcomes']}")
+        results.append(row)
+
+    report = {"config": {k: v for k, v in vars(args).items() if k != "out_dir"}, "results": results}
+    write_result("memory_bench", report, **({"out_dir": args.out_dir} if args.out_dir else {}))
@@ -0,0 +1,182 @@
+"""
+핵심 함수 마이크로벤치마크
+
+- process_yolo_results  (main_api)       : YOLO 결과 → 응답 JSON 변환
+- convert_single_file   (json2Yolo)      : JSON 라벨 1개 → YOLO txt
+- filter_dataset        (json2Yolo)      : 이미지-라벨 매칭 후 복사
+- load_detection_logs   (월간 리포트)     : detections.log → DataFrame
+
+입력은 임시 디렉토리에 합성 데이터로 생성하므로 어느 호스트에서나 동일 조건으로 재현됩니다.
+
+실행:
+    python -m benchmarks.microbench --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+# main_api → llm_module 임포트 시 OpenAI 클라이언트가 키를 요구하므로 더미 값 지정
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.common import write_result  # noqa: E402
+
+
+def timed(fn, repeat: int, setup=None):
+    """fn을 repeat회 실행해 최소/중앙값/평균(ms)을 반환 (setup은 측정에서 제외)"""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+# ==================== process_yolo_results ====================
+class _FakeBox:
+    def __init__(self, cls_id, conf, xyxy):
+        self.cls = np.array([cls_id], dtype=np.float32)
+        self.conf = np.array([conf], dtype=np.float32)
+        self.xyxy = np.array([xyxy], dtype=np.float32)
+
+
+class _FakeResult:
+    def __init__(self, n_boxes, shape=(1080, 1920)):
+        rng = random.Random(n_boxes)
+        self.orig_shape = shape
+        self.boxes = []
+        for _ in range(n_boxes):
+            x1, y1 = rng.uniform(0, shape[1] - 100), rng.uniform(0, shape[0] - 100)
+            w, h = rng.uniform(5, 400), rng.uniform(5, 600)
+            self.boxes.append(_FakeBox(rng.randrange(5), rng.random(), [x1, y1, x1 + w, y1 + h]))
+
+
+def bench_process_yolo_results(repeat: int, inner: int = 1000):
+    from main_api import process_yolo_results
+
+    out = {}
+    for n_boxes in (0, 5, 50):
+        results = [_FakeResult(n_boxes)]
+        stats = timed(lambda: [process_yolo_results(results) for _ in range(inner)], repeat)
+        out[f"{n_boxes}_boxes"] = {k: round(v / inner * 1000, 2) for k, v in stats.items()}
+    return {"unit": "us_per_call", **out}
+
+
+# ==================== json2Yolo ====================
+def make_dataset(root: str, n_files: int, img_size=(1920, 1080)):
+    """합성 JSON 라벨 + JPEG 이미지 세트 생성"""
+    json_dir = os.path.join(root, "json")
+    img_dir = os.path.join(root, "Origin")
+    lbl_dir = os.path.join(root, "labels")
+    for d in (json_dir, img_dir, lbl_dir):
+        os.makedirs(d, exist_ok=True)
+
+    rng = random.Random(0)
+    template = Image.new("RGB", img_size, (40, 90, 120))
+    for i in range(n_files):
+        name = f"I2_S0_C5_{i:07d}"
+        template.save(os.path.join(img_dir, f"{name}.jpg"), quality=85)
+        anns = [
+            {
+                "filename": f"{name}.jpg",
+                "class": rng.randint(1, 5),
+                "bbox": [rng.uniform(0, 1500), rng.uniform(0, 800), rng.uniform(10, 300), rng.uniform(10, 200)]
+            }
+            for _ in range(rng.randint(1, 4))
+        ]
+        with open(os.path.join(json_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump({"annotations": anns}, f)
+    return json_dir, img_dir, lbl_dir
+
+
+def bench_json2yolo(repeat: int, n_files: int):
+    from data_tools.json2Yolo import convert_single_file, filter_dataset
+
+    root = tempfile.mkdtemp(prefix="bench_json2yolo_")
+    try:
+        json_dir, img_dir, lbl_dir = make_dataset(root, n_files)
+        files = sorted(os.listdir(json_dir))
+
+        convert = timed(
+            lambda: [convert_single_file((f, json_dir, img_dir, lbl_dir)) for f in files], repeat
+        )
+
+        out_img = os.path.join(root, "Filtered", "images")
+        out_lbl = os.path.join(root, "Filtered", "labels")
+
+        def reset():
+            shutil.rmtree(os.path.join(root, "Filtered"), ignore_errors=True)
+
+        filt = timed(lambda: filter_dataset(img_dir, lbl_dir, out_img, out_lbl, "bench"), repeat, setup=reset)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "files": n_files,
+        "convert_single_file": {**convert, "per_file_ms": round(convert["median_ms"] / n_files, 3)},
+        "filter_dataset": {**filt, "per_file_ms": round(filt["median_ms"] / n_files, 3)},
+    }
+
+
+# ==================== load_detection_logs ====================
+def bench_load_detection_logs(repeat: int, n_lines: int):
+    from generate_monthly_report import load_detection_logs
+
+    rng = random.Random(0)
+    objects = ["어선 → 중간 거리", "사람 → 매우 가까움", "상선 → 멀리 있음", "군함 → 중간 거리"]
+    fd, path = tempfile.mkstemp(prefix="bench_detections_", suffix=".log")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for i in range(n_lines):
+                f.write(json.dumps({
+                    "timestamp": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:{i % 60:02d}:00",
+                    "level": rng.choice(["경보", "주의"]),
+                    "summary": "벤치마크",
+                    "action": "관측",
+                    "detected_objects": rng.sample(objects, rng.randint(1, 3)),
+                    "filename": f"frame_{i}.jpg"
+                }, ensure_ascii=False) + "\n")
+        stats = timed(lambda: load_detection_logs(path), repeat)
+    finally:
+        os.remove(path)
+    return {"lines": n_lines, **stats}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="핵심 함수 마이크로벤치마크")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--files", type=int, default=200, help="json2Yolo 합성 파일 수")
+    parser.add_argument("--log-lines", type=int, default=50000)
+    parser.add_argument("--only", nargs="+",
+                        choices=["process_yolo_results", "json2yolo", "load_detection_logs"])
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+
+    selected = set(args.only or ["process_yolo_results", "json2yolo", "load_detection_logs"])
+    report = {"config": vars(args), "results": {}}
+
+    if "process_yolo_results" in selected:
+        print("🔄 process_yolo_results")
+        report["results"]["process_yolo_results"] = bench_process_yolo_results(args.repeat)
+    if "json2yolo" in selected:
+        print("🔄 convert_single_file / filter_dataset")
+        report["results"]["json2yolo"] = bench_json2yolo(args.repeat, args.files)
+    if "load_detection_logs" in selected:
+        print("🔄 load_detection_logs")
+        report["results"]["load_detection_logs"] = bench_load_detection_logs(args.repeat, args.log_lines)
+
+    print(json.dumps(report["results"], ensure_ascii=False, indent=2))
+    write_result("microbench", report, **({"out_dir": args.out_dir} if args.out_dir else {}))
@@ -0,0 +1,88 @@
+"""
+부하 테스트용 OpenAI 호환 스텁 서버 (LLM/TTS)
+
+실제 OpenAI를 호출하지 않고 고정 지연 후 고정 응답을 돌려주므로
+/detect 처리량 측정 결과가 외부 네트워크 상태에 흔들리지 않습니다.
+
+실행:
+    python -m benchmarks.stub_openai --port 9100 --llm-delay 0.3 --tts-delay 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=stub uvicorn main_api:app
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_WARNING = {
+    "level": "주의",
+    "summary": "스텁 경고: 선박 관측",
+    "action": "이동 경로 지속 관측"
+}
+# 유효한 MPEG 프레임 헤더로 시작하는 더미 오디오 (약 4KB)
+STUB_AUDIO = b"\xff\xfb\x90\x64" + b"\x00" * 4092
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    llm_delay = 0.0
+    tts_delay = 0.0
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # 서킷 브레이커 상태 확인(models.list)용
+        if self.path.endswith("/models"):
+            body = {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "owned_by": "stub"}]}
+            self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+        else:
+            self._send(404, b'{"error": "not found"}', "application/json")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        if self.path.endswith("/chat/completions"):
+            time.sleep(self.llm_delay)
+            body = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "gpt-4o-mini",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(STUB_WARNING, ensure_ascii=False)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            }
+            self._send(200, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json")
+        elif self.path.endswith("/audio/speech"):
+            time.sleep(self.tts_delay)
+            self._send(200, STUB_AUDIO, "audio/mpeg")
+        else:
+            self._send(404, b'{"error": "not found"}', "application/json")
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 콘솔 출력하지 않음
+
+
+def serve(host: str = "127.0.0.1", port: int = 9100, llm_delay: float = 0.0, tts_delay: float = 0.0):
+    StubHandler.llm_delay = llm_delay
+    StubHandler.tts_delay = tts_delay
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    print(f"🧪 OpenAI 스텁 서버: http://{host}:{port}/v1 (LLM {llm_delay}s, TTS {tts_delay}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI 호환 LLM/TTS 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="chat.completions 응답 지연(초)")
+    parser.add_argument("--tts-delay", type=float, default=0.0, help="audio.speech 응답 지연(초)")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.llm_delay, args.tts_delay)
@@ -0,0 +1,220 @@
+# 연속 영상 프레임(예: I2_S0_C5_0008068.jpg) 중 거의 같은 이미지를 묶어 대표 프레임만 남기는 스크립트
+import os
+import csv
+import shutil
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+from tqdm import tqdm
+
+HASH_BITS = 64
+
+
+# ==================== 지각 해시 (dHash) ====================
+def compute_dhash(img_path):
+    """이미지의 64비트 dHash (밝기 기울기 부호) 계산. 실패 시 None"""
+    # JPEG는 1/8 축소 디코딩으로 충분 (해시는 9x8 크기만 필요)
+    img = cv2.imread(img_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return img_path, None
+
+    small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return img_path, value
+
+
+def compute_hashes(img_paths, workers=8):
+    """프로세스 풀로 해시 계산 → {경로: 해시}"""
+    hashes = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(compute_dhash, img_paths, chunksize=64)
+        for path, value in tqdm(results, total=len(img_paths), desc="   해시 계산", unit="file"):
+            if value is not None:
+                hashes[path] = value
+    return hashes
+
+
+# ==================== 다중 인덱스 해싱 (Hamming 거리 검색) ====================
+class MultiIndexHash:
+    """
+    비둘기집 원리: 64비트를 (max_distance + 1)개 구간으로 나누면
+    Hamming 거리 <= max_distance 인 두 해시는 적어도 한 구간이 완전히 같다.
+    → 구간별 사전에서 후보만 뽑아 실제 거리를 확인 (전수 비교 O(n²) 회피)
+    """
+
+    def __init__(self, max_distance=6, bits=HASH_BITS):
+        self.max_distance = max_distance
+        chunks = max_distance + 1
+        edges = np.linspace(0, bits, chunks + 1).astype(int)
+        self.spans = [(int(lo), int(hi)) for lo, hi in zip(edges[:-1], edges[1:])]
+        self.tables = [defaultdict(list) for _ in self.spans]
+        self.values = []
+
+    def _chunk(self, value, span):
+        lo, hi = span
+        return (value >> lo) & ((1 << (hi - lo)) - 1)
+
+    def add(self, value):
+        idx = len(self.values)
+        self.values.append(value)
+        for table, span in zip(self.tables, self.spans):
+            table[self._chunk(value, span)].append(idx)
+        return idx
+
+    def query(self, value):
+        """거리 max_distance 이내 항목의 (인덱스, 거리) 목록"""
+        candidates = set()
+        for table, span in zip(self.tables, self.spans):
+            candidates.update(table.get(self._chunk(value, span), ()))
+        matches = []
+        for idx in candidates:
+            dist = (self.values[idx] ^ value).bit_count()
+            if dist <= self.max_distance:
+                matches.append((idx, dist))
+        return matches
+
+
+# ==================== 클러스터링 ====================
+def sequence_key(filename):
+    """'I2_S0_C5_0008068.jpg' → 'I2_S0_C5' (같은 영상 구간)"""
+    stem = os.path.splitext(filename)[0]
+    return stem.rsplit("_", 1)[0] if "_" in stem else stem
+
+
+def read_label_classes(lbl_path):
+    """라벨 파일의 클래스 ID 집합 (라벨 다양성 보존용)"""
+    if not os.path.exists(lbl_path):
+        return frozenset()
+    with open(lbl_path, "r", encoding="utf-8") as f:
+        return frozenset(line.split()[0] for line in f if line.strip())
+
+
+def find_duplicate_clusters(names, hashes, label_classes, max_distance=6, same_sequence=True):
+    """
+    거의 같은 프레임을 묶은 클러스터 목록 (2개 이상인 것만)
+    - 리더 클러스터링: 프레임 순서대로 보면서 기존 대표(리더)와 max_distance 이내면 가장 가까운 리더에 합류,
+      아니면 새 리더가 됨. 모든 쌍을 이어 붙이면(단일 연결) 천천히 다가오는 선박처럼 인접 프레임끼리만 비슷한
+      구간 전체가 한 클러스터로 이어지므로, 리더와의 거리로만 묶어 클러스터 지름을 2 * max_distance로 제한
+    - same_sequence: 같은 영상 구간(파일명 접두어) 안에서만 묶음
+    - 라벨 클래스 구성이 다른 프레임은 묶지 않음 (희귀 클래스 프레임 보존)
+    반환: [[(이름, 리더와의 거리), ...], ...]
+    """
+    groups = defaultdict(list)
+    for i, name in enumerate(names):
+        key = (sequence_key(name) if same_sequence else "", label_classes[name])
+        groups[key].append(i)
+
+    clusters = []
+    for members in groups.values():
+        # 인덱스에는 리더만 넣음
+        index = MultiIndexHash(max_distance)
+        leader_clusters = []
+        for i in sorted(members, key=lambda k: names[k]):
+            matches = index.query(hashes[names[i]])
+            if matches:
+                local, dist = min(matches, key=lambda m: (m[1], m[0]))
+                leader_clusters[local].append((i, dist))
+            else:
+                index.add(hashes[names[i]])
+                leader_clusters.append([(i, 0)])
+        clusters.extend(c for c in leader_clusters if len(c) > 1)
+
+    return [
+        [(names[i], dist) for i, dist in sorted(cluster, key=lambda m: names[m[0]])]
+        for cluster in clusters
+    ]
+
+
+def pick_representatives(cluster, keep=1):
+    """클러스터(프레임 순 정렬)에서 시간적으로 고르게 keep개 선택"""
+    if len(cluster) <= keep:
+        return cluster
+    picks = np.linspace(0, len(cluster) - 1, keep).round().astype(int)
+    return [cluster[i] for i in sorted(set(picks))]
+
+
+# ==================== 메인 ====================
+def dedup_dataset(img_dir, lbl_dir, out_img, out_lbl, report_path,
+                  max_distance=6, keep_per_cluster=1, same_sequence=True, workers=8):
+    """
+    근접 중복 프레임을 제거한 데이터셋 사본 생성 + 제거 내역 리포트(CSV)
+
+    Args:
+        max_distance: 같은 프레임으로 볼 dHash Hamming 거리 (64비트 기준)
+        keep_per_cluster: 클러스터당 남길 프레임 수
+    """
+    os.makedirs(out_img, exist_ok=True)
+    os.makedirs(out_lbl, exist_ok=True)
+
+    names = sorted(f for f in os.listdir(img_dir) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+    print(f"\n🔍 근접 중복 프레임 탐색: {len(names)}개 (거리 <= {max_distance}, 클러스터당 {keep_per_cluster}개 유지)")
+
+    path_hashes = compute_hashes([os.path.join(img_dir, n) for n in names], workers=workers)
+    hashes = {os.path.basename(p): v for p, v in path_hashes.items()}
+    names = [n for n in names if n in hashes]
+    label_classes = {
+        n: read_label_classes(os.path.join(lbl_dir, os.path.splitext(n)[0] + ".txt")) for n in names
+    }
+
+    clusters = find_duplicate_clusters(names, hashes, label_classes, max_distance, same_sequence)
+
+    dropped = set()
+    with open(report_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["cluster_id", "dropped", "kept", "cluster_size", "leader_distance"])
+        for cluster_id, cluster in enumerate(clusters):
+            kept = pick_representatives(cluster, keep_per_cluster)
+            kept_names = [name for name, _ in kept]
+            for name, dist in cluster:
+                if name not in kept_names:
+                    dropped.add(name)
+                    writer.writerow([cluster_id, name, ";".join(kept_names), len(cluster), dist])
+
+    for name in tqdm(names, desc="   복사", unit="file"):
+        if name in dropped:
+            continue
+        shutil.copy(os.path.join(img_dir, name), out_img)
+        lbl_file = os.path.join(lbl_dir, os.path.splitext(name)[0] + ".txt")
+        if os.path.exists(lbl_file):
+            shutil.copy(lbl_file, out_lbl)
+
+    print(f"   ✅ 클러스터 {len(clusters)}개 | {len(names)}개 → {len(names) - len(dropped)}개 "
+          f"({len(dropped)}개 제거)")
+    print(f"   📄 제거 내역: {report_path}")
+    return {"total": len(names), "clusters": len(clusters), "dropped": len(dropped)}
+
+
+if __name__ == "__main__":
+    from json2Yolo import create_data_yaml
+
+    BASE_DIR = r"C:/Army_project/data"
+    filtered = os.path.join(BASE_DIR, "Filtered")
+    dedup = os.path.join(BASE_DIR, "Filtered_dedup")
+
+    # Train만 중복 제거 (Val은 평가 기준이 바뀌지 않도록 그대로 복사)
+    dedup_dataset(
+        os.path.join(filtered, "Train", "images"),
+        os.path.join(filtered, "Train", "labels"),
+        os.path.join(dedup, "Train", "images"),
+        os.path.join(dedup, "Train", "labels"),
+        report_path=os.path.join(BASE_DIR, "dedup_report.csv"),
+        max_distance=6,         # 값이 클수록 더 공격적으로 묶음
+        keep_per_cluster=1,
+        same_sequence=True,
+        workers=8
+    )
+    shutil.copytree(os.path.join(filtered, "Val"), os.path.join(dedup, "Val"), dirs_exist_ok=True)
+
+    create_data_yaml(
+        base_dir=dedup,
+        output_path=os.path.join(BASE_DIR, "data_dedup.yaml"),
+        train_path="Train/images",
+        val_path="Val/images"
+    )
@@ -1,10 +1,12 @@
 import os
 import json
+import queue
 import shutil
+import threading
 import yaml
 from PIL import Image
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from pathlib import Path
 
 # ==================== 설정 ====================
@@ -15,6 +17,8 @@ class_map = {
     "사람": 3,
     "유조류": 4
 }
+# 라벨과 짝을 찾을 이미지 확장자
+IMAGE_EXTS = [".jpg", ".jpeg", ".png", ".JPG"]
 
 # ==================== JSON → YOLO 변환 ====================
 def convert_single_file(args):
@@ -150,6 +154,27 @@ def convert_json_to_yolo(json_dir, img_dir, out_dir, workers=4, verbose=True):
 
 
 # ==================== 데이터셋 필터링 ====================
+def filter_single_label(lbl_file, img_dir, out_img, out_lbl):
+    """라벨 1개의 이미지 짝을 찾아 복사. 복사된 이미지 경로를 반환 (짝이 없거나 빈 라벨이면 None)"""
+    base = os.path.splitext(os.path.basename(lbl_file))[0]
+    
+    # 다양한 이미지 확장자 지원
+    img_file = None
+    for ext in IMAGE_EXTS:
+        candidate = os.path.join(img_dir, base + ext)
+        if os.path.exists(candidate):
+            img_file = candidate
+            break
+    
+    # 라벨 파일이 비어있는지 확인
+    if img_file and os.path.exists(lbl_file) and os.path.getsize(lbl_file) > 0:
+        # copy2: 원본 수정 시각 유지 → 재실행 시 resize_single_image의 최신 여부 판단이 동작
+        shutil.copy2(img_file, out_img)
+        shutil.copy2(lbl_file, out_lbl)
+        return os.path.join(out_img, os.path.basename(img_file))
+    return None
+
+
 def filter_dataset(img_dir, lbl_dir, out_img, out_lbl, split_name=""):
     """이미지-라벨 매칭 검증 후 필터링"""
     os.makedirs(out_img, exist_ok=True)
@@ -161,32 +186,178 @@ def filter_dataset(img_dir, lbl_dir, out_img, out_lbl, split_name=""):
     skipped = 0
     
     for lbl in tqdm(label_files, desc=f"   {split_name} 필터링", unit="file"):
-        base = os.path.splitext(lbl)[0]
-        
-        # 다양한 이미지 확장자 지원
-        img_file = None
-        for ext in [".jpg", ".jpeg", ".png", ".JPG"]:
-            candidate = os.path.join(img_dir, base + ext)
-            if os.path.exists(candidate):
-                img_file = candidate
-                break
-        
-        lbl_file = os.path.join(lbl_dir, lbl)
-        
-        if img_file and os.path.exists(lbl_file):
-            # 라벨 파일이 비어있는지 확인
-            if os.path.getsize(lbl_file) > 0:
-                shutil.copy(img_file, out_img)
-                shutil.copy(lbl_file, out_lbl)
-                copied += 1
-            else:
-                skipped += 1
+        if filter_single_label(os.path.join(lbl_dir, lbl), img_dir, out_img, out_lbl):
+            copied += 1
         else:
             skipped += 1
     
     return copied, skipped
 
 
+# ==================== 학습 해상도로 축소 ====================
+def resize_single_image(args):
+    """단일 이미지를 긴 변 = size로 축소 저장 (비율 유지 → letterbox 호환, 라벨 그대로 사용 가능)"""
+    src, dst, size, quality = args
+
+    result = {"status": "success", "file": os.path.basename(src), "bytes_in": 0, "bytes_out": 0}
+
+    try:
+        result["bytes_in"] = os.path.getsize(src)
+        # 이미 최신 축소본이 있으면 건너뜀 (재실행 시)
+        if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            result["status"] = "skipped"
+            result["bytes_out"] = os.path.getsize(dst)
+            return result
+
+        with Image.open(src) as im:
+            w, h = im.size
+            scale = size / max(w, h)
+            # EXIF 회전 정보는 유지 → 원본과 같은 방향으로 읽히므로 정규화 라벨이 그대로 맞음
+            exif = im.info.get("exif")
+            if scale >= 1:
+                # 이미 학습 크기 이하인 이미지는 확대하지 않고 그대로 복사
+                shutil.copyfile(src, dst)
+            else:
+                new_size = (max(1, round(w * scale)), max(1, round(h * scale)))
+                # JPEG는 DCT 단계에서 1/2~1/8로 먼저 줄여 읽음 (디코딩 비용 절감)
+                im.draft("RGB", new_size)
+                im = im.convert("RGB").resize(new_size, Image.BILINEAR, reducing_gap=2.0)
+                save_kwargs = {"quality": quality}
+                if exif:
+                    save_kwargs["exif"] = exif
+                im.save(dst, "JPEG", **save_kwargs)
+        result["bytes_out"] = os.path.getsize(dst)
+
+    except Exception as e:
+        result["status"] = "error"
+        result["reason"] = str(e)
+
+    return result
+
+
+# ==================== 스트리밍 파이프라인 ====================
+_DONE = object()  # 단계 종료 신호
+
+
+def stream_split(split, paths, convert_pool, resize_pool=None, queue_size=256, copy_workers=4,
+                 resize_to=None, jpeg_quality=90, skip_conversion=False, position=0):
+    """
+    한 분할(Train/Val)을 변환 → 필터링/복사 → (선택) 축소 단계로 흘려보냅니다.
+    변환이 끝난 라벨은 바로 복사 스레드로 넘어가고, 복사된 이미지는 바로 축소 프로세스로 넘어갑니다.
+    단계 사이 대기열은 queue_size로 제한되어, 뒤 단계가 밀리면 앞 단계가 기다립니다 (메모리 일정).
+
+    Args:
+        paths: json, img, lbl, out_img, out_lbl, (resize_to 지정 시) resize_img, resize_lbl 경로
+        convert_pool: JSON 파싱용 프로세스 풀 (Train/Val 공유)
+        resize_pool: 축소용 프로세스 풀 (resize_to 지정 시)
+    """
+    for key in ("lbl", "out_img", "out_lbl") + (("resize_img", "resize_lbl") if resize_to else ()):
+        os.makedirs(paths[key], exist_ok=True)
+
+    stats = {
+        "converted": 0, "conv_skipped": 0, "conv_errors": 0, "total_boxes": 0,
+        "copied": 0, "skipped": 0,
+        "resized": 0, "resize_skipped": 0, "resize_errors": 0, "bytes_in": 0, "bytes_out": 0,
+        "error_details": []
+    }
+    lock = threading.Lock()
+    labels = queue.Queue(maxsize=queue_size)
+    resize_slots = threading.BoundedSemaphore(queue_size)
+    resize_futures = []
+
+    # ---- 2단계: 필터링/복사 (I/O 작업 → 스레드) ----
+    def copier():
+        while True:
+            lbl_file = labels.get()
+            if lbl_file is _DONE:
+                return
+            copied = None
+            try:
+                copied = filter_single_label(lbl_file, paths["img"], paths["out_img"], paths["out_lbl"])
+                if copied and resize_to:
+                    # ---- 2-1단계: 축소 (CPU 작업 → 프로세스, 진행 중인 작업 수 제한) ----
+                    shutil.copy(lbl_file, paths["resize_lbl"])
+                    dst = os.path.join(paths["resize_img"], os.path.splitext(os.path.basename(copied))[0] + ".jpg")
+                    resize_slots.acquire()
+                    future = resize_pool.submit(resize_single_image, (copied, dst, resize_to, jpeg_quality))
+                    future.add_done_callback(lambda _: resize_slots.release())
+                    with lock:
+                        resize_futures.append(future)
+            except Exception as e:
+                # 한 파일의 오류로 스레드가 멈추면 대기열이 막히므로 기록만 하고 계속
+                with lock:
+                    stats["error_details"].append(f"❌ 복사 {os.path.basename(lbl_file)}: {e}")
+            with lock:
+                stats["copied" if copied else "skipped"] += 1
+            pbar.update(1)
+
+    # ---- 1단계: JSON → YOLO 변환 (CPU 작업 → 프로세스) ----
+    def on_converted(result):
+        if result["status"] == "success":
+            with lock:
+                stats["converted"] += 1
+                stats["total_boxes"] += result["lines"]
+            labels.put(os.path.join(paths["lbl"], result["file"].replace(".json", ".txt")))
+            return
+        with lock:
+            if result["status"] == "skipped":
+                stats["conv_skipped"] += 1
+                stats["error_details"].append(f"⚠️ {result['file']}: {result['reason']}")
+            else:
+                stats["conv_errors"] += 1
+                stats["error_details"].append(f"❌ {result['file']}: {result['reason']}")
+        pbar.update(1)
+
+    convert = not skip_conversion and os.path.isdir(paths["json"])
+    if convert:
+        sources = [f for f in os.listdir(paths["json"]) if f.endswith(".json")]
+    else:
+        # 변환을 건너뛰면 이미 있는 라벨 파일을 그대로 흘려보냄
+        sources = [f for f in os.listdir(paths["lbl"]) if f.endswith(".txt")]
+
+    pbar = tqdm(total=len(sources), desc=f"   {split}", unit="file", position=position)
+    copiers = [threading.Thread(target=copier, daemon=True) for _ in range(copy_workers)]
+    for t in copiers:
+        t.start()
+
+    try:
+        if convert:
+            in_flight = set()
+            for f in sources:
+                # 변환 중인 작업 수도 queue_size로 제한 (완료 순서대로 다음 단계에 전달)
+                if len(in_flight) >= queue_size:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        on_converted(future.result())
+                in_flight.add(convert_pool.submit(
+                    convert_single_file, (f, paths["json"], paths["img"], paths["lbl"])
+                ))
+            for future in as_completed(in_flight):
+                on_converted(future.result())
+        else:
+            for f in sources:
+                labels.put(os.path.join(paths["lbl"], f))
+    finally:
+        for _ in copiers:
+            labels.put(_DONE)
+        for t in copiers:
+            t.join()
+        wait(resize_futures)
+        pbar.close()
+
+    for future in resize_futures:
+        result = future.result()
+        if result["status"] == "error":
+            stats["resize_errors"] += 1
+            stats["error_details"].append(f"❌ 축소 {result['file']}: {result['reason']}")
+            continue
+        stats["resized" if result["status"] == "success" else "resize_skipped"] += 1
+        stats["bytes_in"] += result["bytes_in"]
+        stats["bytes_out"] += result["bytes_out"]
+
+    return stats
+
+
 # ==================== YAML 생성 ====================
 def create_data_yaml(base_dir, output_path, train_path, val_path, test_path=None):
     """YOLO 학습용 data.yaml 생성"""
@@ -208,7 +379,8 @@ def create_data_yaml(base_dir, output_path, train_path, val_path, test_path=None
 
 
 # ==================== 메인 파이프라인 ====================
-def preprocess_army_dataset(base_dir, workers=8, skip_conversion=False):
+def preprocess_army_dataset(base_dir, workers=8, skip_conversion=False, resize_to=None, jpeg_quality=90,
+                            queue_size=256, copy_workers=4):
     """
     전체 데이터 전처리 파이프라인
     
@@ -216,6 +388,10 @@ def preprocess_army_dataset(base_dir, workers=8, skip_conversion=False):
         base_dir: 데이터셋 루트 디렉토리
         workers: 병렬 처리 워커 수
         skip_conversion: JSON 변환 건너뛰기 (이미 변환된 경우)
+        resize_to: 학습 해상도 (예: 640). 지정 시 긴 변을 이 크기로 줄인 사본을 Filtered_<크기>/에 생성
+        jpeg_quality: 축소본 JPEG 품질
+        queue_size: 단계 사이 대기열 크기 (뒤 단계가 밀리면 앞 단계가 대기)
+        copy_workers: 분할별 이미지/라벨 복사 스레드 수
     """
     print("╔═══════════════════════════════════════╗")
     print("║   국방 AI 데이터 전처리 시스템      ║")
@@ -224,72 +400,76 @@ def preprocess_army_dataset(base_dir, workers=8, skip_conversion=False):
     # 경로 설정
     base_path = Path(base_dir)
     
-    # 원본 경로
-    train_json_dir = base_path / "Train" / "json"
-    train_img_dir = base_path / "Train" / "Origin"
-    train_lbl_dir = base_path / "Train" / "labels"
-    
-    val_json_dir = base_path / "Val" / "json"
-    val_img_dir = base_path / "Val" / "Origin"
-    val_lbl_dir = base_path / "Val" / "labels"
-    
-    # 필터링된 데이터 경로
+    # 필터링된 데이터 경로 (원본은 <분할>/json, <분할>/Origin, <분할>/labels)
     filtered_base = base_path / "Filtered"
-    train_out_img = filtered_base / "Train" / "images"
-    train_out_lbl = filtered_base / "Train" / "labels"
-    val_out_img = filtered_base / "Val" / "images"
-    val_out_lbl = filtered_base / "Val" / "labels"
     
-    # ========== 1단계: JSON → YOLO 변환 ==========
-    if not skip_conversion:
-        # Train 변환
-        if train_json_dir.exists():
-            train_stats = convert_json_to_yolo(
-                str(train_json_dir),
-                str(train_img_dir),
-                str(train_lbl_dir),
-                workers=workers
-            )
-        
-        # Val 변환
-        if val_json_dir.exists():
-            val_stats = convert_json_to_yolo(
-                str(val_json_dir),
-                str(val_img_dir),
-                str(val_lbl_dir),
-                workers=workers
-            )
-    else:
-        print("\n⏭️  [1단계] JSON 변환 건너뛰기 (skip_conversion=True)")
-    
-    # ========== 2단계: 데이터셋 필터링 ==========
-    print("\n🔍 [2단계] 데이터셋 필터링 시작")
-    
-    train_copied, train_skipped = filter_dataset(
-        str(train_img_dir),
-        str(train_lbl_dir),
-        str(train_out_img),
-        str(train_out_lbl),
-        split_name="Train"
-    )
-    
-    val_copied, val_skipped = filter_dataset(
-        str(val_img_dir),
-        str(val_lbl_dir),
-        str(val_out_img),
-        str(val_out_lbl),
-        split_name="Val"
-    )
-    
-    print(f"   ✅ Train: {train_copied}개 복사, {train_skipped}개 스킵")
-    print(f"   ✅ Val: {val_copied}개 복사, {val_skipped}개 스킵")
+    dataset_base = filtered_base
+    yaml_path = base_path / "data_filtered.yaml"
+    if resize_to:
+        dataset_base = base_path / f"Filtered_{resize_to}"
+        yaml_path = base_path / f"data_filtered_{resize_to}.yaml"
+
+    # ========== 1~2단계: 변환 → 필터링 → (선택) 축소 스트리밍 ==========
+    # 단계별로 전체가 끝나길 기다리지 않고, 변환된 라벨이 곧바로 복사·축소로 넘어갑니다.
+    # Train과 Val도 동시에 처리 (변환/축소 프로세스 풀은 공유)
+    print("\n🔄 [1~2단계] JSON 변환 → 필터링" + (f" → 축소(긴 변 {resize_to}px, JPEG 품질 {jpeg_quality})" if resize_to else "")
+          + (" (JSON 변환 건너뛰기)" if skip_conversion else ""))
+
+    splits = {}
+    for position, split in enumerate(["Train", "Val"]):
+        split_dir = base_path / split
+        paths = {
+            "json": str(split_dir / "json"),
+            "img": str(split_dir / "Origin"),
+            "lbl": str(split_dir / "labels"),
+            "out_img": str(filtered_base / split / "images"),
+            "out_lbl": str(filtered_base / split / "labels"),
+            "resize_img": str(dataset_base / split / "images"),
+            "resize_lbl": str(dataset_base / split / "labels"),
+        }
+        if not os.path.isdir(paths["json"]) and not os.path.isdir(paths["lbl"]):
+            print(f"   ⚠️ {split}: JSON/라벨 폴더가 없어 건너뜀")
+            continue
+        splits[split] = (paths, position)
+
+    resize_pool = ProcessPoolExecutor(max_workers=workers) if resize_to else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as convert_pool, \
+                ThreadPoolExecutor(max_workers=len(splits) or 1) as split_pool:
+            futures = {
+                split: split_pool.submit(
+                    stream_split, split, paths, convert_pool, resize_pool,
+                    queue_size=queue_size, copy_workers=copy_workers, resize_to=resize_to,
+                    jpeg_quality=jpeg_quality, skip_conversion=skip_conversion, position=position
+                )
+                for split, (paths, position) in splits.items()
+            }
+            split_stats = {split: future.result() for split, future in futures.items()}
+    finally:
+        if resize_pool is not None:
+            resize_pool.shutdown()
+
+    for split, st in split_stats.items():
+        if not skip_conversion:
+            print(f"   ✅ {split} 변환: 성공 {st['converted']}개 ({st['total_boxes']}개 박스), "
+                  f"스킵 {st['conv_skipped']}개, 오류 {st['conv_errors']}개")
+        print(f"   ✅ {split} 필터링: {st['copied']}개 복사, {st['skipped']}개 스킵")
+        if resize_to:
+            ratio = st["bytes_out"] / max(st["bytes_in"], 1)
+            print(f"   ✅ {split} 축소: {st['resized']}개 축소, {st['resize_skipped']}개 최신, "
+                  f"{st['resize_errors']}개 오류 | "
+                  f"{st['bytes_in'] / 1e9:.2f}GB → {st['bytes_out'] / 1e9:.2f}GB ({ratio:.0%})")
+        for detail in st["error_details"][:10]:
+            print(f"      {detail}")
+
+    train_copied = split_stats.get("Train", {}).get("copied", 0)
+    val_copied = split_stats.get("Val", {}).get("copied", 0)
     
     # ========== 3단계: data.yaml 생성 ==========
     print("\n📝 [3단계] YOLO 학습 설정 파일 생성")
     
-    yaml_path = base_path / "data_filtered.yaml"
     create_data_yaml(
-        base_dir=str(filtered_base),
+        base_dir=str(dataset_base),
         output_path=str(yaml_path),
         train_path="Train/images",
         val_path="Val/images"
@@ -303,7 +483,7 @@ def preprocess_army_dataset(base_dir, workers=8, skip_conversion=False):
     print(f"   - Train: {train_copied}개")
     print(f"   - Val: {val_copied}개")
     print(f"   - 총합: {train_copied + val_copied}개")
-    print(f"\n📂 출력 디렉토리: {filtered_base}")
+    print(f"\n📂 출력 디렉토리: {dataset_base}")
     print(f"📄 학습 설정: {yaml_path}")
     print("\n🚀 다음 단계: YOLO 모델 학습")
     print(f"   python train.py --data {yaml_path} --epochs 100")
@@ -318,5 +498,7 @@ if __name__ == "__main__":
     preprocess_army_dataset(
         base_dir=BASE_DIR,
         workers=8,              # CPU 코어 수에 맞게 조정
-        skip_conversion=False   # JSON 변환 건너뛰기 (False = 변환 수행)
+        skip_conversion=False,  # JSON 변환 건너뛰기 (False = 변환 수행)
+        resize_to=None,         # 640 지정 시 학습 해상도 축소본(Filtered_640/) 생성
+        jpeg_quality=90
     )
\ No newline at end of file
@@ -1,15 +1,42 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Depends, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from ultralytics import YOLO
 # TTS 기능이 포함된 LLM 모듈을 import합니다.
-from modules.llm_module import generate_warning, format_warning_text 
+from modules.circuit_breaker import BREAKERS
+from modules.llm_module import generate_warning, generate_fallback_warning, format_warning_text, warm_phrase_bank
+from modules.detector import load_yolo, extract_boxes, model_version, RawBox
+from modules.inference_pool import InferenceClient
+from modules.inference_profile import load_profile, apply_threads
+from modules.batching import MicroBatcher
+from modules.quality_tiers import QualityController, QUALITY_CONFIG, QUALITY_RECHECKS
+from modules.model_manager import ModelManager, ModelReloadError
+from modules.image_decode import decode_image, scale_boxes, read_image_size, estimate_decoded_bytes, is_jpeg
+from modules.sliced_inference import plan_slices, merge_slice_boxes, SLICE_CONFIG
+from modules.cascade import CASCADE_CONFIG, cascade_predict, relevant_class_ids
+from modules.audio_store import audio_store
+from modules.serialization import shape_response, parse_fields, render_response, encode_json, check_format
+from modules.frame_protocol import decode_frame, FrameProtocolError
+from modules.frame_gate import FrameGate, frame_signature
+from modules.result_cache import ResultCache, content_digest
+from modules.upload_limits import (
+    UPLOAD_LIMITS, MemoryBudget, Reservation, UploadRejected, check_upload_size, check_pixels
+)
+from modules.admission import AdmissionGate, AdmissionRejected, WarningLimiter, classify_priority, SAFE
+from modules.metrics import (
+    StageTimer, render_metrics, REQUESTS, REQUEST_SECONDS, DETECTIONS_PER_FRAME, WARNINGS,
+    WS_FRAMES, WS_FRAME_SECONDS
+)
 import cv2
 import numpy as np
+import os
+import asyncio
 import logging
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import json # JSON 로깅을 위해 추가
+import hashlib
 
 # --- 기본 로깅 설정 ---
 logging.basicConfig(
@@ -45,6 +72,28 @@ app.add_middleware(
 
 # --- 전역 변수 설정 ---
 yolo = None
+MODEL_VERSION = None
+# 가중치 핫 리로드 (감시 스레드 + /admin/reload-model). 로컬 모델 모드에서만 생성
+model_manager = None
+# 관리자 엔드포인트 인증 토큰. 설정하지 않으면 관리자 엔드포인트는 모두 거부
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# 별도 추론 서비스 주소 (예: "127.0.0.1:50051"). 설정 시 이 워커는 모델을 로드하지 않습니다.
+INFERENCE_SERVICE = os.getenv("INFERENCE_SERVICE")
+inference_client = None
+# 추론 서비스 응답 대기 한도 (초). 넘기면 요청은 500으로 끝나고 수용 슬롯/메모리 예산을 반납
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+# 캐스케이드 모드(CASCADE_MODE=1)에서 본 모델 앞에 돌리는 경량 스크리너
+screener = None
+screener_class_ids = None
+# 고정 카메라(camera_id) 별 키프레임/직전 결과 (프레임 차분 게이팅)
+frame_gate = FrameGate()
+# 같은 이미지 재요청 시 저장된 탐지/경고 반환 (모델/설정 버전이 바뀌면 무효화)
+result_cache = ResultCache()
+# 과부하 시 요청 수용 제어 (입구 대기열 + 우선순위별 경고 슬롯)
+admission_gate = AdmissionGate()
+warning_limiter = WarningLimiter()
+# 동시 업로드/디코딩 버퍼의 전역 바이트 예산
+memory_budget = MemoryBudget()
 CLASS_NAMES = { 
     0: "어선", 
     1: "상선", 
@@ -52,25 +101,110 @@ CLASS_NAMES = {
     3: "사람", 
     4: "유조류" 
 }
+# 모델 입력 크기. 업로드 JPEG는 이 크기를 덮는 최소 해상도(1/2, 1/4, 1/8)로 축소 디코딩
+# 시작 시 추론 프로파일의 imgsz로 갱신 (960/1280으로 튜닝했는데 640 근처로 디코딩 후 확대하지 않도록)
+MODEL_INPUT_SIZE = 640
+# YOLO predict 인자. 시작 시 추론 프로파일(benchmarks/autotune.py)의 imgsz를 반영
+PREDICT_KWARGS = {"conf": 0.25}
+INFERENCE_PROFILE = None
+# 프로파일 batch > 1이면 동시에 들어온 프레임을 묶어 한 번에 추론
+frame_batcher = None
+# 부하에 따라 입력 크기/신뢰도 단계를 조절 (0단계 = PREDICT_KWARGS)
+quality = QualityController()
+REDUCED_DECODE = os.getenv("REDUCED_DECODE", "1") == "1"
 DISTANCE_THRESHOLDS = { 
     "critical": 0.5,   # '매우 가까움' (이미지 높이의 50% 초과)
     "warning": 0.2     # '중간 거리' (이미지 높이의 20% 초과)
 }
 
+
+def config_version(model_id: str) -> str:
+    """모델 버전 + 결과에 영향을 주는 설정의 지문 (결과 캐시 키에 포함)"""
+    config = {
+        "input_size": MODEL_INPUT_SIZE,
+        "reduced_decode": REDUCED_DECODE,
+        "distance": DISTANCE_THRESHOLDS,
+        "slice": SLICE_CONFIG,
+        "cascade": CASCADE_CONFIG,
+        "predict": PREDICT_KWARGS,
+    }
+    digest = hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:8]
+    return f"{model_id}+{digest}"
+
+
+def install_model(model, version: str):
+    """검증을 마친 새 모델로 전역 참조를 교체 (진행 중인 요청은 이전 모델로 끝까지 처리)"""
+    global yolo, MODEL_VERSION
+    yolo, MODEL_VERSION = model, version
+    # 이전 모델로 만든 결과는 재사용하지 않음
+    result_cache.set_version(config_version(version))
+    frame_gate.invalidate()
+
+
 # --- 서버 시작 시 모델 로드 ---
 @app.on_event("startup")
 def load_model():
     """서버가 시작될 때 YOLO 모델을 메모리에 미리 로드합니다."""
-    global yolo
-    try:
-        model_path = "runs/army_project_clean_yolo11s/weights/best.pt"
-        yolo = YOLO(model_path)
-        logging.info(f"YOLO 커스텀 모델 로드 성공: {model_path}")
-    except Exception as e:
-        # 커스텀 모델 로드 실패 시, 백업용 기본 모델 로드
-        logging.warning(f"커스텀 모델 로드 실패: {e} | 백업 모델(yolov8n.pt) 사용")
-        yolo = YOLO("yolov8n.pt")
-        logging.info("백업 모델(yolov8n.pt) 로드 완료")
+    global yolo, MODEL_VERSION, model_manager, inference_client, screener, screener_class_ids
+    global INFERENCE_PROFILE, frame_batcher, MODEL_INPUT_SIZE
+    INFERENCE_PROFILE = load_profile()
+    PREDICT_KWARGS["imgsz"] = INFERENCE_PROFILE["imgsz"]
+    MODEL_INPUT_SIZE = PREDICT_KWARGS["imgsz"]
+    quality.configure(PREDICT_KWARGS)
+    if INFERENCE_SERVICE:
+        # 모델은 추론 서비스 프로세스가 소유 (HTTP 워커 수와 무관하게 메모리 사용)
+        # 스레드/워커 수도 추론 서비스가 같은 프로파일로 적용하고, 여기서는 imgsz만 전달
+        inference_client = InferenceClient(INFERENCE_SERVICE)
+        result_cache.set_version(config_version(f"service:{INFERENCE_SERVICE}"))
+        logging.info(f"추론 서비스 연결: {INFERENCE_SERVICE}")
+        return
+    apply_threads(INFERENCE_PROFILE["threads"])
+    # 커스텀 모델 로드 실패 시, 백업용 기본 모델 로드
+    yolo = load_yolo()
+    MODEL_VERSION = model_version(yolo)
+    # 모델이 바뀌면 이전 모델의 캐시 결과는 모두 무효
+    result_cache.set_version(config_version(MODEL_VERSION))
+    model_manager = ModelManager(install_model)
+    model_manager.set_current(yolo)
+    model_manager.start_watching()
+
+    if INFERENCE_PROFILE["batch"] > 1:
+        # 모델 객체 하나를 공유하므로 배치는 한 번에 하나씩 처리
+        frame_batcher = MicroBatcher(
+            predict_batch, window=INFERENCE_PROFILE["batch_window"],
+            max_batch=INFERENCE_PROFILE["batch"], max_inflight=1, name="yolo-batcher"
+        )
+    if INFERENCE_PROFILE["workers"] > 1:
+        logging.info(
+            f"추론 프로파일 workers={INFERENCE_PROFILE['workers']}는 추론 서비스 분리 모드(INFERENCE_SERVICE)에서 적용됩니다"
+        )
+    if INFERENCE_PROFILE["source"]:
+        logging.info(
+            f"추론 프로파일 적용: {INFERENCE_PROFILE['source']} | threads={INFERENCE_PROFILE['threads']}, "
+            f"batch={INFERENCE_PROFILE['batch']}, imgsz={INFERENCE_PROFILE['imgsz']}"
+        )
+
+    if CASCADE_CONFIG["enabled"]:
+        try:
+            screener = YOLO(CASCADE_CONFIG["screener_path"])
+            screener_class_ids = relevant_class_ids(screener)
+            logging.info(f"캐스케이드 스크리너 로드: {CASCADE_CONFIG['screener_path']}")
+        except Exception as e:
+            logging.warning(f"스크리너 로드 실패: {e} | 캐스케이드 없이 동작")
+
+
+@app.on_event("startup")
+def prepare_phrase_bank():
+    """규칙 기반 경고용 문구 뱅크에 빠진 조각이 있으면 백그라운드에서 렌더링"""
+    warm_phrase_bank()
+
+
+@app.on_event("shutdown")
+def close_inference_client():
+    if inference_client is not None:
+        inference_client.close()
+    if model_manager is not None:
+        model_manager.stop_watching()
 
 
 def calculate_distance_status(box_height: float, img_height: float) -> str:
@@ -90,19 +224,19 @@ def calculate_distance_status(box_height: float, img_height: float) -> str:
 
 def process_yolo_results(results) -> List[Dict]:
     """YOLO 추론 결과를 표준화된 JSON 리스트로 변환"""
-    detections = []
-    
     if not results or results[0].boxes is None:
-        return detections
+        return []
     
     # 원본 이미지 크기
     img_h, img_w = results[0].orig_shape
+    return build_detections(extract_boxes(results[0]), img_h)
+
+
+def build_detections(boxes: List[RawBox], img_h: float) -> List[Dict]:
+    """(클래스, 신뢰도, xyxy) 원시 박스를 표준화된 JSON 리스트로 변환"""
+    detections = []
     
-    for box in results[0].boxes:
-        cls_id = int(box.cls[0])
-        confidence = float(box.conf[0])
-        xyxy = box.xyxy[0].tolist() # [x1, y1, x2, y2]
-        
+    for cls_id, confidence, xyxy in boxes: # xyxy = [x1, y1, x2, y2]
         # 바운딩 박스 높이
         box_height = xyxy[3] - xyxy[1]
         
@@ -125,58 +259,361 @@ def process_yolo_results(results) -> List[Dict]:
     return detections
 
 
+def predict_batch(items: List[Tuple[object, Dict, np.ndarray]]) -> List[List[RawBox]]:
+    """frame_batcher가 모은 (모델, predict 인자, 프레임) 묶음을 같은 모델/인자끼리 한 번에 추론"""
+    groups: Dict[tuple, List[int]] = {}
+    for i, (model, kwargs, _) in enumerate(items):
+        groups.setdefault((id(model), tuple(sorted(kwargs.items()))), []).append(i)
+    boxes: List[List[RawBox]] = [[] for _ in items]
+    for indices in groups.values():
+        model, kwargs, _ = items[indices[0]]
+        results = model.predict([items[i][2] for i in indices], verbose=False, **kwargs)
+        for i, r in zip(indices, results):
+            boxes[i] = extract_boxes(r)
+    return boxes
+
+
+def has_critical(boxes: List[RawBox], img_h: float) -> bool:
+    """'매우 가까움' 거리 구간 박스가 있는지 (높이 비율 기준이라 축소 이미지 좌표로 판정 가능)"""
+    return any(
+        calculate_distance_status(xyxy[3] - xyxy[1], img_h) == "매우 가까움" for _, _, xyxy in boxes
+    )
+
+
+async def predict_frame(model, img: np.ndarray, sliced: bool, predict_kwargs: Dict, info: Dict) -> List[RawBox]:
+    """run_inference의 실제 추론 (캐스케이드 / 추론 서비스 / 프레임 배치 / 직접 호출)"""
+    if screener is not None and not sliced and inference_client is None:
+        boxes, cascade_info = cascade_predict(
+            screener, model, img, CASCADE_CONFIG, screener_class_ids, **predict_kwargs
+        )
+        info["cascade"] = cascade_info
+        return boxes
+
+    crops, regions = plan_slices(img) if sliced else ([img], None)
+
+    if inference_client is not None:
+        # 프레임은 공유 메모리로 전달하고 원시 박스만 돌려받음 (타일은 워커들에 분산)
+        futures = []
+        try:
+            for crop in crops:
+                futures.append(inference_client.submit(crop, **predict_kwargs))
+            payloads = await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(f) for f in futures)), INFERENCE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"추론 서비스 응답 시간 초과 ({INFERENCE_TIMEOUT:.0f}초)")
+        finally:
+            for f in futures:
+                inference_client.discard(f)
+        per_crop = [p["boxes"] for p in payloads]
+    elif frame_batcher is not None and not sliced:
+        per_crop = [await asyncio.wrap_future(frame_batcher.submit((model, predict_kwargs, img)))]
+    else:
+        results = model.predict(crops if sliced else img, verbose=False, **predict_kwargs)
+        per_crop = [extract_boxes(r) for r in results]
+
+    if not sliced:
+        return per_crop[0] if per_crop else []
+    info["tiles"] = len(crops) - 1
+    return merge_slice_boxes(per_crop, regions, SLICE_CONFIG["match_threshold"])
+
+
+async def run_inference(img: np.ndarray, sliced: bool = False) -> Tuple[List[RawBox], Dict]:
+    """
+    디코딩된 이미지에 YOLO 추론을 수행하고 (원시 박스, 추론 정보)를 반환합니다.
+    sliced=True이면 전체 프레임 + 겹치는 타일을 한 배치로 추론해 병합합니다.
+    캐스케이드 모드에서는 스크리너가 빈 장면으로 판정하면 본 모델을 생략합니다.
+    부하가 높으면 품질 단계(입력 크기/신뢰도)를 낮추고, 낮은 단계에서 '매우 가까움' 탐지가 나오면
+    최고 품질로 다시 추론해 그 결과를 사용합니다. 사용한 단계는 info["quality"]에 기록됩니다.
+    """
+    # 요청 도중 핫 리로드가 일어나도 한 요청은 한 모델로 끝까지 처리
+    model, version = yolo, MODEL_VERSION
+    # 슬라이스 모드는 원거리 소형 객체용이므로 항상 최고 품질
+    level = 0 if sliced else quality.select(admission_gate.waiting)
+    info = {"sliced": sliced, "model_version": version}
+
+    t0 = time.perf_counter()
+    boxes = await predict_frame(model, img, sliced, quality.kwargs(level), info)
+    quality.observe(level, time.perf_counter() - t0)
+    info["quality"] = {"tier": level, **quality.kwargs(level), "recheck": False}
+
+    if level > 0 and QUALITY_CONFIG["recheck_critical"] and has_critical(boxes, img.shape[0]):
+        boxes = await predict_frame(model, img, False, quality.kwargs(0), info)
+        info["quality"]["recheck"] = True
+        QUALITY_RECHECKS.inc()
+    return boxes, info
+
+
 # --- 메인 API 엔드포인트 ---
+def audio_available(warning: Dict) -> bool:
+    """재사용할 경고의 음성이 아직 오디오 저장소에 남아 있는지 (참조 방식일 때만 확인)"""
+    audio_id = warning.get("audio_id")
+    return audio_id is None or audio_store.get(audio_id) is not None
+
+
+def log_detection(response_data: Dict, filename: str):
+    """'주의' 또는 '경보' 레벨일 때만 'detections.log' 파일에 기록 (월간 리포트 집계용)"""
+    warning = response_data["warning"]
+    log_level = warning.get("level", "안전")
+    if log_level not in ["경보", "주의"]:
+        return
+    try:
+        # 로그에 남길 데이터만 간추림 (개인정보, 불필요한 데이터 제외)
+        log_data = {
+            "timestamp": response_data["timestamp"],
+            "level": log_level,
+            "summary": warning.get("summary", "N/A"),
+            "action": warning.get("action", "N/A"),
+            "detected_objects": response_data["detected_objects"],
+            "filename": filename
+        }
+        # JSON 문자열로 변환하여 로그 파일에 씀
+        detection_logger.info(json.dumps(log_data, ensure_ascii=False))
+    except Exception as e:
+        logging.error(f"탐지 로그 파일 쓰기 오류: {e}")
+
+
+def reuse_response(cached: Dict, inference_extra: Dict, filename: str, timer: StageTimer,
+                   request: Request, timings: bool, fields: str, compact: bool, format: str,
+                   log: bool = False):
+    """
+    저장된 응답(결과 캐시/프레임 게이팅)을 이번 요청 기준으로 갱신해 반환
+    log=True: 새 프레임으로 보고 detections.log에 기록 (고정 카메라 앞에 머무는 객체도 리포트에 남도록)
+    """
+    response_data = {
+        **cached,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "processing_time": round(timer.elapsed(), 2),
+        "image_info": {**cached["image_info"], "filename": filename},
+        "inference": {**cached["inference"], **inference_extra},
+    }
+    if log:
+        log_detection(response_data, filename)
+    REQUESTS.inc(status="success")
+    REQUEST_SECONDS.observe(timer.elapsed())
+    if timings:
+        response_data["timings"] = timer.spans
+    return render_response(
+        shape_response(response_data, parse_fields(fields), compact),
+        format,
+        request.headers.get("accept")
+    )
+
+
+@app.exception_handler(UploadRejected)
+async def upload_rejected_handler(request: Request, exc: UploadRejected):
+    """업로드 크기/해상도 초과(413), 메모리 예산 대기 초과(503)"""
+    logging.warning(f"업로드 거절 ({exc.status_code}): {exc.detail}")
+    REQUESTS.inc(status="rejected")
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=headers)
+
+
+def response_format(format: str = None):
+    """응답 포맷 검증. 수용 슬롯/메모리 예약보다 먼저 실행되도록 /detect 의존성 맨 앞에 둠"""
+    check_format(format)
+
+
+async def memory_reservation():
+    """요청이 쥐고 있는 업로드/디코딩 버퍼 예약 (응답 후 남은 예약은 모두 반납)"""
+    reservation = Reservation(memory_budget)
+    try:
+        yield reservation
+    finally:
+        reservation.close()
+
+
+async def admission_slot():
+    """/detect 입구 게이트: 대기열 초과 시 429, 대기 시간 초과 시 503 (Retry-After 포함)"""
+    try:
+        async with admission_gate.admit():
+            yield
+    except AdmissionRejected as e:
+        logging.warning(f"요청 거절 ({e.status_code}): {e.reason}")
+        REQUESTS.inc(status="rejected")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"서버가 혼잡합니다: {e.reason}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def run_warning(detected_objects: List[str], priority: str) -> Dict:
+    """우선순위에 따라 LLM/TTS 슬롯을 받아 경고를 생성하고, 슬롯이 없으면 규칙 기반으로 강등"""
+    if not detected_objects:
+        # 빈 장면은 LLM을 부르지 않으므로 슬롯 불필요
+        return await asyncio.to_thread(generate_warning, detected_objects)
+
+    if await warning_limiter.acquire(priority):
+        try:
+            # 이벤트 루프를 막지 않도록 스레드에서 실행 (동시 요청끼리 LLM 배치로 묶일 수 있음)
+            return await asyncio.to_thread(generate_warning, detected_objects)
+        finally:
+            warning_limiter.release()
+
+    # 혼잡: safe는 음성 없이, warning/critical은 규칙 기반 경고 + 음성
+    warning = await asyncio.to_thread(generate_fallback_warning, detected_objects, priority != SAFE)
+    warning["degraded"] = True
+    return warning
+
+
 @app.post("/detect")
-async def detect(file: UploadFile = File(...)):
+async def detect(
+    request: Request,
+    file: UploadFile = File(...),
+    sliced: bool = False,
+    timings: bool = False,
+    fields: str = None,
+    compact: bool = False,
+    format: str = None,
+    camera_id: str = None,
+    _format: None = Depends(response_format),
+    _admission: None = Depends(admission_slot),
+    reservation: Reservation = Depends(memory_reservation)
+):
     """
     이미지를 받아 객체 탐지(YOLO), 전술 경고(LLM), 음성(TTS)을 생성하고
     탐지 결과를 로깅합니다.
+    sliced=true: 고해상도 프레임을 타일로 나눠 추론 (원거리 소형 객체 탐지용)
+    timings=true: 단계별 소요시간(ms)을 응답의 'timings'에 포함
+    fields=detections,warning: 응답에 포함할 최상위 필드 선택 ('status'는 항상 포함)
+    compact=true: 중복 필드(detected_objects, warning.raw_detections) 제거
+    format=json|msgpack: 응답 인코딩 (미지정 시 Accept 헤더로 결정)
+    camera_id=...: 고정 카메라 ID. 장면 변화가 없으면 직전 탐지/경고를 재사용
     """
-    start_time = datetime.now()
+    timer = StageTimer()
     
     # 1. 이미지 검증
     if not file.content_type.startswith("image/"):
         logging.warning(f"잘못된 파일 타입 업로드: {file.content_type}")
+        REQUESTS.inc(status="bad_request")
         raise HTTPException(
             status_code=400, 
             detail=f"이미지 파일만 업로드 가능합니다. (현재: {file.content_type})"
         )
     
-    # 2. 이미지 디코딩
+    # 2. 이미지 읽기 (크기 상한 확인 후 예산을 빌려서 읽음)
+    check_upload_size(file.size)
+    max_upload = UPLOAD_LIMITS["max_upload_bytes"]
+    reserved = file.size if file.size is not None else max_upload
+    await reservation.grow(reserved)
     try:
-        contents = await file.read()
-        np_img = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(np_img, cv2.IMREAD_COLOR)
-        if img is None: 
-            raise ValueError("이미지 디코딩 실패 (cv2.imdecode 반환 값 None)")
-        logging.info(f"이미지 로드 성공: {file.filename} | 크기: {img.shape}")
+        with timer.stage("upload_read"):
+            # 크기를 모르는 업로드도 상한 + 1바이트까지만 읽어 초과 여부 판단
+            contents = await file.read(max_upload + 1)
+            await file.close()  # 임시 파일 버퍼 즉시 해제
     except Exception as e:
         logging.error(f"이미지 처리 오류: {e}")
+        REQUESTS.inc(status="bad_request")
         raise HTTPException(
             status_code=400, 
             detail=f"이미지 파일을 처리할 수 없습니다: {str(e)}"
         )
+
+    check_upload_size(len(contents))
+    reservation.shrink(reserved - len(contents))
+    variant = "sliced" if sliced else ""
+    # 요청을 시작할 때의 모델/설정 버전 (처리 중 모델이 교체되면 이 버전으로 저장되어 재사용되지 않음)
+    version = result_cache.version
+
+    # 2-1. 결과 캐시 (같은 이미지 재요청이면 저장된 탐지/경고를 바로 반환)
+    with timer.stage("cache"):
+        cache_key = result_cache.key(content_digest(contents), variant)
+        cached = result_cache.lookup(cache_key)
+    if cached is not None and audio_available(cached.get("warning", {})):
+        logging.info(f"동일 이미지 재요청: {file.filename} | 캐시 결과 반환")
+        return reuse_response(
+            cached, {"cache": "hit"}, file.filename, timer, request, timings, fields, compact, format
+        )
+
+    # 2-2. 고정 카메라 프레임 게이팅 (장면 변화가 없으면 디코딩/추론/경고 생성 생략)
+    gate_signature = None
+    gate_info = None
+    if camera_id:
+        with timer.stage("gate"):
+            gate_signature = frame_signature(contents)
+            if gate_signature is not None:
+                cached, decision, score = frame_gate.lookup(camera_id, gate_signature, variant, version)
+                gate_info = {"camera_id": camera_id, "decision": decision, "score": round(score, 2)}
+            else:
+                cached = None
+        if cached is not None:
+            logging.info(f"장면 변화 없음 (camera={camera_id}, score={gate_info['score']}) | 직전 결과 재사용")
+            return reuse_response(
+                cached, {"gate": {**gate_info, "keyframe_timestamp": cached["timestamp"]}},
+                file.filename, timer, request, timings, fields, compact, format, log=True
+            )
+
+    # 3. 이미지 디코딩
+    # 슬라이스 모드는 원본 해상도의 픽셀이 필요하므로 축소 디코딩하지 않음
+    target_size = MODEL_INPUT_SIZE if REDUCED_DECODE and not sliced else None
+    header_size = read_image_size(contents)
+    decoded_bytes = 0
+    if header_size is not None:
+        # 디코딩 전에 해상도 확인 + 디코딩 결과 크기만큼 예산 확보
+        check_pixels(*header_size)
+        decoded_bytes = estimate_decoded_bytes(header_size, target_size, jpeg=is_jpeg(contents))
+        await reservation.grow(decoded_bytes)
+    try:
+        with timer.stage("decode"):
+            img, orig_shape = decode_image(contents, target_size)
+        logging.info(
+            f"이미지 로드 성공: {file.filename} | 크기: {orig_shape} | 디코딩: {img.shape}"
+        )
+    except Exception as e:
+        logging.error(f"이미지 처리 오류: {e}")
+        REQUESTS.inc(status="bad_request")
+        raise HTTPException(
+            status_code=400, 
+            detail=f"이미지 파일을 처리할 수 없습니다: {str(e)}"
+        )
+    # 압축 바이트는 더 이상 필요 없음 → 즉시 해제하고 예약을 실제 디코딩 크기로 맞춤
+    upload_bytes = len(contents)
+    del contents
+    if header_size is None:
+        # 헤더로 해상도를 알 수 없던 형식은 디코딩 후 확인
+        check_pixels(*orig_shape)
+        reservation.shrink(upload_bytes)
+        await reservation.grow(img.nbytes)
+    elif img.nbytes > decoded_bytes:
+        # 추정보다 큰 배열 (채널/축소 여부 차이) → 부족분을 추가로 빌림
+        reservation.shrink(upload_bytes)
+        await reservation.grow(img.nbytes - decoded_bytes)
+    else:
+        reservation.shrink(upload_bytes + decoded_bytes - img.nbytes)
     
-    # 3. YOLO 추론
+    # 4. YOLO 추론
     try:
-        results = yolo.predict(img, verbose=False, conf=0.25)
-        detections = process_yolo_results(results)
-        logging.info(f"탐지 완료: {len(detections)}개 객체")
+        with timer.stage("inference"):
+            boxes, inference_info = await run_inference(img, sliced)
+        with timer.stage("postprocess"):
+            # 축소 디코딩 좌표 → 원본 좌표 (bbox, box_size, 거리 판정 기준 유지)
+            boxes = scale_boxes(boxes, img.shape[:2], orig_shape)
+            detections = build_detections(boxes, orig_shape[0])
+        # 디코딩 이미지는 LLM/TTS 대기 전에 해제
+        reservation.shrink(img.nbytes)
+        del img
+        DETECTIONS_PER_FRAME.observe(len(detections))
+        logging.info(f"탐지 완료: {len(detections)}개 객체{' (슬라이스)' if sliced else ''}")
     except Exception as e:
         logging.error(f"YOLO 추론 오류: {e}")
+        REQUESTS.inc(status="error")
         raise HTTPException(
             status_code=500, 
             detail=f"객체 탐지 중 서버 오류 발생: {str(e)}"
         )
 
-    # 4. LLM + TTS 경고 생성
+    # 5. LLM + TTS 경고 생성
     # LLM에 전달할 탐지 객체 리스트 생성
     detected_objects = [f"{d['class_name']} → {d['distance_status']}" for d in detections]
+    # 탐지 결과로 우선순위 결정 (critical이 LLM/TTS 슬롯을 먼저 받음)
+    priority = classify_priority(detected_objects)
     
     try:
         # llm_module_with_tts.py의 함수 호출
-        # 이 warning 딕셔너리 안에 audio_base64가 포함되어 있음
-        warning = generate_warning(detected_objects) 
+        # 이 warning 딕셔너리 안에 audio_url(기본) 또는 audio_base64가 포함되어 있음
+        with timer.stage("warning"):
+            warning = await run_warning(detected_objects, priority)
         logging.info(f"경고 생성(TTS포함) 완료: [{warning.get('level', 'N/A')}]")
     except Exception as e:
         # LLM/TTS 호출 실패 시에도 서비스는 중단되지 않음 (폴백)
@@ -186,57 +623,290 @@ async def detect(file: UploadFile = File(...)):
             "summary": "경고 메시지 생성 실패", 
             "action": "수동 확인 필요", 
             "source": "error", 
-            "audio_base64": None # 오디오 없음
+            "audio_url": None # 오디오 없음
         }
     
-    elapsed = (datetime.now() - start_time).total_seconds()
+    WARNINGS.inc(source=warning.get("source", "unknown"), level=warning.get("level", "N/A"))
+    elapsed = timer.elapsed()
     
-    # 5. 최종 응답 데이터 생성
+    if gate_info is not None:
+        inference_info["gate"] = gate_info
+
+    # 6. 최종 응답 데이터 생성
     response_data = {
         "status": "success",
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "processing_time": round(elapsed, 2),
         "image_info": { 
             "filename": file.filename, 
-            "size": img.shape[:2] # [height, width]
+            "size": list(orig_shape) # [height, width] (원본 기준)
         },
+        "inference": inference_info,
+        "priority": priority,
         "detections": detections,
         "detected_objects": detected_objects,
-        "warning": warning # 'audio_base64'가 포함된 경고 딕셔너리
+        "warning": warning # 'audio_url'(또는 'audio_base64')가 포함된 경고 딕셔너리
     }
 
-    # 6. 통계용 로그 기록
-    # '주의' 또는 '경보' 레벨일 때만 'detections.log' 파일에 기록
-    log_level = warning.get("level", "안전")
-    if log_level in ["경보", "주의"]:
+    # 혼잡으로 강등되었거나 실패한 경고, 낮은 품질 단계의 탐지는 재사용하지 않음 (다음 요청에서 정상 결과를 받도록)
+    low_quality = inference_info["quality"]["tier"] > 0 and not inference_info["quality"]["recheck"]
+    reusable = not warning.get("degraded") and warning.get("source") != "error" and not low_quality
+    # 고정 카메라는 이번 프레임을 키프레임으로 저장 (다음 프레임 비교 기준)
+    if gate_signature is not None:
+        if reusable:
+            frame_gate.store(camera_id, gate_signature, dict(response_data), variant, version)
+        else:
+            # 이전 키프레임 결과도 현재 장면과 다를 수 있으므로 다음 프레임은 다시 추론
+            frame_gate.invalidate(camera_id)
+    if reusable:
+        result_cache.store(cache_key, {
+            **response_data,
+            "inference": {k: v for k, v in inference_info.items() if k != "gate"}
+        })
+
+    # 7. 통계용 로그 기록
+    with timer.stage("logging"):
+        log_detection(response_data, file.filename)
+
+    REQUESTS.inc(status="success")
+    REQUEST_SECONDS.observe(timer.elapsed())
+    if timings:
+        response_data["timings"] = timer.spans
+
+    return render_response(
+        shape_response(response_data, parse_fields(fields), compact),
+        format,
+        request.headers.get("accept")
+    )
+
+
+# --- 원시 프레임 WebSocket 엔드포인트 ---
+async def process_ws_frame(header, img: np.ndarray, message_bytes: int, warnings: bool) -> Dict:
+    """
+    원시 프레임 1개 처리. /detect와 같이 입구 게이트 슬롯을 받고, 수신 버퍼(+흑백 → BGR 변환본)를 메모리 예산에서 빌림
+    거절 시 AdmissionRejected / UploadRejected
+    """
+    async with admission_gate.admit():
+        reservation = Reservation(memory_budget)
         try:
-            # 로그에 남길 데이터만 간추림 (개인정보, 불필요한 데이터 제외)
-            log_data = {
-                "timestamp": response_data["timestamp"],
-                "level": log_level,
-                "summary": warning.get("summary", "N/A"),
-                "action": warning.get("action", "N/A"),
-                "detected_objects": detected_objects,
-                "filename": file.filename
-            }
-            # JSON 문자열로 변환하여 로그 파일에 씀
-            detection_logger.info(json.dumps(log_data, ensure_ascii=False))
-        except Exception as e:
-            logging.error(f"탐지 로그 파일 쓰기 오류: {e}")
+            converted = header.height * header.width * 3 if header.channels == 1 else 0
+            await reservation.grow(message_bytes + converted)
+            if header.channels == 1:
+                img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+            boxes, inference_info = await run_inference(img)
+            detections = build_detections(boxes, header.height)
+            del img
+            DETECTIONS_PER_FRAME.observe(len(detections))
+        finally:
+            reservation.close()
+
+        result = {
+            "status": "success",
+            "camera_id": header.camera_id,
+            "seq": header.seq,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "inference": inference_info,
+            "detections": detections,
+        }
+        if warnings:
+            detected_objects = [f"{d['class_name']} → {d['distance_status']}" for d in detections]
+            result["priority"] = classify_priority(detected_objects)
+            result["warning"] = await run_warning(detected_objects, result["priority"])
+        return result
+
+
+@app.websocket("/ws/frames")
+async def ws_frames(websocket: WebSocket, warnings: bool = False):
+    """
+    서버 옆 캡처 장비용 원시 프레임 스트리밍 (형식: modules.frame_protocol)
+    JPEG 인코딩/디코딩 없이 픽셀을 그대로 받아 추론하고, 프레임마다 탐지 결과(JSON)를 같은 소켓으로 보냅니다.
+    추론보다 빨리 들어오면 최신 프레임만 처리하고 밀린 프레임은 건너뜁니다 (결과의 'dropped'에 누적).
+    프레임마다 /detect와 같은 입구 게이트와 메모리 예산을 거치며, 거절되면 오류 프레임(retry_after 포함)으로 알립니다.
+    warnings=true: 프레임마다 경고(LLM/TTS, 우선순위 슬롯 적용)까지 생성
+    """
+    await websocket.accept()
+    latest: asyncio.Queue = asyncio.Queue(maxsize=1)
+    dropped = 0
 
-    return JSONResponse(content=response_data)
+    async def receive_loop():
+        nonlocal dropped
+        try:
+            while True:
+                event = await websocket.receive()
+                if event["type"] == "websocket.disconnect":
+                    break
+                message = event.get("bytes")
+                if message is None:
+                    # 텍스트 메시지는 연결 종료가 아니라 형식 오류로 응답
+                    WS_FRAMES.inc(outcome="invalid")
+                    await websocket.send_text(encode_json(
+                        {"status": "error", "detail": "프레임은 바이너리 메시지로 보내야 합니다 (modules.frame_protocol)"}
+                    ))
+                    continue
+                if latest.full():
+                    latest.get_nowait()
+                    dropped += 1
+                    WS_FRAMES.inc(outcome="dropped")
+                latest.put_nowait(message)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            # 처리 루프 종료 신호
+            if latest.full():
+                latest.get_nowait()
+            latest.put_nowait(None)
+
+    receiver = asyncio.create_task(receive_loop())
+    try:
+        while True:
+            message = await latest.get()
+            if message is None:
+                break
+            t0 = time.perf_counter()
+            try:
+                # 메시지 버퍼를 그대로 참조하는 배열 (복사 없음)
+                header, img = decode_frame(message)
+                check_pixels(header.height, header.width)
+            except (FrameProtocolError, UploadRejected) as e:
+                WS_FRAMES.inc(outcome="invalid")
+                await websocket.send_text(encode_json({"status": "error", "detail": str(e)}))
+                continue
+
+            try:
+                result = await process_ws_frame(header, img, len(message), warnings)
+            except (AdmissionRejected, UploadRejected) as e:
+                WS_FRAMES.inc(outcome="rejected")
+                await websocket.send_text(encode_json({
+                    "status": "error", "seq": header.seq, "detail": f"서버가 혼잡합니다: {e}",
+                    "retry_after": e.retry_after,
+                }))
+                continue
+            except Exception as e:
+                logging.error(f"프레임 추론 오류 (camera={header.camera_id}, seq={header.seq}): {e}")
+                await websocket.send_text(encode_json({"status": "error", "seq": header.seq, "detail": str(e)}))
+                continue
+            del img, message
+            result["dropped"] = dropped
+            result["processing_time"] = round(time.perf_counter() - t0, 4)
+
+            await websocket.send_text(encode_json(result))
+            WS_FRAMES.inc(outcome="processed")
+            WS_FRAME_SECONDS.observe(time.perf_counter() - t0)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        logging.info(f"프레임 스트림 종료 (건너뛴 프레임 {dropped}개)")
+
+
+def _parse_range(range_header: str, size: int):
+    """단일 'bytes=start-end' Range 헤더를 (start, end) 로 변환. 만족 불가 시 None"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_s, _, end_s = spec.strip().partition("-")
+    try:
+        if start_s == "":
+            # 'bytes=-N' : 마지막 N바이트
+            length = int(end_s)
+            if length <= 0:
+                return None
+            return max(0, size - length), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+# --- TTS 오디오 엔드포인트 ---
+@app.get("/audio/{audio_id}")
+def get_audio(audio_id: str, request: Request):
+    """
+    /detect 응답의 audio_url로 TTS 음성을 내려받습니다.
+    합성 중이면 생성되는 청크를 바로 스트리밍하고, 완성된 오디오는 ETag/Range를 지원합니다.
+    """
+    entry = audio_store.get(audio_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="오디오를 찾을 수 없습니다 (만료되었거나 잘못된 ID)")
+
+    range_header = request.headers.get("range")
+    # 브라우저 <audio>는 처음부터 'Range: bytes=0-'를 보냄 → 전체 요청과 같으므로 스트리밍 대상
+    open_ended = range_header is not None and range_header.replace(" ", "").lower() == "bytes=0-"
+    if not entry.done and (not range_header or open_ended):
+        # 합성이 끝나기 전: 도착하는 청크를 그대로 흘려보냄 (재생 지연 최소화)
+        return StreamingResponse(
+            entry.iter_chunks(), media_type=entry.media_type, headers={"Cache-Control": "no-store"}
+        )
+
+    # 실제 부분 Range 요청이나 완성된 오디오는 전체 길이가 필요하므로 완료까지 대기
+    if not entry.wait(timeout=30.0):
+        raise HTTPException(status_code=502, detail=f"TTS 음성 생성 실패: {entry.error or '시간 초과'}")
+
+    etag = entry.etag
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "private, max-age=600"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    data = entry.data()
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = _parse_range(range_header, len(data))
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(data[start:end + 1], status_code=206, media_type=entry.media_type, headers=headers)
+
+    return Response(data, media_type=entry.media_type, headers=headers)
 
 
 # --- 헬스 체크 엔드포인트 ---
 @app.get("/health")
 async def health_check():
     """서버 및 모델 로드 상태 확인"""
+    connection = inference_client.status() if inference_client is not None else None
     return {
-        "status": "healthy",
-        "model_loaded": yolo is not None,
+        "status": "degraded" if connection is not None and not connection["connected"] else "healthy",
+        "model_loaded": yolo is not None or inference_client is not None,
+        "inference_service": INFERENCE_SERVICE,
+        "inference_connection": connection,
+        "model_version": MODEL_VERSION,
+        "model_reload": model_manager.status() if model_manager is not None else None,
+        "inference_profile": INFERENCE_PROFILE,
+        "quality": quality.status(),
+        "circuits": {name: breaker.state for name, breaker in BREAKERS.items()},
+        "result_cache": result_cache.stats(),
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
 
+# --- 관리자: 무중단 모델 교체 ---
+@app.post("/admin/reload-model")
+async def reload_model(path: Optional[str] = None, force: bool = False,
+                       x_admin_token: Optional[str] = Header(None)):
+    """
+    새 가중치를 백그라운드 스레드에서 로드·워밍업·검증한 뒤 교체합니다.
+    path를 생략하면 현재 가중치 경로(MODEL_PATH)를 다시 읽습니다. 검증 실패 시 기존 모델 유지.
+    """
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="관리자 토큰이 필요합니다")
+    if model_manager is None:
+        raise HTTPException(status_code=409, detail="추론 서비스 모드에서는 해당 서비스에서 모델을 교체하세요")
+    try:
+        result = await asyncio.to_thread(model_manager.reload, path, force)
+    except ModelReloadError as e:
+        raise HTTPException(status_code=409, detail=f"모델 교체 실패 (기존 모델 유지): {e}")
+    return {"status": "reloaded", **result}
+
+
+# --- 메트릭 엔드포인트 (Prometheus 텍스트 포맷) ---
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """요청 수, 단계별 지연 히스토그램, LLM 폴백/TTS 실패 카운터 등"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # --- 루트 엔드포인트 ---
 @app.get("/")
 async def root():
@@ -244,7 +914,8 @@ async def root():
     return {
         "message": "백령도 해안 경계 AI 시스템 API",
         "docs_url": "/docs",
-        "health_check": "/health"
+        "health_check": "/health",
+        "metrics": "/metrics"
     }
 
 # 로컬에서 직접 실행 시 (예: python main_api_with_logging.py)
@@ -0,0 +1,157 @@
+"""
+/detect 수용 제어 (우선순위 + 백프레셔)
+
+과부하 시 '사람 → 매우 가까움' 프레임이 빈 바다 프레임과 같은 줄에서 기다리지 않도록 두 단계로 제어합니다.
+
+1) 입구 게이트 (AdmissionGate)
+   - 동시에 처리 중인 요청을 max_inflight로 제한하고, 대기열은 max_queue까지만 허용
+   - 대기열이 가득 차면 즉시 429, 대기 시간(queue_timeout) 초과 시 503 (둘 다 Retry-After 포함)
+2) 경고 슬롯 (WarningLimiter)
+   - YOLO 결과로 우선순위(critical / warning / safe)를 정하고, LLM/TTS 슬롯은 critical부터 배정
+   - safe 프레임은 빈 슬롯이 없으면 기다리지 않고 음성 없는 규칙 기반 경고로 강등
+   - warning/critical도 대기 한도를 넘으면 규칙 기반 경고로 폴백 (문구 뱅크 음성은 유지)
+"""
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+from modules.metrics import Counter, Gauge
+
+ADMISSION_CONFIG = {
+    "max_inflight": int(os.getenv("ADMISSION_MAX_INFLIGHT", "16")),
+    "max_queue": int(os.getenv("ADMISSION_MAX_QUEUE", "32")),
+    "queue_timeout": float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5.0")),
+    "warning_slots": int(os.getenv("ADMISSION_WARNING_SLOTS", "8")),
+    "warning_max_waiting": int(os.getenv("ADMISSION_WARNING_MAX_WAITING", "16")),
+    # 우선순위별 경고 슬롯 대기 한도 (초). safe는 기다리지 않음
+    "warning_wait": {"critical": 10.0, "warning": 2.0, "safe": 0.0},
+}
+
+CRITICAL, WARNING, SAFE = "critical", "warning", "safe"
+_RANK = {CRITICAL: 0, WARNING: 1, SAFE: 2}
+
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total", "입구 게이트 판정 (admitted/queued/rejected_full/rejected_timeout)", ["decision"]
+)
+ADMISSION_QUEUE = Gauge("admission_queue_depth", "입구 게이트 대기 요청 수")
+WARNING_SLOTS = Counter(
+    "warning_slot_total", "우선순위별 경고 슬롯 배정 결과 (granted/degraded)", ["priority", "outcome"]
+)
+
+
+def classify_priority(detected_objects: List[str]) -> str:
+    """탐지 문자열('클래스 → 거리')로 경고 우선순위를 결정 (규칙 기반 경고와 같은 거리 기준)"""
+    if any("매우 가까움" in obj for obj in detected_objects):
+        return CRITICAL
+    if any("중간 거리" in obj for obj in detected_objects):
+        return WARNING
+    return SAFE
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionGate:
+    """동시 처리 수 + 대기열 길이 제한 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(self, config: Dict = ADMISSION_CONFIG):
+        self.config = config
+        self._semaphore = asyncio.Semaphore(config["max_inflight"])
+        self._waiting = 0
+        self._avg_seconds = 0.5  # 요청 처리 시간 지수이동평균 (Retry-After 추정용)
+
+    @property
+    def waiting(self) -> int:
+        """처리 슬롯을 기다리는 요청 수 (부하 지표)"""
+        return self._waiting
+
+    def retry_after(self) -> int:
+        """현재 대기열이 빠지는 데 걸릴 예상 시간 (초, 최소 1)"""
+        backlog = (self._waiting + 1) / max(self.config["max_inflight"], 1)
+        return max(1, math.ceil(self._avg_seconds * backlog))
+
+    @asynccontextmanager
+    async def admit(self):
+        if self._semaphore.locked():
+            if self._waiting >= self.config["max_queue"]:
+                ADMISSION_DECISIONS.inc(decision="rejected_full")
+                raise AdmissionRejected(429, self.retry_after(), "대기열이 가득 찼습니다")
+            ADMISSION_DECISIONS.inc(decision="queued")
+
+        self._waiting += 1
+        ADMISSION_QUEUE.set(self._waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.config["queue_timeout"])
+        except asyncio.TimeoutError:
+            ADMISSION_DECISIONS.inc(decision="rejected_timeout")
+            raise AdmissionRejected(503, self.retry_after(), "처리 대기 시간을 초과했습니다")
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE.set(self._waiting)
+
+        ADMISSION_DECISIONS.inc(decision="admitted")
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.perf_counter() - t0)
+
+
+class WarningLimiter:
+    """LLM/TTS 경고 생성 슬롯을 우선순위 순으로 배정 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(self, config: Dict = ADMISSION_CONFIG):
+        self.config = config
+        self._free = config["warning_slots"]
+        self._waiters: List[tuple] = []  # (순위, 순번, Future) 힙
+        self._seq = itertools.count()
+
+    def _pending(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    async def acquire(self, priority: str) -> bool:
+        """슬롯을 받으면 True (사용 후 release 필수), 강등해야 하면 False"""
+        if self._free > 0 and not any(rank <= _RANK[priority] for rank, _, fut in self._waiters if not fut.done()):
+            self._free -= 1
+            WARNING_SLOTS.inc(priority=priority, outcome="granted")
+            return True
+
+        timeout = self.config["warning_wait"].get(priority, 0.0)
+        if timeout <= 0 or (priority != CRITICAL and self._pending() >= self.config["warning_max_waiting"]):
+            WARNING_SLOTS.inc(priority=priority, outcome="degraded")
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (_RANK[priority], next(self._seq), fut))
+        try:
+            granted = await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            # 취소에 실패했다면 그 사이 슬롯이 넘어온 것
+            granted = not fut.cancel() and fut.result()
+        except BaseException:
+            # 요청 취소 등: 대기 항목을 무효화하고, 이미 넘어온 슬롯은 다음 대기자에게 반납
+            if not fut.cancel() and fut.result():
+                self.release()
+            raise
+        WARNING_SLOTS.inc(priority=priority, outcome="granted" if granted else "degraded")
+        return granted
+
+    def release(self):
+        """슬롯 반납: 대기 중인 가장 높은 우선순위 요청에 바로 넘김"""
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(True)
+                return
+        self._free += 1
@@ -0,0 +1,127 @@
+"""
+TTS 오디오 저장소 (참조 방식 전달 + 스트리밍)
+
+/detect 응답에 MP3 전체를 base64로 싣는 대신, 오디오는 서버 메모리에 보관하고
+응답에는 audio_id / audio_url만 넣습니다. TTS가 청크를 만들어내는 즉시 저장소에 쌓이므로
+/audio/{id} 요청은 합성이 끝나기 전부터 재생을 시작할 수 있습니다.
+저장소는 총 바이트 상한과 TTL을 넘으면 오래된 항목부터 제거합니다.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+
+class AudioEntry:
+    """TTS가 생성 중이거나 생성을 마친 오디오 1건"""
+
+    def __init__(self, audio_id: str, media_type: str = "audio/mpeg"):
+        self.audio_id = audio_id
+        self.media_type = media_type
+        self.created = time.monotonic()
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.done = False
+        self.error: Optional[str] = None
+        self._cond = threading.Condition()
+        self._etag: Optional[str] = None
+
+    # --- 생산자(TTS) 측 ---
+    def append(self, chunk: bytes):
+        if not chunk:
+            return
+        with self._cond:
+            self.chunks.append(chunk)
+            self.size += len(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error: Optional[str] = None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    # --- 소비자(/audio) 측 ---
+    def wait(self, timeout: float) -> bool:
+        """생성 완료까지 대기. 제한 시간 내 정상 완료되면 True"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done, timeout=timeout)
+            return self.done and self.error is None
+
+    def iter_chunks(self, timeout: float = 30.0) -> Iterator[bytes]:
+        """생성 중인 청크를 도착하는 대로 내보냅니다 (스트리밍 재생용)."""
+        index = 0
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: index < len(self.chunks) or self.done,
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if (finished and index >= len(self.chunks)) or time.monotonic() >= deadline:
+                return
+
+    def data(self) -> bytes:
+        with self._cond:
+            return b"".join(self.chunks)
+
+    @property
+    def etag(self) -> Optional[str]:
+        """완성된 오디오의 강한 ETag (생성 중에는 None)"""
+        if not self.done or self.error:
+            return None
+        if self._etag is None:
+            self._etag = '"' + hashlib.sha1(self.data()).hexdigest() + '"'
+        return self._etag
+
+
+class AudioStore:
+    """바이트 상한 + TTL 기반 LRU 오디오 저장소"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 600.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, AudioEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, media_type: str = "audio/mpeg") -> AudioEntry:
+        entry = AudioEntry(uuid.uuid4().hex, media_type)
+        with self._lock:
+            self._evict()
+            self._entries[entry.audio_id] = entry
+        return entry
+
+    def get(self, audio_id: str) -> Optional[AudioEntry]:
+        with self._lock:
+            entry = self._entries.get(audio_id)
+            if entry is not None:
+                self._entries.move_to_end(audio_id)
+            return entry
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values())
+
+    def _evict(self):
+        now = time.monotonic()
+        total = sum(e.size for e in self._entries.values())
+        for audio_id in list(self._entries):
+            entry = self._entries[audio_id]
+            expired = now - entry.created > self.ttl
+            if not expired and total <= self.max_bytes:
+                break
+            if not entry.done and not expired:
+                continue  # 생성 중인 오디오는 용량 때문에 지우지 않음
+            total -= entry.size
+            del self._entries[audio_id]
+
+
+# 프로세스 전역 저장소 (llm_module이 채우고 main_api의 /audio가 읽음)
+audio_store = AudioStore()
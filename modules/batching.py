@@ -0,0 +1,65 @@
+"""
+마이크로 배처 (짧은 시간창 동안 들어온 요청을 묶어 한 번에 처리)
+
+여러 카메라가 동시에 보고할 때 LLM 호출을 장면마다 따로 보내지 않고,
+window 초 동안(또는 max_batch개가 찰 때까지) 모은 뒤 process_batch 한 번으로 처리합니다.
+호출자는 submit()이 돌려준 Future로 자기 몫의 결과만 받습니다.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List
+
+
+class MicroBatcher:
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]],
+                 window: float = 0.05, max_batch: int = 8, max_inflight: int = 4,
+                 name: str = "batcher"):
+        """
+        Args:
+            process_batch: 입력 리스트를 받아 같은 길이·순서의 결과 리스트를 반환하는 함수
+            window: 첫 요청 이후 추가 요청을 기다리는 최대 시간(초)
+            max_batch: 한 배치의 최대 크기
+            max_inflight: 동시에 처리 중일 수 있는 배치 수
+        """
+        self.process_batch = process_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix=name)
+        self._thread = threading.Thread(target=self._collect_loop, name=f"{name}-collector", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # 배치 처리는 별도 스레드에서 → 그동안 다음 배치를 계속 모음
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[tuple]):
+        items = [item for item, _ in batch]
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"배치 결과 개수 불일치: {len(results)} != {len(items)}")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,155 @@
+"""
+2단계 모델 캐스케이드 (경량 스크리너 → yolo11s)
+
+CPU에서 모든 프레임에 큰 모델을 돌리면 비싸지만, 실제 트래픽의 대부분은 빈 바다입니다.
+작은 스크리너(기본 yolov8n.pt, 저해상도)를 먼저 돌려
+- 후보가 없으면(최대 신뢰도 < band_low) 본 모델을 생략하고 빈 장면으로 처리
+- 후보가 있거나(>= candidate_conf) 애매한 구간([band_low, candidate_conf))이면 본 모델 실행
+합니다.
+
+Filtered/Val 기준 정확도/지연 측정:
+    python -m modules.cascade data/Filtered/Val --limit 500
+"""
+import os
+import glob
+import time
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from modules.detector import RawBox, extract_boxes
+
+# --- 캐스케이드 설정 (환경 변수로 조정) ---
+CASCADE_CONFIG = {
+    "enabled": os.getenv("CASCADE_MODE", "0") == "1",
+    "screener_path": os.getenv("SCREENER_MODEL_PATH", "yolov8n.pt"),
+    "screener_imgsz": int(os.getenv("SCREENER_IMGSZ", "320")),
+    # 스크리너 최대 신뢰도가 이 값 미만이면 '빈 장면'
+    "band_low": float(os.getenv("CASCADE_BAND_LOW", "0.10")),
+    # 이 값 이상이면 '후보 있음'. 그 사이는 '애매한 구간'
+    "candidate_conf": float(os.getenv("CASCADE_CANDIDATE_CONF", "0.30")),
+    # 애매한 구간에서도 본 모델을 돌릴지 (False면 더 공격적으로 생략)
+    "uncertain_runs_full": os.getenv("CASCADE_UNCERTAIN_FULL", "1") == "1",
+    # 스크리너에서 후보로 볼 클래스 이름 (None이면 자동: 커스텀 클래스면 전체, COCO면 boat/person)
+    "screener_classes": None,
+}
+
+# 우리 탐지 대상과 대응되는 COCO 클래스 (yolov8n.pt 기본 스크리너용)
+COCO_RELEVANT = ("boat", "person")
+
+
+def relevant_class_ids(screener, config: Dict = CASCADE_CONFIG) -> Optional[set]:
+    """스크리너 결과 중 후보로 인정할 클래스 ID 집합 (None이면 모든 클래스)"""
+    names = getattr(screener, "names", {}) or {}
+    wanted = config.get("screener_classes")
+    if wanted is None:
+        if not any(n in names.values() for n in COCO_RELEVANT):
+            return None  # 커스텀 클래스로 학습된 스크리너
+        wanted = COCO_RELEVANT
+    return {cls_id for cls_id, name in names.items() if name in wanted}
+
+
+def screen(screener, img, config: Dict = CASCADE_CONFIG, class_ids: Optional[set] = None) -> Tuple[str, float]:
+    """
+    스크리너로 장면을 판정합니다.
+    반환: (판정 'empty' | 'uncertain' | 'candidate', 관련 클래스 최대 신뢰도)
+    """
+    results = screener.predict(
+        img, verbose=False, conf=config["band_low"], imgsz=config["screener_imgsz"]
+    )
+    boxes = extract_boxes(results[0]) if results else []
+    max_conf = max(
+        (conf for cls_id, conf, _ in boxes if class_ids is None or cls_id in class_ids),
+        default=0.0
+    )
+    if max_conf < config["band_low"]:
+        return "empty", max_conf
+    if max_conf < config["candidate_conf"]:
+        return "uncertain", max_conf
+    return "candidate", max_conf
+
+
+def cascade_predict(screener, model, img, config: Dict = CASCADE_CONFIG,
+                    class_ids: Optional[set] = None, **predict_kwargs) -> Tuple[List[RawBox], Dict]:
+    """스크리너 판정에 따라 본 모델 실행 여부를 결정하고 (원시 박스, 판정 정보)를 반환"""
+    verdict, max_conf = screen(screener, img, config, class_ids)
+    info = {"screener": verdict, "screener_conf": round(max_conf, 3)}
+
+    if verdict == "empty" or (verdict == "uncertain" and not config["uncertain_runs_full"]):
+        info["full_model"] = False
+        return [], info
+
+    results = model.predict(img, verbose=False, **predict_kwargs)
+    info["full_model"] = True
+    return (extract_boxes(results[0]) if results else []), info
+
+
+# ==================== Filtered/Val 평가 ====================
+def evaluate(split_dir: str, limit: int, conf: float = 0.25, config: Dict = CASCADE_CONFIG) -> Dict:
+    """
+    본 모델 단독 vs 캐스케이드를 같은 이미지에서 비교합니다.
+    - 라벨이 있는 프레임을 스크리너가 '빈 장면'으로 넘긴 비율 (놓친 프레임)
+    - 본 모델 탐지 중 캐스케이드에서 사라진 비율
+    - 프레임당 평균 지연
+    """
+    import cv2
+    from ultralytics import YOLO
+    from modules.detector import load_yolo
+
+    img_paths = sorted(glob.glob(os.path.join(split_dir, "images", "*.jpg")))[:limit]
+    lbl_dir = os.path.join(split_dir, "labels")
+    model = load_yolo()
+    screener = YOLO(config["screener_path"])
+    class_ids = relevant_class_ids(screener, config)
+
+    stats = {"frames": 0, "labeled_frames": 0, "skipped": 0, "missed_labeled": 0,
+             "full_boxes": 0, "lost_boxes": 0, "full_sec": 0.0, "cascade_sec": 0.0}
+    for path in img_paths:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        lbl_path = os.path.join(lbl_dir, os.path.splitext(os.path.basename(path))[0] + ".txt")
+        labeled = os.path.exists(lbl_path) and os.path.getsize(lbl_path) > 0
+
+        t0 = time.perf_counter()
+        full_boxes = extract_boxes(model.predict(img, verbose=False, conf=conf)[0])
+        stats["full_sec"] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        cascade_boxes, info = cascade_predict(screener, model, img, config, class_ids, conf=conf)
+        stats["cascade_sec"] += time.perf_counter() - t0
+
+        stats["frames"] += 1
+        stats["labeled_frames"] += labeled
+        stats["full_boxes"] += len(full_boxes)
+        if not info["full_model"]:
+            stats["skipped"] += 1
+            stats["missed_labeled"] += labeled
+            stats["lost_boxes"] += len(full_boxes)
+
+    n = max(stats["frames"], 1)
+    return {
+        "config": {k: v for k, v in config.items() if k != "enabled"},
+        "frames": stats["frames"],
+        "skip_rate": round(stats["skipped"] / n, 3),
+        "missed_labeled_rate": round(stats["missed_labeled"] / max(stats["labeled_frames"], 1), 3),
+        "lost_box_rate": round(stats["lost_boxes"] / max(stats["full_boxes"], 1), 3),
+        "full_ms_per_frame": round(stats["full_sec"] / n * 1000, 1),
+        "cascade_ms_per_frame": round(stats["cascade_sec"] / n * 1000, 1),
+        "speedup": round(stats["full_sec"] / stats["cascade_sec"], 2) if stats["cascade_sec"] else None,
+    }
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="스크리너 캐스케이드 정확도/지연 평가")
+    parser.add_argument("split_dir", help="images/, labels/ 를 포함한 폴더 (예: data/Filtered/Val)")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--band-low", type=float, nargs="+", default=[CASCADE_CONFIG["band_low"]],
+                        help="여러 값을 주면 임계값별로 비교")
+    args = parser.parse_args()
+
+    for band_low in args.band_low:
+        config = {**CASCADE_CONFIG, "band_low": band_low,
+                  "candidate_conf": max(band_low, CASCADE_CONFIG["candidate_conf"])}
+        print(json.dumps(evaluate(args.split_dir, args.limit, config=config), ensure_ascii=False, indent=2))
@@ -0,0 +1,123 @@
+"""
+LLM / TTS 호출용 서킷 브레이커
+
+격리망 환경처럼 OpenAI가 느리거나 닿지 않을 때, 매 요청이 타임아웃·재시도를 모두 거친 뒤에야
+폴백하는 것을 막습니다.
+
+- CLOSED    : 정상. 연속 실패가 failure_threshold에 도달하면 OPEN
+- OPEN      : 호출 차단 → 호출자는 즉시 규칙 기반 경로로 전환.
+              백그라운드 프로버가 probe_interval마다 서비스 상태를 확인하고, 응답이 오면 HALF_OPEN
+              (프로버가 없으면 reset_timeout 경과 후 HALF_OPEN)
+- HALF_OPEN : 실제 요청 1건만 시험 통과. 성공 시 CLOSED, 실패 시 다시 OPEN
+상태 변화는 /metrics(circuit_state, circuit_transitions_total)로 노출됩니다.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from modules.metrics import Counter, Gauge
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = Gauge("circuit_state", "서킷 상태 (0=closed, 1=half_open, 2=open)", ["name"])
+CIRCUIT_TRANSITIONS = Counter("circuit_transitions_total", "서킷 상태 전이 횟수", ["name", "to"])
+CIRCUIT_REJECTIONS = Counter("circuit_rejections_total", "서킷 OPEN으로 차단된 호출 수", ["name"])
+
+# 이름 → 브레이커 (/health 노출용)
+BREAKERS: Dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 probe: Optional[Callable[[], None]] = None, probe_interval: float = 10.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.probe_interval = probe_interval
+
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._prober: Optional[threading.Thread] = None
+
+        CIRCUIT_STATE.set(_STATE_VALUE[CLOSED], name=name)
+        BREAKERS[name] = self
+
+    # --- 상태 전이 ---
+    def _transition(self, new_state: str):
+        if self.state == new_state:
+            return
+        logging.warning(f"서킷 [{self.name}] {self.state} → {new_state}")
+        self.state = new_state
+        CIRCUIT_STATE.set(_STATE_VALUE[new_state], name=self.name)
+        CIRCUIT_TRANSITIONS.inc(name=self.name, to=new_state)
+
+        if new_state == OPEN:
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+            if self.probe is not None and (self._prober is None or not self._prober.is_alive()):
+                self._prober = threading.Thread(
+                    target=self._probe_loop, name=f"{self.name}-prober", daemon=True
+                )
+                self._prober.start()
+        elif new_state == CLOSED:
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def _probe_loop(self):
+        """OPEN 동안 주기적으로 서비스 상태를 확인하고, 응답하면 HALF_OPEN으로 전환"""
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                if self.state != OPEN:
+                    return
+            try:
+                self.probe()
+            except Exception as e:
+                logging.info(f"서킷 [{self.name}] 상태 확인 실패: {e}")
+                continue
+            with self._lock:
+                if self.state == OPEN:
+                    self._transition(HALF_OPEN)
+            return
+
+    # --- 호출자 API ---
+    def allow(self) -> bool:
+        """지금 실제 호출을 보내도 되는지 판단 (False면 즉시 폴백)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if self.probe is None and time.monotonic() - self._opened_at >= self.reset_timeout:
+                    self._transition(HALF_OPEN)
+                else:
+                    CIRCUIT_REJECTIONS.inc(name=self.name)
+                    return False
+            # HALF_OPEN: 시험 요청 1건만 통과
+            if self._trial_in_flight:
+                CIRCUIT_REJECTIONS.inc(name=self.name)
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(OPEN)
+                return
+            self._failures += 1
+            if self.state == CLOSED and self._failures >= self.failure_threshold:
+                self._transition(OPEN)
@@ -0,0 +1,43 @@
+import os
+import logging
+from typing import List, Tuple
+from ultralytics import YOLO
+
+# --- 모델 경로 설정 ---
+MODEL_PATH = "runs/army_project_clean_yolo11s/weights/best.pt"
+FALLBACK_MODEL_PATH = "yolov8n.pt"
+
+# (class_id, confidence, [x1, y1, x2, y2]) 형태의 원시 박스
+RawBox = Tuple[int, float, List[float]]
+
+
+def load_yolo(model_path: str = MODEL_PATH) -> YOLO:
+    """커스텀 YOLO 모델을 로드하고, 실패 시 백업 모델(yolov8n.pt)을 로드합니다."""
+    try:
+        model = YOLO(model_path)
+        logging.info(f"YOLO 커스텀 모델 로드 성공: {model_path}")
+    except Exception as e:
+        logging.warning(f"커스텀 모델 로드 실패: {e} | 백업 모델({FALLBACK_MODEL_PATH}) 사용")
+        model = YOLO(FALLBACK_MODEL_PATH)
+        logging.info(f"백업 모델({FALLBACK_MODEL_PATH}) 로드 완료")
+    return model
+
+
+def model_version(model) -> str:
+    """가중치 파일 이름 + 수정 시각 + 크기로 만든 모델 버전 문자열 (캐시 무효화 기준)"""
+    path = getattr(model, "ckpt_path", None) or str(getattr(model, "model_name", "") or MODEL_PATH)
+    try:
+        st = os.stat(path)
+        return f"{os.path.basename(path)}@{int(st.st_mtime)}-{st.st_size}"
+    except OSError:
+        return os.path.basename(path)
+
+
+def extract_boxes(result) -> List[RawBox]:
+    """ultralytics Results 한 장에서 (클래스, 신뢰도, xyxy) 리스트만 꺼냅니다."""
+    if result is None or result.boxes is None:
+        return []
+    return [
+        (int(box.cls[0]), float(box.conf[0]), box.xyxy[0].tolist())
+        for box in result.boxes
+    ]
@@ -0,0 +1,187 @@
+"""
+고정 해안 카메라용 프레임 차분 게이팅
+
+고정 카메라는 오랫동안 거의 같은 프레임을 보내므로, 카메라별로 마지막 추론 프레임(키프레임)의
+저해상도 시그니처를 보관하고 새 프레임과 비교합니다.
+장면 변화가 임계값 미만이면 디코딩·YOLO·경고 생성을 건너뛰고 직전 결과를 재사용합니다.
+
+- 시그니처: JPEG를 1/8 그레이스케일로 축소 디코딩 → 160x90 리사이즈 + 3x3 블러 (전체 디코딩 불필요)
+- 변화 점수: 블러된 시그니처의 픽셀별 절대차 최댓값. 구역 평균을 쓰면 시그니처 1픽셀(1080p 기준 약 12px)
+  크기의 원거리 선박이 평균에 묻히므로, 노이즈는 블러로 누르고 판정은 픽셀 단위로 함
+- 비교 기준은 '직전 프레임'이 아닌 '키프레임'이라 느린 변화도 누적되어 감지됨
+- refresh_interval 초가 지나면 변화가 없어도 강제로 재추론
+
+임계값 검증 (라벨의 소형 선박 영역을 주변 배경으로 지운 프레임과 원본을 비교 → 변화 감지율,
+재인코딩·밝기 흔들림만 준 프레임 → 오탐률):
+    python -m modules.frame_gate data/Filtered/Val --limit 300
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from modules.metrics import Counter
+
+GATE_CONFIG = {
+    "diff_threshold": float(os.getenv("GATE_DIFF_THRESHOLD", "12.0")),     # 픽셀 절대차 (0~255)
+    "refresh_interval": float(os.getenv("GATE_REFRESH_INTERVAL", "30.0")),  # 강제 재추론 주기 (초)
+    "signature_size": (160, 90),                                           # (너비, 높이)
+    "max_cameras": 256,
+}
+
+GATE_DECISIONS = Counter("frame_gate_decisions_total", "프레임 게이팅 판정 (reused/changed/refresh/new)", ["decision"])
+
+
+def frame_signature(contents: bytes, size: Tuple[int, int] = GATE_CONFIG["signature_size"]) -> Optional[np.ndarray]:
+    """업로드 바이트에서 저해상도 그레이스케일 시그니처를 만듭니다 (실패 시 None)."""
+    buf = np.frombuffer(contents, np.uint8)
+    small = cv2.imdecode(buf, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if small is None:
+        return None
+    sig = cv2.resize(small, size, interpolation=cv2.INTER_AREA)
+    # 센서 노이즈·잔물결에 덜 민감하도록 약하게 블러
+    return cv2.GaussianBlur(sig, (3, 3), 0)
+
+
+def change_score(a: np.ndarray, b: np.ndarray) -> float:
+    """두 (블러된) 시그니처의 픽셀별 절대차 최댓값"""
+    return float(cv2.absdiff(a, b).max())
+
+
+class FrameGate:
+    """카메라 ID별 키프레임 시그니처와 마지막 추론 결과를 보관"""
+
+    def __init__(self, config: Dict = GATE_CONFIG):
+        self.config = config
+        self._cameras: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, camera_id: str, signature: np.ndarray, variant: str = "",
+               version: str = "") -> Tuple[Optional[Dict], str, float]:
+        """
+        재사용 가능한 직전 결과를 찾습니다.
+        version: 현재 모델/설정 버전. 다른 버전에서 저장된 키프레임은 쓰지 않음
+        (모델 교체 전에 시작된 요청이 교체 후 store()해도 이전 모델 결과가 재사용되지 않도록)
+        반환: (재사용할 결과 또는 None, 판정, 변화 점수)
+        """
+        with self._lock:
+            state = self._cameras.get(camera_id)
+            if state is not None:
+                self._cameras.move_to_end(camera_id)
+
+        if (state is None or state["variant"] != variant or state["version"] != version
+                or state["signature"].shape != signature.shape):
+            decision, score, result = "new", -1.0, None
+        elif time.monotonic() - state["keyframe_at"] >= self.config["refresh_interval"]:
+            decision, score, result = "refresh", -1.0, None
+        else:
+            score = change_score(state["signature"], signature)
+            if score < self.config["diff_threshold"]:
+                decision, result = "reused", state["result"]
+            else:
+                decision, result = "changed", None
+
+        GATE_DECISIONS.inc(decision=decision)
+        return result, decision, score
+
+    def store(self, camera_id: str, signature: np.ndarray, result: Dict, variant: str = "", version: str = ""):
+        """새로 추론한 프레임을 키프레임으로 저장 (version: 추론을 시작할 때의 모델/설정 버전)"""
+        with self._lock:
+            self._cameras[camera_id] = {
+                "signature": signature,
+                "result": result,
+                "variant": variant,
+                "version": version,
+                "keyframe_at": time.monotonic(),
+            }
+            self._cameras.move_to_end(camera_id)
+            while len(self._cameras) > self.config["max_cameras"]:
+                self._cameras.popitem(last=False)
+
+    def invalidate(self, camera_id: Optional[str] = None):
+        """특정 카메라(또는 전체)의 키프레임을 삭제"""
+        with self._lock:
+            if camera_id is None:
+                self._cameras.clear()
+            else:
+                self._cameras.pop(camera_id, None)
+
+
+# ==================== 임계값 검증 ====================
+def _erase_box(img: np.ndarray, xyxy) -> np.ndarray:
+    """박스 영역을 주변 테두리의 중앙값 색으로 채워 '객체가 없던 프레임'을 흉내냅니다."""
+    h, w = img.shape[:2]
+    x1, y1, x2, y2 = (int(round(v)) for v in xyxy)
+    x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+    pad = max(2, (x2 - x1) // 2)
+    ring = img[max(0, y1 - pad):min(h, y2 + pad), max(0, x1 - pad):min(w, x2 + pad)].reshape(-1, 3)
+    out = img.copy()
+    out[y1:y2, x1:x2] = np.median(ring, axis=0).astype(np.uint8)
+    return out
+
+
+def validate_threshold(split_dir: str, limit: int, max_box_ratio: float, threshold: float) -> Dict:
+    """
+    소형 선박(박스 높이가 이미지의 max_box_ratio 이하)을 지운 프레임 → 원본 비교 시 변화 감지율과,
+    재인코딩 + 밝기 ±2 흔들림만 준 프레임의 오탐률을 측정
+    """
+    import glob
+
+    def sig(img, quality=90):
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return frame_signature(buf.tobytes())
+
+    small_scores, noise_scores = [], []
+    for path in sorted(glob.glob(os.path.join(split_dir, "images", "*.jpg")))[:limit]:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        original = sig(img)
+        jitter = cv2.convertScaleAbs(img, alpha=1.0, beta=float(np.random.choice([-2, 2])))
+        noise_scores.append(change_score(original, sig(jitter, quality=80)))
+
+        lbl_path = os.path.join(split_dir, "labels", os.path.splitext(os.path.basename(path))[0] + ".txt")
+        if not os.path.exists(lbl_path):
+            continue
+        with open(lbl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 5 or float(parts[4]) > max_box_ratio:
+                    continue
+                xc, yc, bw, bh = (float(v) for v in parts[1:5])
+                box = ((xc - bw / 2) * w, (yc - bh / 2) * h, (xc + bw / 2) * w, (yc + bh / 2) * h)
+                small_scores.append(change_score(sig(_erase_box(img, box)), original))
+
+    def pct(values, q):
+        return round(float(np.percentile(values, q)), 1) if values else None
+
+    return {
+        "threshold": threshold,
+        "small_objects": len(small_scores),
+        "detect_rate": round(float(np.mean([v >= threshold for v in small_scores])), 3) if small_scores else None,
+        "small_score_p5": pct(small_scores, 5),
+        "small_score_p50": pct(small_scores, 50),
+        "noise_frames": len(noise_scores),
+        "false_change_rate": round(float(np.mean([v >= threshold for v in noise_scores])), 3) if noise_scores else None,
+        "noise_score_p95": pct(noise_scores, 95),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="프레임 게이팅 임계값 검증 (소형 선박 감지율 / 노이즈 오탐률)")
+    parser.add_argument("split_dir", help="images/, labels/ 를 포함한 폴더")
+    parser.add_argument("--limit", type=int, default=300)
+    parser.add_argument("--max-box-ratio", type=float, default=0.05, help="소형 객체 기준 (박스 높이 / 이미지 높이)")
+    parser.add_argument("--threshold", type=float, default=GATE_CONFIG["diff_threshold"])
+    args = parser.parse_args()
+
+    report = validate_threshold(args.split_dir, args.limit, args.max_box_ratio, args.threshold)
+    for key, value in report.items():
+        print(f"   {key:>18}: {value}")
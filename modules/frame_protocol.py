@@ -0,0 +1,133 @@
+"""
+원시 프레임 WebSocket 전송 형식 (/ws/frames)
+
+서버 옆 엣지 캡처 장비는 이미 BGR 원시 프레임을 갖고 있으므로, JPEG 인코딩 → multipart POST →
+cv2.imdecode 를 거치지 않고 바이너리 메시지 하나에 헤더 + 픽셀을 그대로 보냅니다.
+서버는 np.frombuffer로 복사 없이 배열을 만들어 바로 추론합니다.
+
+메시지 = 고정 헤더(20바이트, 리틀엔디언) + 카메라 ID(UTF-8) + 픽셀
+    magic    4s  b"ARF1"
+    id_len   B   카메라 ID 바이트 수
+    dtype    B   0 = uint8
+    channels B   1(그레이) 또는 3(BGR)
+    reserved B
+    height   H
+    width    H
+    seq      Q   프레임 순번 (결과 매칭용)
+
+스트리밍 테스트 (websockets 패키지 필요):
+    python -m modules.frame_protocol ws://127.0.0.1:8000/ws/frames data/Filtered/Val/images --camera cam01 --fps 30
+"""
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+MAGIC = b"ARF1"
+HEADER = struct.Struct("<4sBBBBHHQ")
+DTYPES = {0: np.uint8}
+DTYPE_CODES = {np.dtype(v): k for k, v in DTYPES.items()}
+
+
+class FrameHeader(NamedTuple):
+    camera_id: str
+    height: int
+    width: int
+    channels: int
+    dtype: np.dtype
+    seq: int
+
+
+class FrameProtocolError(ValueError):
+    pass
+
+
+def encode_frame(img: np.ndarray, camera_id: str, seq: int) -> bytes:
+    """BGR(또는 그레이) 배열 → 바이너리 메시지 (클라이언트용)"""
+    if img.dtype not in DTYPE_CODES:
+        raise FrameProtocolError(f"지원하지 않는 dtype: {img.dtype}")
+    channels = 1 if img.ndim == 2 else img.shape[2]
+    cam = camera_id.encode("utf-8")
+    header = HEADER.pack(MAGIC, len(cam), DTYPE_CODES[img.dtype], channels, 0, img.shape[0], img.shape[1], seq)
+    return header + cam + np.ascontiguousarray(img).tobytes()
+
+
+def decode_frame(message: bytes):
+    """
+    바이너리 메시지 → (헤더, 픽셀 배열). 픽셀은 메시지 버퍼를 그대로 참조 (읽기 전용, 복사 없음).
+    """
+    if len(message) < HEADER.size:
+        raise FrameProtocolError("헤더보다 짧은 메시지")
+    magic, id_len, dtype_code, channels, _, height, width, seq = HEADER.unpack_from(message)
+    if magic != MAGIC:
+        raise FrameProtocolError("알 수 없는 메시지 형식 (magic 불일치)")
+    if dtype_code not in DTYPES or channels not in (1, 3):
+        raise FrameProtocolError(f"지원하지 않는 픽셀 형식 (dtype={dtype_code}, channels={channels})")
+
+    offset = HEADER.size + id_len
+    camera_id = bytes(message[HEADER.size:offset]).decode("utf-8", errors="replace")
+    dtype = np.dtype(DTYPES[dtype_code])
+    count = height * width * channels
+    if len(message) - offset != count * dtype.itemsize:
+        raise FrameProtocolError(
+            f"픽셀 크기 불일치: {len(message) - offset}바이트 (예상 {count * dtype.itemsize})"
+        )
+
+    pixels = np.frombuffer(message, dtype=dtype, count=count, offset=offset)
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    return FrameHeader(camera_id, height, width, channels, dtype, seq), pixels.reshape(shape)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import glob
+    import json
+    import os
+    import time
+
+    import cv2
+    import websockets
+
+    parser = argparse.ArgumentParser(description="원시 프레임 WebSocket 스트리밍 테스트")
+    parser.add_argument("url")
+    parser.add_argument("image_dir")
+    parser.add_argument("--camera", default="cam01")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.image_dir, "*.jpg")))[:50]
+    # 캡처 장비처럼 이미 디코딩된 프레임을 보냄 (640 크기로 맞춤)
+    frames = [cv2.resize(cv2.imread(p), (640, 360)) for p in paths]
+
+    async def stream():
+        sent_at, latencies = {}, []
+        async with websockets.connect(args.url, max_size=None) as ws:
+            async def reader():
+                async for text in ws:
+                    result = json.loads(text)
+                    if result.get("seq") in sent_at:
+                        latencies.append((time.perf_counter() - sent_at.pop(result["seq"])) * 1000)
+                    # 마지막 프레임은 항상 처리됨 (최신 프레임 우선)
+                    if result.get("seq") == args.frames - 1 or result.get("status") == "error":
+                        return
+
+            reader_task = asyncio.create_task(reader())
+            t0 = time.perf_counter()
+            for seq in range(args.frames):
+                sent_at[seq] = time.perf_counter()
+                await ws.send(encode_frame(frames[seq % len(frames)], args.camera, seq))
+                await asyncio.sleep(max(0.0, t0 + (seq + 1) / args.fps - time.perf_counter()))
+            try:
+                await asyncio.wait_for(reader_task, timeout=30)
+            except asyncio.TimeoutError:
+                pass
+            elapsed = time.perf_counter() - t0
+        latencies.sort()
+        print(f"전송 {args.frames}프레임 / 결과 {len(latencies)}건 (나머지는 최신 프레임 우선으로 생략) | "
+              f"{len(latencies) / elapsed:.1f} 결과/s")
+        if latencies:
+            print(f"지연 p50 {latencies[len(latencies) // 2]:.1f}ms, p95 {latencies[int(len(latencies) * 0.95)]:.1f}ms")
+
+    asyncio.run(stream())
@@ -0,0 +1,177 @@
+"""
+축소 해상도 JPEG 디코딩
+
+YOLO는 입력을 어차피 640으로 줄이기 때문에, 수 메가픽셀 드론 사진을
+원본 해상도로 디코딩하는 것은 시간과 메모리 낭비입니다.
+libjpeg의 DCT 스케일링(cv2.IMREAD_REDUCED_COLOR_2/4/8)으로
+'모델 입력 크기를 여전히 덮는' 가장 작은 해상도로 디코딩하고,
+탐지 박스는 원본 좌표로 되돌립니다.
+
+디코딩 벤치마크:
+    python -m modules.image_decode data/Filtered/Val/images --limit 50
+"""
+import glob
+import os
+import time
+import argparse
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from modules.detector import RawBox
+
+# 축소 배율 → OpenCV 플래그 (큰 배율부터 검사)
+REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    1: cv2.IMREAD_COLOR,
+}
+
+# SOF 마커 중 DHT(C4), JPG(C8), DAC(CC)는 프레임 헤더가 아님
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def is_jpeg(data: bytes) -> bool:
+    """SOI 마커로 JPEG 여부 확인 (축소 디코딩은 JPEG에만 적용됨)"""
+    return data[:2] == b"\xff\xd8"
+
+
+def read_jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """전체 디코딩 없이 JPEG SOF 헤더에서 (높이, 너비)를 읽습니다. JPEG가 아니면 None."""
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    i = 2
+    n = len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # 채움 바이트
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        seg_len = int.from_bytes(data[i + 2:i + 4], "big")
+        if marker in _SOF_MARKERS:
+            if i + 9 > n:
+                return None
+            h = int.from_bytes(data[i + 5:i + 7], "big")
+            w = int.from_bytes(data[i + 7:i + 9], "big")
+            return (h, w)
+        if marker == 0xDA:  # SOS 이후에는 헤더가 없음
+            return None
+        i += 2 + seg_len
+    return None
+
+
+def read_image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """JPEG/PNG 헤더에서 (높이, 너비)를 읽습니다 (디코딩 전 픽셀 수 제한용). 알 수 없으면 None."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        w = int.from_bytes(data[16:20], "big")
+        h = int.from_bytes(data[20:24], "big")
+        return (h, w)
+    return read_jpeg_size(data)
+
+
+def estimate_decoded_bytes(size: Tuple[int, int], target_size: Optional[int] = 640, jpeg: bool = True) -> int:
+    """
+    (높이, 너비) 이미지를 decode_image로 디코딩했을 때의 BGR 배열 크기 (바이트)
+    PNG 등 JPEG가 아닌 형식은 축소 디코딩되지 않으므로 jpeg=False면 원본 크기 기준
+    """
+    h, w = size
+    factor = choose_reduction(h, w, target_size) if target_size and jpeg else 1
+    return -(-h // factor) * -(-w // factor) * 3
+
+
+def choose_reduction(orig_h: int, orig_w: int, target_size: int = 640) -> int:
+    """긴 변이 target_size 이상으로 남는 가장 큰 축소 배율(8/4/2/1)을 고릅니다."""
+    longest = max(orig_h, orig_w)
+    for factor in (8, 4, 2):
+        # libjpeg는 축소 시 올림(ceil) 처리
+        if -(-longest // factor) >= target_size:
+            return factor
+    return 1
+
+
+def decode_image(contents: bytes, target_size: Optional[int] = 640) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    업로드 바이트를 디코딩해 (이미지, 원본 (높이, 너비))를 반환합니다.
+    target_size가 None이면 항상 원본 해상도로 디코딩합니다.
+    """
+    np_img = np.frombuffer(contents, np.uint8)
+    orig_size = read_jpeg_size(contents) if target_size else None
+    factor = choose_reduction(*orig_size, target_size) if orig_size else 1
+
+    img = cv2.imdecode(np_img, REDUCED_FLAGS[factor])
+    if img is None:
+        raise ValueError("이미지 디코딩 실패 (cv2.imdecode 반환 값 None)")
+
+    if factor == 1:
+        return img, img.shape[:2]
+
+    orig_h, orig_w = orig_size
+    # EXIF 회전이 적용된 경우 헤더의 가로/세로가 뒤바뀜
+    if (img.shape[0] > img.shape[1]) != (orig_h > orig_w):
+        orig_h, orig_w = orig_w, orig_h
+    return img, (orig_h, orig_w)
+
+
+def scale_boxes(boxes: List[RawBox], decoded_shape: Tuple[int, int],
+                orig_shape: Tuple[int, int]) -> List[RawBox]:
+    """축소 디코딩 좌표의 박스를 원본 이미지 좌표로 변환"""
+    dec_h, dec_w = decoded_shape[:2]
+    orig_h, orig_w = orig_shape
+    if (dec_h, dec_w) == (orig_h, orig_w):
+        return boxes
+
+    sx = orig_w / dec_w
+    sy = orig_h / dec_h
+    return [
+        (cls_id, conf, [x1 * sx, y1 * sy, x2 * sx, y2 * sy])
+        for cls_id, conf, (x1, y1, x2, y2) in boxes
+    ]
+
+
+# ==================== 디코딩 벤치마크 ====================
+def benchmark_decode(paths: List[str], repeat: int = 3) -> dict:
+    """축소 배율별 평균 디코딩 시간(ms)과 결과 해상도를 측정"""
+    stats = {factor: {"ms": 0.0, "count": 0, "shape": None} for factor in REDUCED_FLAGS}
+
+    for path in paths:
+        with open(path, "rb") as f:
+            buf = np.frombuffer(f.read(), np.uint8)
+        for factor, flag in REDUCED_FLAGS.items():
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                img = cv2.imdecode(buf, flag)
+                stats[factor]["ms"] += (time.perf_counter() - t0) * 1000
+                stats[factor]["count"] += 1
+            stats[factor]["shape"] = img.shape[:2] if img is not None else None
+
+    return {
+        f"1/{factor}": {
+            "avg_ms": round(s["ms"] / s["count"], 2) if s["count"] else None,
+            "last_shape": s["shape"]
+        }
+        for factor, s in stats.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="축소 해상도 JPEG 디코딩 벤치마크")
+    parser.add_argument("image_dir")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.image_dir, "*.jpg")))[:args.limit]
+    if not paths:
+        print(f"❌ {args.image_dir}에 JPG 파일이 없습니다.")
+    else:
+        print(f"🔄 {len(paths)}개 이미지 × {args.repeat}회 디코딩")
+        for name, row in benchmark_decode(paths, args.repeat).items():
+            print(f"   {name:>4}: {row['avg_ms']} ms | 해상도 {row['last_shape']}")
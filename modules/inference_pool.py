@@ -0,0 +1,355 @@
+"""
+YOLO 전용 추론 서비스 (프로세스 풀 + 공유 메모리 프레임 전달)
+
+uvicorn을 여러 워커로 띄우면 워커마다 YOLO 모델이 통째로 복사되고,
+한 워커 안에서는 GIL 때문에 CPU 코어를 다 쓰지 못합니다.
+이 모듈은 모델을 소유하는 별도의 추론 프로세스 풀을 띄우고,
+API 워커는 디코딩된 프레임을 multiprocessing.shared_memory 에 올린 뒤
+'핸들(이름, shape, dtype)'만 넘깁니다. 프레임 자체는 pickle 되지 않습니다.
+
+실행 예:
+    python -m modules.inference_pool --workers 4 --threads 2 --address 127.0.0.1:50051
+    INFERENCE_SERVICE=127.0.0.1:50051 uvicorn main_api:app --workers 8
+"""
+import os
+import argparse
+import itertools
+import logging
+import threading
+import time
+import multiprocessing as mp
+from concurrent.futures import Future, InvalidStateError
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Listener
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from modules.detector import MODEL_PATH, extract_boxes, load_yolo
+from modules.inference_profile import apply_threads, load_profile
+
+# --- 설정 ---
+DEFAULT_ADDRESS = "127.0.0.1:50051"
+AUTHKEY = os.getenv("INFERENCE_AUTHKEY", "army-inference").encode("utf-8")
+# 추론 워커 생존 확인 주기 (초)
+WATCH_INTERVAL = 1.0
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """'host:port' 문자열을 (host, port) 튜플로 변환"""
+    host, _, port = value.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+# ==================== 추론 워커 프로세스 ====================
+def _worker_main(task_queue, result_queue, current, model_path: str, num_threads: int):
+    """
+    공유 메모리에 올라온 프레임을 받아 YOLO 추론 후 원시 박스만 돌려보냅니다.
+    current: 처리 중인 작업 키 (conn_id, req_id). 워커가 죽으면 서비스가 이 키에 오류를 보냅니다.
+    """
+    apply_threads(num_threads)
+
+    model = load_yolo(model_path)
+    # ultralytics 가 predictor 안에 원본 배열 참조를 잠시 들고 있을 수 있어
+    # 바로 close() 하지 못한 공유 메모리는 다음 작업 때 다시 정리합니다.
+    deferred = []
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        for shm in deferred[:]:
+            try:
+                shm.close()
+                deferred.remove(shm)
+            except BufferError:
+                pass
+
+        key, shm_name, shape, dtype, kwargs = task
+        current[0], current[1] = key
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name, track=False)
+            img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            results = model.predict(img, verbose=False, **kwargs)
+            payload = {
+                "boxes": extract_boxes(results[0]) if results else [],
+                "orig_shape": tuple(shape[:2])
+            }
+            del img, results
+            try:
+                shm.close()
+            except BufferError:
+                deferred.append(shm)
+            result_queue.put((key, payload, None))
+        except Exception as e:
+            result_queue.put((key, None, f"{type(e).__name__}: {e}"))
+        current[0] = current[1] = -1
+
+
+# ==================== 추론 서비스 (디스패처) ====================
+class InferenceService:
+    """API 워커의 연결을 받아 추론 워커 풀로 작업을 분배하는 서비스"""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, workers: int = 2,
+                 threads_per_worker: int = 0, model_path: str = MODEL_PATH):
+        self.address = parse_address(address)
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.model_path = model_path
+
+        self._ctx = mp.get_context("spawn")
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._workers = [self._spawn_worker() for _ in range(workers)]
+        self._conns: Dict[int, Tuple[object, threading.Lock]] = {}
+        self._conn_ids = itertools.count()
+        self._stopping = False
+
+    def _spawn_worker(self):
+        """(프로세스, 처리 중인 작업 키) 쌍. 키는 잠금 없는 공유 배열 [conn_id, req_id] (-1 = 대기 중)"""
+        current = self._ctx.Array("q", [-1, -1], lock=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(self._task_queue, self._result_queue, current, self.model_path, self.threads_per_worker),
+            daemon=True
+        )
+        return process, current
+
+    def _watch_workers(self):
+        """죽은 추론 워커가 처리하던 요청에 오류를 보내고 워커를 다시 띄웁니다 (클라이언트가 무한히 기다리지 않도록)"""
+        while not self._stopping:
+            time.sleep(WATCH_INTERVAL)
+            for i, (process, current) in enumerate(self._workers):
+                if self._stopping or process.is_alive():
+                    continue
+                key = (current[0], current[1])
+                logging.error(f"추론 워커 비정상 종료 (pid={process.pid}, exitcode={process.exitcode}) | 재시작")
+                if key[0] >= 0:
+                    self._result_queue.put((key, None, f"추론 워커 비정상 종료 (exitcode={process.exitcode})"))
+                self._workers[i] = self._spawn_worker()
+                self._workers[i][0].start()
+
+    def _route_results(self):
+        """워커 결과를 요청을 보낸 연결로 되돌려 보냅니다."""
+        while True:
+            (conn_id, req_id), payload, error = self._result_queue.get()
+            entry = self._conns.get(conn_id)
+            if entry is None:
+                continue  # 이미 끊긴 클라이언트
+            conn, lock = entry
+            try:
+                with lock:
+                    conn.send((req_id, payload, error))
+            except (OSError, EOFError):
+                self._conns.pop(conn_id, None)
+
+    def _serve_connection(self, conn_id: int, conn):
+        """한 API 워커로부터 들어오는 프레임 핸들을 작업 큐에 넣습니다."""
+        try:
+            while True:
+                req_id, shm_name, shape, dtype, kwargs = conn.recv()
+                self._task_queue.put(((conn_id, req_id), shm_name, shape, dtype, kwargs))
+        except (EOFError, OSError):
+            pass
+        finally:
+            self._conns.pop(conn_id, None)
+            conn.close()
+            logging.info(f"API 워커 연결 종료 (conn={conn_id})")
+
+    def serve_forever(self):
+        for process, _ in self._workers:
+            process.start()
+        threading.Thread(target=self._route_results, daemon=True).start()
+        threading.Thread(target=self._watch_workers, daemon=True).start()
+
+        logging.info(
+            f"추론 서비스 시작: {self.address} | 워커 {self.workers}개 | "
+            f"워커당 스레드 {self.threads_per_worker or '기본값'}"
+        )
+        with Listener(self.address, authkey=AUTHKEY) as listener:
+            try:
+                while True:
+                    conn = listener.accept()
+                    conn_id = next(self._conn_ids)
+                    self._conns[conn_id] = (conn, threading.Lock())
+                    threading.Thread(
+                        target=self._serve_connection, args=(conn_id, conn), daemon=True
+                    ).start()
+                    logging.info(f"API 워커 연결 (conn={conn_id})")
+            finally:
+                self._stopping = True
+                for _ in self._workers:
+                    self._task_queue.put(None)
+
+
+# ==================== API 워커 측 클라이언트 ====================
+class InferenceClient:
+    """
+    추론 서비스 클라이언트 (API 워커마다 1개)
+
+    submit()은 프레임을 공유 메모리에 한 번 복사한 뒤 핸들만 전송하고,
+    결과({"boxes": [...], "orig_shape": (h, w)})를 담을 Future를 돌려줍니다.
+    기다리다 포기한 요청(시간 초과/취소)은 discard()로 정리합니다.
+    연결이 끊기면 대기 중인 요청을 실패 처리하고, 다음 submit()에서 다시 연결합니다
+    (RECONNECT_INTERVAL초에 한 번까지 시도). 상태는 status()로 /health에 노출됩니다.
+    """
+
+    RECONNECT_INTERVAL = 1.0
+
+    def __init__(self, address: str = DEFAULT_ADDRESS):
+        self.address = address
+        self._send_lock = threading.Lock()
+        # _pending은 이벤트 루프 스레드(submit/discard)와 수신 스레드가 함께 다루므로 잠금으로 보호
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Tuple[Future, shared_memory.SharedMemory]] = {}
+        self._ids = itertools.count()
+        self._closed = False
+        self._conn = None
+        self._last_attempt = 0.0
+        self._last_error: Optional[str] = None
+        self._reconnects = 0
+        self._connect()
+
+    def _connect(self):
+        """_send_lock을 쥔 상태(또는 생성자)에서 호출"""
+        self._last_attempt = time.monotonic()
+        conn = Client(parse_address(self.address), authkey=AUTHKEY)
+        self._conn = conn
+        threading.Thread(target=self._read_loop, args=(conn,), daemon=True).start()
+
+    def _ensure_connected(self):
+        if self._conn is not None:
+            return
+        if time.monotonic() - self._last_attempt < self.RECONNECT_INTERVAL:
+            raise RuntimeError(f"추론 서비스 연결 끊김: {self._last_error}")
+        try:
+            self._connect()
+        except (OSError, EOFError) as e:
+            self._last_error = f"재연결 실패: {e}"
+            raise RuntimeError(f"추론 서비스 재연결 실패: {e}")
+        self._reconnects += 1
+        logging.info(f"추론 서비스 재연결: {self.address}")
+
+    def submit(self, img: np.ndarray, **predict_kwargs) -> Future:
+        if self._closed:
+            raise RuntimeError("추론 서비스 연결이 닫혀 있습니다.")
+
+        shm = shared_memory.SharedMemory(create=True, size=img.nbytes)
+        np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[...] = img
+
+        req_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self._pending[req_id] = (future, shm)
+        try:
+            with self._send_lock:
+                self._ensure_connected()
+                self._conn.send((req_id, shm.name, img.shape, img.dtype.str, predict_kwargs))
+        except Exception:
+            with self._lock:
+                entry = self._pending.pop(req_id, None)
+            if entry is not None:
+                self._release(shm)
+            raise
+        return future
+
+    def discard(self, future: Future):
+        """응답을 더 기다리지 않는 요청의 공유 메모리 해제 (이미 완료된 요청이면 아무것도 안 함)"""
+        with self._lock:
+            req_id = next((k for k, (pending, _) in self._pending.items() if pending is future), None)
+            entry = self._pending.pop(req_id, None) if req_id is not None else None
+        if entry is not None:
+            self._release(entry[1])
+            future.cancel()
+
+    @staticmethod
+    def _release(shm: shared_memory.SharedMemory):
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _resolve(future: Future, payload, error: Optional[str]):
+        """이미 취소된(시간 초과로 포기한) Future는 건너뜀"""
+        if future.done():
+            return
+        try:
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(payload)
+        except InvalidStateError:
+            pass
+
+    def _read_loop(self, conn):
+        while True:
+            try:
+                req_id, payload, error = conn.recv()
+            except (EOFError, OSError) as e:
+                with self._send_lock:
+                    if self._conn is conn:
+                        self._conn = None
+                with self._lock:
+                    entries = list(self._pending.values())
+                    self._pending.clear()
+                self._last_error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                if not self._closed:
+                    logging.error(f"추론 서비스 연결 끊김: {self._last_error} | 다음 요청에서 재연결")
+                for future, shm in entries:
+                    self._release(shm)
+                    self._resolve(future, None, f"추론 서비스 연결 끊김: {self._last_error}")
+                return
+
+            with self._lock:
+                entry = self._pending.pop(req_id, None)
+            if entry is None:
+                continue
+            future, shm = entry
+            self._release(shm)
+            self._resolve(future, payload, error)
+
+    def status(self) -> Dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "address": self.address,
+            "connected": self._conn is not None and not self._closed,
+            "pending": pending,
+            "reconnects": self._reconnects,
+            "last_error": self._last_error,
+        }
+
+    def close(self):
+        self._closed = True
+        with self._send_lock:
+            if self._conn is not None:
+                self._conn.close()
+
+
+if __name__ == "__main__":
+    # 오토튠 프로파일이 있으면 워커/스레드 수 기본값으로 사용
+    profile = load_profile()
+    parser = argparse.ArgumentParser(description="YOLO 추론 서비스 (프로세스 풀)")
+    parser.add_argument("--address", default=os.getenv("INFERENCE_SERVICE", DEFAULT_ADDRESS))
+    parser.add_argument("--workers", type=int,
+                        default=profile["workers"] if profile["source"] else max(1, (os.cpu_count() or 2) // 2),
+                        help="모델을 소유하는 추론 프로세스 수")
+    parser.add_argument("--threads", type=int, default=profile["threads"],
+                        help="추론 프로세스당 torch 스레드 수 (0 = 기본값)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    InferenceService(
+        address=args.address,
+        workers=args.workers,
+        threads_per_worker=args.threads,
+        model_path=args.model
+    ).serve_forever()
@@ -0,0 +1,65 @@
+"""
+CPU 추론 프로파일 (torch 스레드 수, 추론 워커 수, 배치 크기, 입력 크기)
+
+benchmarks/autotune.py가 대상 장비에서 조합별 처리량/지연을 측정해 고른 설정을 JSON으로 저장하고,
+main_api.load_model이 시작 시 이 파일을 읽어 적용합니다. 파일이 없으면 기존 기본값과 같게 동작합니다.
+
+    threads      : torch intra-op 스레드 수 (0 = torch 기본값)
+    workers      : 추론 프로세스 수 (추론 서비스 분리 모드 --workers 기본값)
+    batch        : 동시에 들어온 프레임을 묶어 한 번에 추론할 최대 개수 (1 = 묶지 않음)
+    batch_window : 배치를 채우려고 기다리는 최대 시간(초)
+    imgsz        : YOLO 입력 크기
+"""
+import os
+import json
+import logging
+from typing import Dict, Optional
+
+PROFILE_PATH = os.getenv("INFERENCE_PROFILE", "inference_profile.json")
+
+DEFAULT_PROFILE = {
+    "threads": 0,
+    "workers": 1,
+    "batch": 1,
+    "batch_window": 0.01,
+    "imgsz": 640,
+}
+
+
+def load_profile(path: Optional[str] = PROFILE_PATH) -> Dict:
+    """
+    저장된 프로파일을 읽어 기본값과 합칩니다. 파일이 없거나 읽을 수 없으면 기본값.
+    다른 CPU 구성에서 측정한 프로파일이면 경고를 남깁니다 (값은 그대로 적용).
+    """
+    profile = dict(DEFAULT_PROFILE, source=None)
+    if not path or not os.path.exists(path):
+        return profile
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"추론 프로파일 읽기 실패: {e} | 기본값 사용")
+        return profile
+
+    profile.update({k: saved[k] for k in DEFAULT_PROFILE if k in saved})
+    profile["source"] = path
+    measured_cpus = saved.get("meta", {}).get("cpu_count")
+    if measured_cpus and measured_cpus != os.cpu_count():
+        logging.warning(
+            f"추론 프로파일은 CPU {measured_cpus}개 장비에서 측정됨 (현재 {os.cpu_count()}개) | "
+            f"python -m benchmarks.autotune 재실행 권장"
+        )
+    return profile
+
+
+def save_profile(profile: Dict, path: str = PROFILE_PATH) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def apply_threads(threads: int):
+    """torch intra-op 스레드 수 설정 (0이면 그대로)"""
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
@@ -2,15 +2,48 @@ import os
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
 import base64 # 음성 데이터 처리를 위해 base64 추가
+import time
+from concurrent.futures import ThreadPoolExecutor
+from modules.metrics import LLM_SECONDS, LLM_FALLBACKS, LLM_BATCH_SIZE, TTS_SECONDS, TTS_FAILURES
+from modules.batching import MicroBatcher
+from modules.circuit_breaker import CircuitBreaker
+from modules.audio_store import audio_store
+from modules.phrase_bank import phrase_bank, count_phrase
 
 # --- 환경 설정 ---
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# 오디오 전달 방식
+# - reference (기본): 오디오는 서버에 보관, 응답에는 audio_id/audio_url만 포함 (/audio/{id} 스트리밍)
+# - inline: 기존처럼 응답에 audio_base64 포함
+AUDIO_DELIVERY = os.getenv("AUDIO_DELIVERY", "reference")
+_tts_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts")
+
+
+def _probe_openai():
+    """서킷 프로버용 가벼운 상태 확인 (재시도 없이 3초 타임아웃)"""
+    client.with_options(timeout=3.0, max_retries=0).models.list()
+
+
+# OpenAI 장애 시 매 요청이 타임아웃을 기다리지 않도록 LLM/TTS 호출을 서킷으로 감쌈
+llm_breaker = CircuitBreaker(
+    "llm",
+    failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "3")),
+    probe=_probe_openai,
+    probe_interval=float(os.getenv("BREAKER_PROBE_INTERVAL", "10"))
+)
+tts_breaker = CircuitBreaker(
+    "tts",
+    failure_threshold=int(os.getenv("TTS_BREAKER_THRESHOLD", "3")),
+    probe=_probe_openai,
+    probe_interval=float(os.getenv("BREAKER_PROBE_INTERVAL", "10"))
+)
+
 # --- 로깅 설정 ---
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +55,7 @@ def _generate_tts_audio(text_to_speak: str) -> (str or None):
     주어진 텍스트를 OpenAI TTS-1을 사용해 MP3 음성으로 변환하고
     Base64 문자열로 반환합니다.
     """
+    t0 = time.perf_counter()
     try:
         response = client.audio.speech.create(
             model="tts-1",      # 빠르고 품질 좋은 모델
@@ -31,14 +65,105 @@ def _generate_tts_audio(text_to_speak: str) -> (str or None):
         # 응답 받은 오디오 바이트를 Base64로 인코딩
         audio_bytes = response.content
         audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+        TTS_SECONDS.observe(time.perf_counter() - t0, outcome="success")
+        tts_breaker.record_success()
         logging.info("TTS 음성 생성 성공")
         return audio_base64
     except Exception as e:
+        TTS_SECONDS.observe(time.perf_counter() - t0, outcome="failure")
+        TTS_FAILURES.inc()
+        tts_breaker.record_failure()
         logging.warning(f"TTS 음성 생성 실패: {e}")
         return None
 
-def generate_fallback_warning(detected_objects: List[str]) -> Dict[str, str]:
-    """해안 경계용 규칙 기반 경고 생성 (TTS 기능 추가)"""
+def synthesize_mp3(text_to_speak: str) -> bytes:
+    """문구 뱅크 렌더링용: 텍스트 1개를 MP3 바이트로 변환 (실패 시 예외)"""
+    response = client.audio.speech.create(
+        model="tts-1",
+        voice=phrase_bank.voice,
+        input=text_to_speak,
+        response_format="mp3"
+    )
+    return response.content
+
+
+def warm_phrase_bank():
+    """문구 뱅크에 빠진 조각이 있으면 백그라운드에서 한 번 렌더링 (서버 시작 시 호출)"""
+    missing = phrase_bank.missing()
+    if missing and tts_breaker.allow():
+        logging.info(f"문구 뱅크 조각 {len(missing)}개 렌더링 시작")
+        _tts_executor.submit(phrase_bank.build, synthesize_mp3)
+
+def _stream_tts_audio(text_to_speak: str, entry) -> None:
+    """TTS 응답을 청크 단위로 받아 오디오 저장소 항목에 바로 쌓습니다 (백그라운드 실행)."""
+    t0 = time.perf_counter()
+    try:
+        with client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice="nova",
+            input=text_to_speak,
+            response_format="mp3"
+        ) as response:
+            for chunk in response.iter_bytes(chunk_size=8192):
+                entry.append(chunk)
+        entry.finish()
+        TTS_SECONDS.observe(time.perf_counter() - t0, outcome="success")
+        tts_breaker.record_success()
+        logging.info(f"TTS 음성 스트리밍 완료 ({entry.size} bytes)")
+    except Exception as e:
+        entry.finish(error=str(e))
+        TTS_SECONDS.observe(time.perf_counter() - t0, outcome="failure")
+        TTS_FAILURES.inc()
+        tts_breaker.record_failure()
+        logging.warning(f"TTS 음성 생성 실패: {e}")
+
+
+def _without_audio(result: Dict) -> Dict:
+    result["audio_url" if AUDIO_DELIVERY != "inline" else "audio_base64"] = None
+    return result
+
+
+def _attach_local_audio(result: Dict, audio: bytes) -> Dict:
+    """이미 만들어진 MP3(문구 뱅크 조합)를 네트워크 호출 없이 경고에 붙입니다."""
+    if AUDIO_DELIVERY == "inline":
+        result["audio_base64"] = base64.b64encode(audio).decode('utf-8')
+        return result
+
+    entry = audio_store.create()
+    entry.append(audio)
+    entry.finish()
+    result["audio_id"] = entry.audio_id
+    result["audio_url"] = f"/audio/{entry.audio_id}"
+    return result
+
+
+def _attach_audio(result: Dict, text_to_speak: str, parts: Optional[List[str]] = None) -> Dict:
+    """
+    경고 딕셔너리에 음성을 붙입니다 (AUDIO_DELIVERY 설정에 따라 참조 또는 인라인).
+    parts(템플릿 조각)가 주어지고 문구 뱅크에 모두 있으면 원격 TTS 없이 로컬에서 조합합니다.
+    """
+    if parts:
+        audio = phrase_bank.compose(parts)
+        if audio is not None:
+            return _attach_local_audio(result, audio)
+
+    if not tts_breaker.allow():
+        # TTS 서킷 OPEN: 네트워크 호출 없이 음성 없이 응답
+        return _without_audio(result)
+
+    if AUDIO_DELIVERY == "inline":
+        result["audio_base64"] = _generate_tts_audio(text_to_speak)
+        return result
+
+    entry = audio_store.create()
+    _tts_executor.submit(_stream_tts_audio, text_to_speak, entry)
+    result["audio_id"] = entry.audio_id
+    result["audio_url"] = f"/audio/{entry.audio_id}"
+    return result
+
+
+def generate_fallback_warning(detected_objects: List[str], audio: bool = True) -> Dict[str, str]:
+    """해안 경계용 규칙 기반 경고 생성 (TTS 기능 추가, audio=False면 음성 생략)"""
     # ... (기존 fallback 로직과 동일) ...
     critical = [obj for obj in detected_objects if "매우 가까움" in obj]
     warning = [obj for obj in detected_objects if "중간 거리" in obj]
@@ -53,6 +178,7 @@ def generate_fallback_warning(detected_objects: List[str]) -> Dict[str, str]:
     
     # 1. 반환할 딕셔너리 생성
     if critical and has_high_risk:
+        parts = ["경보", "해안가 근접 객체 탐지", count_phrase(len(critical))]
         result_dict = {
             "level": "경보",
             "summary": f"해안가 근접 객체 탐지 ({len(critical)}개)",
@@ -60,6 +186,7 @@ def generate_fallback_warning(detected_objects: List[str]) -> Dict[str, str]:
             "source": "fallback"
         }
     elif warning:
+        parts = ["주의", "선박 또는 인원 관측", count_phrase(len(warning))]
         result_dict = {
             "level": "주의",
             "summary": f"선박 또는 인원 관측 ({len(warning)}개)",
@@ -67,6 +194,7 @@ def generate_fallback_warning(detected_objects: List[str]) -> Dict[str, str]:
             "source": "fallback"
         }
     else:
+        parts = ["안전", "원거리 객체만 관측됨"]
         result_dict = {
             "level": "안전",
             "summary": "원거리 객체만 관측됨",
@@ -77,89 +205,126 @@ def generate_fallback_warning(detected_objects: List[str]) -> Dict[str, str]:
     result_dict["raw_detections"] = detected_objects
     result_dict["timestamp"] = timestamp
     
-    # 2. TTS 생성
-    text_to_speak = f"[{result_dict['level']}] {result_dict['summary']}"
-    result_dict["audio_base64"] = _generate_tts_audio(text_to_speak)
+    # 2. TTS 생성 (문구 뱅크에 조각이 있으면 로컬 조합). LLM 경고처럼 조치까지 읽어줌
+    if not audio:
+        return _without_audio(result_dict)
+    parts.append(result_dict["action"])
+    text_to_speak = f"[{result_dict['level']}] {result_dict['summary']}. {result_dict['action']}"
+    _attach_audio(result_dict, text_to_speak, parts)
     
     return result_dict
 
 
-def generate_warning(detected_objects: List[str], max_retries: int = 3) -> Dict[str, str]:
-    """
-    YOLO 탐지 결과를 자연어 경고 메시지 및 TTS 음성으로 변환 (수정)
-    """
-    start_time = datetime.now()
-    
-    # ... (빈 입력 처리 로직은 동일) ...
-    if not detected_objects:
-        empty_result = {
-            "level": "안전",
-            "summary": "탐지된 객체 없음",
-            "action": "정상 경계 유지",
-            "raw_detections": [],
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "source": "empty"
-        }
-        # TTS 생성
-        text_to_speak = "[안전] 탐지된 객체 없음"
-        empty_result["audio_base64"] = _generate_tts_audio(text_to_speak)
-        return empty_result
-
-    items = "\n".join(f"- {x}" for x in detected_objects)
-
-    # ... (프롬프트 구성은 동일) ...
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "너는 백령도 해안 경계 전술 경고 시스템이다. 출력은 반드시 다음 JSON 형식을 따른다:\n"
-                "{\n"
-                '  "level": "경보|주의|안전",\n'
-                '  "summary": "한 줄 상황 요약",\n'
-                '  "action": "즉시 취할 행동"\n'
-                "}\n\n"
-                "탐지 가능 객체: 어선, 상선, 군함, 사람, 유조류\n\n"
-                "내부 처리 단계:\n"
-                "1) 상황요약관: 탐지 결과 분류, 중복 제거, 위험 항목 식별\n"
-                "2) 위험도평가관: 거리 기준으로 심각도 산출\n"
-                "3) 통신장교: 해안 경계 상황에 맞는 짧고 명확한 경고 작성\n\n"
-                "규칙: 과장 금지, 존재하지 않는 객체 추가 금지, 민간 선박/우군 판단은 신중히"
-            ),
-        },
-        # ... (Few-shot 예시들은 동일) ...
-        {
-            "role": "user",
-            "content": "탐지 결과:\n- 사람 → 매우 가까움"
-        },
-        {
-            "role": "assistant",
-            "content": json.dumps({
-                "level": "경보",
-                "summary": "해안가에 인원 근접 탐지",
-                "action": "즉시 육안 확인, 상급부대 보고 준비"
-            }, ensure_ascii=False)
-        },
-        {
-            "role": "user",
-            "content": "탐지 결과:\n- 어선 → 중간 거리\n- 상선 → 멀리 있음"
-        },
-        {
-            "role": "assistant",
-            "content": json.dumps({
-                "level": "주의",
-                "summary": "어선이 중간 거리에서 관측됨. 상선은 멀리 있음",
-                "action": "어선 이동 경로 지속 관측, 접근 시 식별 절차"
-            }, ensure_ascii=False)
-        },
-        # ... (다른 예시들) ...
-        {
-            "role": "user",
-            "content": f"탐지 결과:\n{items}"
-        },
+# --- 프롬프트 구성 ---
+_SYSTEM_PROMPT = (
+    "너는 백령도 해안 경계 전술 경고 시스템이다. 출력은 반드시 다음 JSON 형식을 따른다:\n"
+    "{\n"
+    '  "level": "경보|주의|안전",\n'
+    '  "summary": "한 줄 상황 요약",\n'
+    '  "action": "즉시 취할 행동"\n'
+    "}\n\n"
+    "탐지 가능 객체: 어선, 상선, 군함, 사람, 유조류\n\n"
+    "내부 처리 단계:\n"
+    "1) 상황요약관: 탐지 결과 분류, 중복 제거, 위험 항목 식별\n"
+    "2) 위험도평가관: 거리 기준으로 심각도 산출\n"
+    "3) 통신장교: 해안 경계 상황에 맞는 짧고 명확한 경고 작성\n\n"
+    "규칙: 과장 금지, 존재하지 않는 객체 추가 금지, 민간 선박/우군 판단은 신중히"
+)
+
+# 여러 장면을 한 번에 요청할 때 덧붙이는 지시
+_BATCH_PROMPT = (
+    "\n\n여러 장면이 '장면 N' 으로 구분되어 한 번에 주어질 수 있다. 이 경우 장면마다 독립적으로 판단하고, "
+    "출력은 반드시 다음 JSON 형식을 따른다 (장면 수와 순서를 정확히 지킬 것):\n"
+    '{"warnings": [{"scene": 1, "level": "...", "summary": "...", "action": "..."}, ...]}'
+)
+
+_FEW_SHOT = [
+    (["사람 → 매우 가까움"], {
+        "level": "경보",
+        "summary": "해안가에 인원 근접 탐지",
+        "action": "즉시 육안 확인, 상급부대 보고 준비"
+    }),
+    (["어선 → 중간 거리", "상선 → 멀리 있음"], {
+        "level": "주의",
+        "summary": "어선이 중간 거리에서 관측됨. 상선은 멀리 있음",
+        "action": "어선 이동 경로 지속 관측, 접근 시 식별 절차"
+    }),
+]
+
+VALID_LEVELS = ("경보", "주의", "안전")
+
+
+def _format_items(detected_objects: List[str]) -> str:
+    return "\n".join(f"- {x}" for x in detected_objects)
+
+
+def _build_messages(detected_objects: List[str]) -> List[Dict]:
+    """단일 장면용 프롬프트 (시스템 + Few-shot + 탐지 결과)"""
+    messages = [{"role": "system", "content": _SYSTEM_PROMPT}]
+    for example, answer in _FEW_SHOT:
+        messages.append({"role": "user", "content": f"탐지 결과:\n{_format_items(example)}"})
+        messages.append({"role": "assistant", "content": json.dumps(answer, ensure_ascii=False)})
+    messages.append({"role": "user", "content": f"탐지 결과:\n{_format_items(detected_objects)}"})
+    return messages
+
+
+def _format_scenes(scenes: List[List[str]]) -> str:
+    return "\n\n".join(
+        f"장면 {i} 탐지 결과:\n{_format_items(objs)}" for i, objs in enumerate(scenes, 1)
+    )
+
+
+def _build_batch_messages(scenes: List[List[str]]) -> List[Dict]:
+    """여러 장면을 한 요청으로 묶은 프롬프트 (Few-shot도 배치 형식으로 제시)"""
+    examples = [example for example, _ in _FEW_SHOT]
+    answers = {"warnings": [{"scene": i, **answer} for i, (_, answer) in enumerate(_FEW_SHOT, 1)]}
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT + _BATCH_PROMPT},
+        {"role": "user", "content": _format_scenes(examples)},
+        {"role": "assistant", "content": json.dumps(answers, ensure_ascii=False)},
+        {"role": "user", "content": _format_scenes(scenes)},
     ]
 
+
+def _finalize_llm_result(result: Dict, detected_objects: List[str]) -> Dict:
+    """LLM 응답에 메타데이터와 TTS 음성을 붙여 최종 경고 딕셔너리로 만듭니다."""
+    result["raw_detections"] = detected_objects
+    result["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    result["source"] = "llm"
+
+    # --- TTS 음성 생성 ---
+    # 관측병에게는 '요약'과 '조치'를 모두 들려주는 것이 좋습니다.
+    text_to_speak = f"[{result['level']}] {result['summary']}. {result['action']}"
+    _attach_audio(result, text_to_speak)
+    return result
+
+
+def _empty_warning() -> Dict:
+    empty_result = {
+        "level": "안전",
+        "summary": "탐지된 객체 없음",
+        "action": "정상 경계 유지",
+        "raw_detections": [],
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "source": "empty"
+    }
+    # TTS 생성
+    text_to_speak = "[안전] 탐지된 객체 없음. 정상 경계 유지"
+    _attach_audio(empty_result, text_to_speak, ["안전", "탐지된 객체 없음", "정상 경계 유지"])
+    return empty_result
+
+
+def _generate_single_warning(detected_objects: List[str], max_retries: int = 3) -> Dict[str, str]:
+    """장면 1개에 대해 LLM 경고를 생성 (재시도 후 실패 시 규칙 기반 폴백)"""
+    start_time = datetime.now()
+    messages = _build_messages(detected_objects)
+
     # --- API 호출 (재시도 로직) ---
     for attempt in range(max_retries):
+        if not llm_breaker.allow():
+            # LLM 서킷 OPEN: 타임아웃을 기다리지 않고 바로 규칙 기반 경고
+            break
+        t0 = time.perf_counter()
         try:
             # 1. LLM 텍스트 생성
             resp = client.chat.completions.create(
@@ -172,14 +337,11 @@ def generate_warning(detected_objects: List[str], max_retries: int = 3) -> Dict[
             
             # 2. 응답 파싱
             result = json.loads(resp.choices[0].message.content)
-            result["raw_detections"] = detected_objects
-            result["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            result["source"] = "llm"
+            LLM_SECONDS.observe(time.perf_counter() - t0, outcome="success")
+            llm_breaker.record_success()
             
-            # --- 3. TTS 음성 생성 (신규 추가) ---
-            # 관측병에게는 '요약'과 '조치'를 모두 들려주는 것이 좋습니다.
-            text_to_speak = f"[{result['level']}] {result['summary']}. {result['action']}"
-            result["audio_base64"] = _generate_tts_audio(text_to_speak)
+            # 3. 메타데이터 + TTS 음성
+            _finalize_llm_result(result, detected_objects)
 
             elapsed = (datetime.now() - start_time).total_seconds()
             logging.info(
@@ -190,15 +352,108 @@ def generate_warning(detected_objects: List[str], max_retries: int = 3) -> Dict[
             return result
         
         except Exception as e:
+            LLM_SECONDS.observe(time.perf_counter() - t0, outcome="failure")
+            llm_breaker.record_failure()
             if attempt == max_retries - 1:
                 logging.error(f"LLM 호출 최종 실패: {e} | 폴백 모드 전환")
+                LLM_FALLBACKS.inc()
                 return generate_fallback_warning(detected_objects) # 폴백 함수도 TTS가 포함됨
             
             logging.warning(f"LLM 호출 실패 (시도 {attempt+1}/{max_retries}): {e}")
     
+    LLM_FALLBACKS.inc()
     return generate_fallback_warning(detected_objects) # 최종 폴백
 
 
+def _generate_batch_warnings(scenes: List[List[str]], max_retries: int = 2) -> List[Dict]:
+    """
+    여러 장면을 LLM 요청 한 번으로 처리합니다.
+    응답 배열에서 장면별로 결과를 꺼내고, 형식이 틀린 장면만 규칙 기반으로 폴백합니다.
+    """
+    LLM_BATCH_SIZE.observe(len(scenes))
+    if len(scenes) == 1:
+        return [_generate_single_warning(scenes[0])]
+
+    messages = _build_batch_messages(scenes)
+    parsed = None
+    for attempt in range(max_retries):
+        if not llm_breaker.allow():
+            break
+        t0 = time.perf_counter()
+        try:
+            resp = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=messages,
+                temperature=0.2,
+                timeout=10 + len(scenes),  # 장면 수만큼 출력이 길어짐
+                response_format={"type": "json_object"}
+            )
+            parsed = json.loads(resp.choices[0].message.content).get("warnings")
+            LLM_SECONDS.observe(time.perf_counter() - t0, outcome="success")
+            llm_breaker.record_success()
+            break
+        except Exception as e:
+            LLM_SECONDS.observe(time.perf_counter() - t0, outcome="failure")
+            llm_breaker.record_failure()
+            logging.warning(f"LLM 배치 호출 실패 (시도 {attempt+1}/{max_retries}, 장면 {len(scenes)}개): {e}")
+
+    # scene 번호로 매칭하고, 번호가 없으면 배열 순서로 대응
+    by_scene = {}
+    if isinstance(parsed, list):
+        for pos, item in enumerate(parsed, 1):
+            if isinstance(item, dict):
+                by_scene.setdefault(item.get("scene", pos), item)
+
+    results = []
+    for i, detected_objects in enumerate(scenes, 1):
+        item = by_scene.get(i)
+        if (
+            item is not None
+            and item.get("level") in VALID_LEVELS
+            and isinstance(item.get("summary"), str)
+            and isinstance(item.get("action"), str)
+        ):
+            result = {k: item[k] for k in ("level", "summary", "action")}
+            results.append(_finalize_llm_result(result, detected_objects))
+        else:
+            LLM_FALLBACKS.inc()
+            results.append(generate_fallback_warning(detected_objects))
+
+    fallbacks = sum(1 for r in results if r["source"] == "fallback")
+    logging.info(f"경고 배치 생성 | 장면 {len(scenes)}개 | 폴백 {fallbacks}개")
+    return results
+
+
+# 짧은 시간창 동안 들어온 장면들을 하나의 LLM 요청으로 묶는 배처 (LLM_COALESCE=1)
+COALESCE_CONFIG = {
+    "enabled": os.getenv("LLM_COALESCE", "0") == "1",
+    "window": float(os.getenv("LLM_COALESCE_WINDOW", "0.05")),
+    "max_batch": int(os.getenv("LLM_COALESCE_MAX_BATCH", "8")),
+}
+_warning_batcher = (
+    MicroBatcher(
+        _generate_batch_warnings,
+        window=COALESCE_CONFIG["window"],
+        max_batch=COALESCE_CONFIG["max_batch"],
+        name="llm-batch"
+    )
+    if COALESCE_CONFIG["enabled"] else None
+)
+
+
+def generate_warning(detected_objects: List[str], max_retries: int = 3) -> Dict[str, str]:
+    """
+    YOLO 탐지 결과를 자연어 경고 메시지 및 TTS 음성으로 변환 (수정)
+    LLM_COALESCE=1이면 동시에 들어온 다른 장면들과 묶어 LLM을 한 번만 호출합니다.
+    """
+    if not detected_objects:
+        return _empty_warning()
+
+    if _warning_batcher is not None:
+        return _warning_batcher.submit(detected_objects).result()
+    return _generate_single_warning(detected_objects, max_retries)
+
+
 def format_warning_text(warning: Dict[str, str]) -> str:
     """경고 메시지를 UI 표시용 텍스트로 변환 (동일)"""
     return f"[{warning['level']}] {warning['summary']}\n조치: {warning['action']}"
@@ -0,0 +1,164 @@
+"""
+경량 메트릭 수집 (Prometheus 텍스트 포맷)
+
+외부 의존성 없이 카운터/게이지/히스토그램을 프로세스 메모리에 집계하고
+/metrics 엔드포인트에서 Prometheus exposition 포맷으로 내보냅니다.
+관측 1회 비용은 락 1회 + 버킷 탐색 수준이라 운영 환경에서 상시 켜둘 수 있습니다.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# 기본 지연시간 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_REGISTRY: List["_Metric"] = []
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(k, "")) for k in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            for key, v in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {v}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key → [버킷별 카운트..., 합계, 총 개수]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if idx < len(self.buckets):
+                row[idx] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            for key, row in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, row):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {row[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {row[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {row[-1]}")
+        return lines
+
+
+def render_metrics() -> str:
+    """등록된 모든 메트릭을 Prometheus 텍스트 포맷으로 직렬화"""
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==================== 요청 단계별 타이머 ====================
+class StageTimer:
+    """
+    단조 시계(perf_counter) 기반 단계별 소요시간 측정기.
+    각 단계는 STAGE_SECONDS 히스토그램에 기록되고, spans에 ms 단위로 남습니다.
+    """
+    __slots__ = ("spans", "_start")
+
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.spans[name] = round(elapsed * 1000, 2)
+            STAGE_SECONDS.observe(elapsed, stage=name)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+
+# ==================== 서비스 공통 메트릭 ====================
+REQUESTS = Counter("detect_requests_total", "/detect 요청 수", ["status"])
+REQUEST_SECONDS = Histogram("detect_request_seconds", "/detect 전체 처리 시간")
+STAGE_SECONDS = Histogram("detect_stage_seconds", "/detect 단계별 처리 시간", ["stage"])
+DETECTIONS_PER_FRAME = Histogram(
+    "detections_per_frame", "프레임당 탐지 객체 수", buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34)
+)
+WS_FRAMES = Counter("ws_frames_total", "/ws/frames 수신 프레임 (processed/dropped/invalid/rejected)", ["outcome"])
+WS_FRAME_SECONDS = Histogram("ws_frame_seconds", "/ws/frames 프레임당 처리 시간 (헤더 해석 ~ 결과 전송)")
+WARNINGS = Counter("warnings_total", "생성된 경고 수 (source: llm/fallback/empty/error)", ["source", "level"])
+LLM_SECONDS = Histogram("llm_request_seconds", "LLM 경고 생성 호출 시간", ["outcome"])
+LLM_BATCH_SIZE = Histogram("llm_batch_scenes", "LLM 요청 1회에 묶인 장면 수", buckets=(1, 2, 4, 8, 16, 32))
+LLM_FALLBACKS = Counter("llm_fallback_total", "LLM 실패로 규칙 기반 경고로 전환된 횟수")
+TTS_SECONDS = Histogram("tts_request_seconds", "TTS 음성 생성 호출 시간", ["outcome"])
+TTS_FAILURES = Counter("tts_failures_total", "TTS 음성 생성 실패 횟수")
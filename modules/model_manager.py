@@ -0,0 +1,174 @@
+"""
+무중단 모델 교체 (핫 리로드)
+
+새 best.pt를 반영하려고 서버를 재시작하면 콜드 스타트 동안 요청이 끊깁니다.
+ModelManager는 새 가중치를 백그라운드에서 로드 → 워밍업 → 스모크 이미지 검사까지 마친 뒤
+install 콜백으로 전역 모델 참조를 한 번에 바꿉니다. 이미 추론 중인 요청은 이전 모델 객체로 끝까지 처리됩니다.
+
+- 가중치 감시: MODEL_WATCH_INTERVAL 초마다 파일 변경 확인 (0이면 끔). 복사 중인 파일을 읽지 않도록
+  두 번 연속 같은 크기/수정 시각일 때만 교체
+- 관리자 엔드포인트: POST /admin/reload-model (main_api)
+- 검사: 클래스 구성이 현재 모델과 같아야 하고, 스모크 이미지(MODEL_SMOKE_IMAGE) 추론이 정상이어야 함
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from modules.detector import MODEL_PATH, extract_boxes, model_version
+from modules.metrics import Counter
+
+RELOAD_CONFIG = {
+    "watch_interval": float(os.getenv("MODEL_WATCH_INTERVAL", "0")),
+    "smoke_image": os.getenv("MODEL_SMOKE_IMAGE"),
+    "warmup_runs": 2,
+}
+
+MODEL_RELOADS = Counter("model_reloads_total", "모델 교체 시도 결과 (success/failure)", ["outcome"])
+
+
+class ModelReloadError(RuntimeError):
+    pass
+
+
+class ModelManager:
+    def __init__(self, install: Callable[[object, str], None], model_path: str = MODEL_PATH,
+                 config: Dict = RELOAD_CONFIG):
+        """
+        Args:
+            install: 검증을 마친 (모델, 버전)을 받아 전역 참조를 교체하는 함수
+        """
+        self.install = install
+        self.model_path = model_path
+        self.config = config
+        self.model = None
+        self.version: Optional[str] = None
+        self.last_reload: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def set_current(self, model):
+        """시작 시 로드한 모델을 현재 모델로 등록"""
+        self.model = model
+        self.version = model_version(model)
+
+    # --- 로드 + 검증 ---
+    def _smoke_test(self, model):
+        import cv2
+
+        # 워밍업: 첫 추론의 메모리 할당·그래프 준비를 교체 전에 끝냄
+        blank = np.zeros((640, 640, 3), dtype=np.uint8)
+        for _ in range(self.config["warmup_runs"]):
+            model.predict(blank, verbose=False, conf=0.25)
+
+        path = self.config["smoke_image"]
+        if not path:
+            return
+        img = cv2.imread(path)
+        if img is None:
+            raise ModelReloadError(f"스모크 이미지를 읽을 수 없습니다: {path}")
+        boxes = extract_boxes(model.predict(img, verbose=False, conf=0.25)[0])
+        h, w = img.shape[:2]
+        for cls_id, conf, (x1, y1, x2, y2) in boxes:
+            if cls_id not in model.names or not (0 <= conf <= 1) or not np.isfinite([x1, y1, x2, y2]).all():
+                raise ModelReloadError(f"스모크 이미지 추론 결과가 비정상입니다: {cls_id}, {conf}")
+            if x2 <= x1 or y2 <= y1 or x1 < -1 or y1 < -1 or x2 > w + 1 or y2 > h + 1:
+                raise ModelReloadError("스모크 이미지 박스 좌표가 이미지 범위를 벗어났습니다")
+
+    def reload(self, model_path: Optional[str] = None, force: bool = False) -> Dict:
+        """
+        새 가중치를 로드·검증한 뒤 교체합니다 (호출 스레드에서 동기 실행).
+        실패하면 ModelReloadError를 던지고 현재 모델은 그대로 유지됩니다.
+        force=True이면 클래스 구성 검사를 건너뜁니다.
+        """
+        from ultralytics import YOLO
+
+        path = model_path or self.model_path
+        if not self._reload_lock.acquire(blocking=False):
+            raise ModelReloadError("다른 모델 교체가 진행 중입니다")
+        try:
+            t0 = time.perf_counter()
+            try:
+                model = YOLO(path)
+                if self.model is not None and not force:
+                    old_names = set(self.model.names.values())
+                    if set(model.names.values()) != old_names:
+                        raise ModelReloadError(
+                            f"클래스 구성이 다릅니다: {sorted(model.names.values())} (현재 {sorted(old_names)})"
+                        )
+                self._smoke_test(model)
+            except Exception as e:
+                MODEL_RELOADS.inc(outcome="failure")
+                self.last_error = str(e)
+                logging.error(f"모델 교체 실패 ({path}): {e} | 기존 모델 유지")
+                if isinstance(e, ModelReloadError):
+                    raise
+                raise ModelReloadError(str(e)) from e
+
+            previous = self.version
+            version = model_version(model)
+            self.install(model, version)
+            self.model, self.version = model, version
+            self.model_path = path
+            self.last_reload = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.last_error = None
+            MODEL_RELOADS.inc(outcome="success")
+            elapsed = time.perf_counter() - t0
+            logging.info(f"모델 교체 완료: {previous} → {version} ({elapsed:.1f}s)")
+            return {"previous": previous, "version": version, "seconds": round(elapsed, 2)}
+        finally:
+            self._reload_lock.release()
+
+    # --- 가중치 파일 감시 ---
+    def _stat(self):
+        try:
+            st = os.stat(self.model_path)
+            return (st.st_mtime, st.st_size)
+        except OSError:
+            return None
+
+    def _watch_loop(self, interval: float):
+        seen = self._stat()
+        pending = None
+        while not self._stop.wait(interval):
+            current = self._stat()
+            if current is None or current == seen:
+                pending = None
+                continue
+            if current != pending:
+                # 복사 중일 수 있으므로 다음 확인까지 같은 상태인지 기다림
+                pending = current
+                continue
+            seen, pending = current, None
+            try:
+                self.reload()
+            except ModelReloadError:
+                pass  # 로그는 reload에서 남김. 파일이 다시 바뀌면 재시도
+
+    def start_watching(self):
+        interval = self.config["watch_interval"]
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval,), name="model-watcher", daemon=True
+        )
+        self._watcher.start()
+        logging.info(f"가중치 감시 시작: {self.model_path} ({interval}s 간격)")
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def status(self) -> Dict:
+        return {
+            "version": self.version,
+            "path": self.model_path,
+            "watching": self._watcher is not None,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,188 @@
+"""
+규칙 기반 경고용 오프라인 음성 (사전 렌더링 문구 뱅크)
+
+generate_fallback_warning / 빈 장면 경고는 레벨 단어, 고정 요약·행동 문구, 개수 같은
+정해진 조각의 조합이므로 매번 네트워크 TTS를 부를 필요가 없습니다.
+각 조각을 한 번만 TTS로 렌더링해 디스크(PHRASE_BANK_DIR)에 저장해 두고,
+경고 음성은 조각 MP3 프레임을 메모리에서 이어 붙여 만듭니다 (재인코딩 없음, 1ms 미만).
+LLM이 자유롭게 작성한 요약만 원격 TTS를 사용합니다.
+
+격리망 배포 시에는 인터넷이 되는 곳에서 미리 렌더링한 뒤 폴더를 복사합니다:
+    python -m modules.phrase_bank --build
+"""
+import os
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from modules.metrics import Counter
+
+PHRASE_BANK_DIR = os.getenv("PHRASE_BANK_DIR", "audio_bank")
+PHRASE_BANK_VOICE = "nova"
+
+# --- 문구 조각 (규칙 기반 경고 음성에 실제로 쓰이는 조각만) ---
+LEVELS = ("경보", "주의", "안전")
+SUMMARIES = ("해안가 근접 객체 탐지", "선박 또는 인원 관측", "원거리 객체만 관측됨", "탐지된 객체 없음")
+ACTIONS = ("즉시 육안 확인 및 상급부대 보고", "이동 경로 지속 관측", "정상 경계 유지")
+MAX_COUNT = 20
+MANY = "다수"
+
+
+def count_phrase(n: int) -> str:
+    """개수 조각 (MAX_COUNT 초과는 '다수')"""
+    return f"{n}개" if n <= MAX_COUNT else MANY
+
+
+VOCABULARY = (
+    LEVELS + SUMMARIES + ACTIONS
+    + tuple(count_phrase(n) for n in range(1, MAX_COUNT + 1)) + (MANY,)
+)
+
+PHRASE_BANK_LOOKUPS = Counter("phrase_bank_lookups_total", "문구 뱅크 음성 조합 결과 (hit/miss)", ["outcome"])
+
+
+# ==================== MP3 프레임 정리 ====================
+# MPEG Layer III 비트레이트(kbps)와 샘플레이트 표
+_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0),  # MPEG-1
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0),      # MPEG-2
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _frame_length(data: bytes, pos: int) -> int:
+    """pos 위치의 Layer III 프레임 길이 (프레임 헤더가 아니면 0)"""
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return 0
+    version = (data[pos + 1] >> 3) & 0x03   # 3=MPEG-1, 2=MPEG-2, 0=MPEG-2.5
+    layer = (data[pos + 1] >> 1) & 0x03     # 1=Layer III
+    bitrate_idx = data[pos + 2] >> 4
+    rate_idx = (data[pos + 2] >> 2) & 0x03
+    padding = (data[pos + 2] >> 1) & 0x01
+    if version == 1 or layer != 1 or rate_idx == 3:
+        return 0
+    bitrate = _BITRATES[3 if version == 3 else 2][bitrate_idx] * 1000
+    if bitrate == 0:
+        return 0
+    sample_rate = _SAMPLE_RATES[version][rate_idx]
+    coef = 144 if version == 3 else 72
+    return coef * bitrate // sample_rate + padding
+
+
+def strip_mp3(data: bytes) -> bytes:
+    """
+    조각을 이어 붙일 수 있도록 ID3 태그와 Xing/Info(전체 길이 정보) 프레임을 제거하고
+    순수 오디오 프레임만 남깁니다.
+    """
+    start, end = 0, len(data)
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        start = 10 + size + (10 if data[5] & 0x10 else 0)
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    # 첫 프레임 동기 위치 탐색
+    while start < end and not _frame_length(data, start):
+        start += 1
+    first_len = _frame_length(data, start)
+    if first_len and (b"Xing" in data[start:start + first_len] or b"Info" in data[start:start + first_len]):
+        start += first_len
+    return data[start:end]
+
+
+# ==================== 문구 뱅크 ====================
+class PhraseBank:
+    """문구 조각별 MP3를 메모리에 보관하고 조합 요청 시 이어 붙임"""
+
+    def __init__(self, directory: str = PHRASE_BANK_DIR, voice: str = PHRASE_BANK_VOICE,
+                 vocabulary: Sequence[str] = VOCABULARY):
+        self.directory = directory
+        self.voice = voice
+        self.vocabulary = tuple(vocabulary)
+        self._fragments: Dict[str, bytes] = {}
+        self._build_lock = threading.Lock()
+
+    def _path(self, text: str) -> str:
+        key = hashlib.sha1(f"{self.voice}:{text}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def load(self) -> int:
+        """디스크에 렌더링된 조각을 메모리로 읽어옵니다. 반환: 로드된 조각 수"""
+        for text in self.vocabulary:
+            path = self._path(text)
+            if text in self._fragments or not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                audio = strip_mp3(f.read())
+            if audio:
+                self._fragments[text] = audio
+        return len(self._fragments)
+
+    def missing(self) -> List[str]:
+        return [text for text in self.vocabulary if text not in self._fragments]
+
+    def build(self, synthesize: Callable[[str], bytes], texts: Optional[Iterable[str]] = None) -> int:
+        """
+        빠진 조각을 TTS로 렌더링해 디스크와 메모리에 저장합니다 (조각당 1회).
+        반환: 새로 렌더링한 조각 수
+        """
+        with self._build_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            rendered = 0
+            for text in (texts if texts is not None else self.missing()):
+                if text in self._fragments:
+                    continue
+                try:
+                    raw = synthesize(text)
+                except Exception as e:
+                    logging.warning(f"문구 뱅크 렌더링 실패 ('{text}'): {e}")
+                    break  # 네트워크 장애 시 나머지도 실패할 가능성이 높으므로 중단
+                with open(self._path(text), "wb") as f:
+                    f.write(raw)
+                audio = strip_mp3(raw)
+                if audio:
+                    self._fragments[text] = audio
+                    rendered += 1
+            if rendered:
+                logging.info(f"문구 뱅크 렌더링 완료 ({rendered}개 추가, 총 {len(self._fragments)}개)")
+            return rendered
+
+    def compose(self, parts: Sequence[str]) -> Optional[bytes]:
+        """조각들을 이어 붙인 MP3 (조각이 하나라도 없으면 None → 원격 TTS 사용)"""
+        fragments = [self._fragments.get(part) for part in parts]
+        if not parts or any(fragment is None for fragment in fragments):
+            PHRASE_BANK_LOOKUPS.inc(outcome="miss")
+            return None
+        PHRASE_BANK_LOOKUPS.inc(outcome="hit")
+        return b"".join(fragments)
+
+
+# 프로세스 전역 문구 뱅크 (llm_module이 사용)
+phrase_bank = PhraseBank()
+phrase_bank.load()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="규칙 기반 경고용 문구 뱅크 렌더링/측정")
+    parser.add_argument("--build", action="store_true", help="빠진 조각을 OpenAI TTS로 렌더링")
+    parser.add_argument("--repeat", type=int, default=10000, help="조합 시간 측정 반복 횟수")
+    args = parser.parse_args()
+
+    if args.build:
+        from modules.llm_module import synthesize_mp3
+        phrase_bank.build(synthesize_mp3)
+
+    missing = phrase_bank.missing()
+    print(f"조각 {len(phrase_bank.vocabulary) - len(missing)}/{len(phrase_bank.vocabulary)}개 준비됨")
+    if missing:
+        print(f"누락: {', '.join(missing)}")
+    else:
+        parts = ["경보", "해안가 근접 객체 탐지", count_phrase(3), "즉시 육안 확인 및 상급부대 보고"]
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            audio = phrase_bank.compose(parts)
+        elapsed = (time.perf_counter() - t0) / args.repeat
+        print(f"{' + '.join(parts)}: {len(audio)} bytes, 조합 {elapsed * 1e6:.1f}µs/회")
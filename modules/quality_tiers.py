@@ -0,0 +1,119 @@
+"""
+부하 적응형 추론 품질 단계
+
+트래픽이 몰려도 모든 요청이 같은 입력 크기로 추론하면 대기열이 끝없이 길어집니다.
+QualityController는 입구 대기열 길이와 최근 추론 지연(단계별 지수이동평균)을 보고
+품질 단계를 한 칸씩 내리거나(예: imgsz 640 → 480 → 320, conf 상향) 올립니다.
+
+- 기준 지연: 0단계에서 관측한 지연(지수이동평균)의 최솟값. 장비마다 다른 절대 속도 대신 이 값 대비 배율로 판단하므로
+  느린 장비라도 부하가 없으면 강등되지 않음
+- 강등: 대기열 >= degrade_queue 또는 현재 단계 지연 > 기준 지연 × degrade_ratio
+- 복구: 대기열 <= restore_queue 이고, 한 단계 위에서의 예상 지연(현재 지연 × 픽셀 수 비율)이
+  기준 지연 × restore_ratio 미만일 때 (강등 기준보다 낮은 복구 기준 + 단계 변경 후 최소 유지 시간 = 히스테리시스)
+- 저품질 단계에서 '매우 가까움' 탐지가 나오면 호출 측(main_api.run_inference)이 최고 품질로 재확인
+
+0단계는 서버 기본 predict 인자(추론 프로파일의 imgsz, conf 0.25)이고, QUALITY_TIERS는 그 아래 단계만 지정합니다.
+정확도를 낮추는 기능이므로 기본은 꺼져 있습니다 (ADAPTIVE_QUALITY=1로 켬).
+    QUALITY_TIERS="480:0.30,320:0.35"   # imgsz:conf, 쉼표로 구분
+"""
+import os
+import time
+from typing import Dict, List, Optional
+
+from modules.metrics import Counter, Gauge
+
+
+def parse_tiers(value: str) -> List[Dict]:
+    """'480:0.30,320:0.35' → [{"imgsz": 480, "conf": 0.3}, {"imgsz": 320, "conf": 0.35}]"""
+    tiers = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        imgsz, _, conf = item.partition(":")
+        tiers.append({"imgsz": int(imgsz), "conf": float(conf or 0.25)})
+    return tiers
+
+
+QUALITY_CONFIG = {
+    "enabled": os.getenv("ADAPTIVE_QUALITY", "0") == "1",
+    "tiers": parse_tiers(os.getenv("QUALITY_TIERS", "480:0.30,320:0.35")),
+    "degrade_queue": int(os.getenv("QUALITY_DEGRADE_QUEUE", "4")),
+    "restore_queue": int(os.getenv("QUALITY_RESTORE_QUEUE", "0")),
+    # 0단계 기준 지연 대비 배율
+    "degrade_ratio": float(os.getenv("QUALITY_DEGRADE_RATIO", "2.0")),
+    "restore_ratio": float(os.getenv("QUALITY_RESTORE_RATIO", "1.3")),
+    # 단계를 바꾼 뒤 최소 유지 시간 (초). 짧은 버스트에 단계가 요동치지 않도록
+    "min_dwell": float(os.getenv("QUALITY_MIN_DWELL", "5.0")),
+    "ewma_alpha": 0.2,
+    "recheck_critical": os.getenv("QUALITY_RECHECK_CRITICAL", "1") == "1",
+}
+
+QUALITY_TIER = Gauge("inference_quality_tier", "현재 추론 품질 단계 (0 = 최고 품질)")
+QUALITY_CHANGES = Counter("inference_quality_changes_total", "품질 단계 변경 횟수 (degrade/restore)", ["direction"])
+QUALITY_RECHECKS = Counter("inference_quality_rechecks_total", "저품질 단계의 근접 탐지를 최고 품질로 재확인한 횟수")
+
+
+class QualityController:
+    """요청마다 select()로 단계를 받고, 추론 후 observe()로 지연을 알려주는 방식 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(self, config: Dict = QUALITY_CONFIG, clock=time.monotonic):
+        self.config = config
+        self.clock = clock
+        self.tiers: List[Dict] = [{"imgsz": 640, "conf": 0.25}]
+        self.level = 0
+        self._latency: List[Optional[float]] = [None]
+        self._baseline: Optional[float] = None
+        self._changed_at = clock() - config["min_dwell"]
+
+    def configure(self, base_kwargs: Dict):
+        """0단계 = 서버 기본 predict 인자. 그보다 작은 입력 크기만 하위 단계로 사용"""
+        base = {"imgsz": base_kwargs.get("imgsz", 640), "conf": base_kwargs.get("conf", 0.25)}
+        lower = [t for t in self.config["tiers"] if t["imgsz"] < base["imgsz"]] if self.config["enabled"] else []
+        self.tiers = [base] + sorted(lower, key=lambda t: -t["imgsz"])
+        self._latency = [None] * len(self.tiers)
+        self._baseline = None
+        self.level = 0
+        QUALITY_TIER.set(0)
+
+    def kwargs(self, level: int) -> Dict:
+        return dict(self.tiers[level])
+
+    def select(self, queue_depth: int) -> int:
+        """현재 부하로 단계를 갱신하고 이번 요청에 쓸 단계를 반환"""
+        now = self.clock()
+        if len(self.tiers) > 1 and now - self._changed_at >= self.config["min_dwell"]:
+            latency, baseline = self._latency[self.level], self._baseline
+            slow = latency is not None and baseline is not None and latency > baseline * self.config["degrade_ratio"]
+            if self.level < len(self.tiers) - 1 and (queue_depth >= self.config["degrade_queue"] or slow):
+                self._step(+1, now, "degrade")
+            elif self.level > 0 and queue_depth <= self.config["restore_queue"] and latency is not None:
+                # 추론 시간은 입력 픽셀 수에 대략 비례. 기준 지연이 아직 없으면 대기열만 보고 복구
+                ratio = (self.tiers[self.level - 1]["imgsz"] / self.tiers[self.level]["imgsz"]) ** 2
+                if baseline is None or latency * ratio < baseline * self.config["restore_ratio"]:
+                    self._step(-1, now, "restore")
+        return self.level
+
+    def observe(self, level: int, seconds: float):
+        alpha = self.config["ewma_alpha"]
+        prev = self._latency[level]
+        self._latency[level] = seconds if prev is None else (1 - alpha) * prev + alpha * seconds
+        if level == 0:
+            self._baseline = min(self._baseline or self._latency[0], self._latency[0])
+
+    def _step(self, delta: int, now: float, direction: str):
+        self.level += delta
+        self._changed_at = now
+        # 새 단계의 예전 지연은 다른 부하에서 잰 값이므로 새로 측정
+        self._latency[self.level] = None
+        QUALITY_TIER.set(self.level)
+        QUALITY_CHANGES.inc(direction=direction)
+
+    def status(self) -> Dict:
+        return {
+            "enabled": len(self.tiers) > 1,
+            "level": self.level,
+            "tier": self.tiers[self.level],
+            "tiers": self.tiers,
+            "latency_ms": [round(v * 1000, 1) if v is not None else None for v in self._latency],
+            "baseline_ms": round(self._baseline * 1000, 1) if self._baseline is not None else None,
+        }
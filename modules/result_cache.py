@@ -0,0 +1,121 @@
+"""
+동일 이미지 재요청용 결과 캐시 (업로드 바이트 해시 → 탐지 + 경고)
+
+Streamlit에서 '객체 탐지 실행'을 두 번 누르거나 폴더를 다시 돌리면 같은 이미지가 다시 들어옵니다.
+업로드 바이트의 blake2b 해시 + 모델/설정 버전을 키로 직전 응답을 보관해
+디코딩·YOLO·LLM·TTS를 모두 건너뜁니다.
+
+- 메모리 상한(max_bytes) + TTL(오디오 저장소와 같은 10분)을 넘으면 오래된 항목부터 제거
+- 모델/설정 버전이 바뀌면(set_version) 전체 무효화
+- 적중률과 사용 바이트는 /metrics, /health로 노출
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from modules.metrics import Counter, Gauge
+
+RESULT_CACHE_CONFIG = {
+    "enabled": os.getenv("RESULT_CACHE", "1") == "1",
+    "max_bytes": int(os.getenv("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    "ttl": float(os.getenv("RESULT_CACHE_TTL", "600")),
+}
+
+RESULT_CACHE_LOOKUPS = Counter("result_cache_lookups_total", "결과 캐시 조회 (hit/miss)", ["outcome"])
+RESULT_CACHE_BYTES = Gauge("result_cache_bytes", "결과 캐시 사용 바이트 (JSON 크기 기준 추정)")
+RESULT_CACHE_ENTRIES = Gauge("result_cache_entries", "결과 캐시 항목 수")
+
+
+def content_digest(contents: bytes) -> str:
+    """업로드 바이트의 빠른 해시 (128비트)"""
+    return hashlib.blake2b(contents, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """바이트 상한 + TTL 기반 LRU 결과 캐시"""
+
+    def __init__(self, config: Dict = RESULT_CACHE_CONFIG):
+        self.config = config
+        self.version = ""
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # 키 → (결과, 크기, 저장 시각)
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, digest: str, variant: str = "") -> str:
+        return f"{self.version}|{variant}|{digest}"
+
+    def set_version(self, version: str):
+        """모델/설정 버전 갱신. 바뀌었으면 기존 결과를 모두 버림 (모델 재로드 시 호출)"""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+            self._bytes = 0
+            self._update_gauges()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        if not self.config["enabled"]:
+            return None
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and time.monotonic() - item[2] > self.config["ttl"]:
+                self._remove(key)
+                item = None
+            if item is None:
+                self._misses += 1
+                RESULT_CACHE_LOOKUPS.inc(outcome="miss")
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        RESULT_CACHE_LOOKUPS.inc(outcome="hit")
+        return item[0]
+
+    def store(self, key: str, result: Dict):
+        if not self.config["enabled"]:
+            return
+        size = len(json.dumps(result, ensure_ascii=False, default=str))
+        if size > self.config["max_bytes"]:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.config["max_bytes"]:
+                self._remove(next(iter(self._entries)))
+            self._update_gauges()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._update_gauges()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.config["enabled"],
+                "version": self.version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else None,
+            }
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        self._update_gauges()
+
+    def _update_gauges(self):
+        RESULT_CACHE_BYTES.set(self._bytes)
+        RESULT_CACHE_ENTRIES.set(len(self._entries))
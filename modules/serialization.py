@@ -0,0 +1,86 @@
+"""
+/detect 응답 축약 및 직렬화
+
+- fields  : 필요한 최상위 필드만 선택 (예: fields=detections)
+- compact : 중복 정보(detected_objects, warning.raw_detections) 제거
+- 인코더  : orjson(설치 시 JSON 기본), MessagePack(format=msgpack 또는 Accept 헤더)
+
+orjson / msgpack 은 선택 의존성입니다. 설치되지 않았으면 표준 JSON으로 동작합니다.
+    pip install orjson msgpack
+"""
+import json
+from typing import Dict, Iterable, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+# 항상 포함되는 필드
+ALWAYS_FIELDS = ("status",)
+
+
+def shape_response(data: Dict, fields: Optional[Iterable[str]] = None, compact: bool = False) -> Dict:
+    """원본 응답을 변경하지 않고 선택/축약된 사본을 만듭니다."""
+    if fields:
+        wanted = set(fields) | set(ALWAYS_FIELDS)
+        shaped = {k: v for k, v in data.items() if k in wanted}
+    else:
+        shaped = dict(data)
+
+    if compact:
+        shaped.pop("detected_objects", None)
+        if isinstance(shaped.get("warning"), dict):
+            shaped["warning"] = {k: v for k, v in shaped["warning"].items() if k != "raw_detections"}
+    return shaped
+
+
+def parse_fields(fields: Optional[str]):
+    """'detections,warning' 형태의 쿼리 값을 필드 리스트로 변환"""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+
+def encode_json(data: Dict) -> str:
+    """WebSocket 텍스트 메시지용 JSON 문자열 (orjson 우선)"""
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False)
+
+
+def check_format(fmt: Optional[str] = None):
+    """
+    format 쿼리 값 검증 (추론 전에 호출해 잘못된 요청이 파이프라인을 돌지 않도록)
+    지원하지 않는 포맷은 400, msgpack 미설치 상태의 format=msgpack은 406
+    """
+    if fmt == "msgpack" and msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack 인코더(msgpack)가 설치되어 있지 않습니다.")
+    if fmt not in (None, "json", "msgpack"):
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 응답 포맷: {fmt} (json | msgpack)")
+
+
+def render_response(data: Dict, fmt: Optional[str] = None, accept: Optional[str] = None) -> Response:
+    """
+    요청된 포맷으로 응답을 직렬화합니다.
+    fmt: 'json' | 'msgpack' | None (None이면 Accept 헤더로 결정)
+    """
+    check_format(fmt)
+    accept = (accept or "").lower()
+    wants_msgpack = fmt == "msgpack" or (fmt is None and any(t in accept for t in MSGPACK_MEDIA_TYPES))
+
+    if wants_msgpack and msgpack is not None:
+        return Response(msgpack.packb(data, use_bin_type=True), media_type="application/msgpack")
+
+    if orjson is not None:
+        return Response(orjson.dumps(data), media_type="application/json")
+    return JSONResponse(content=data)
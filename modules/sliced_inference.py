@@ -0,0 +1,189 @@
+"""
+슬라이스(타일) 추론
+
+광각 드론 영상에서 먼 선박은 640으로 축소되면 몇 픽셀밖에 남지 않아
+'멀리 있음'으로 나오거나 아예 놓칩니다. 원본 프레임을 겹치는 타일로 잘라
+전체 프레임(축소본)과 함께 한 번의 배치로 YOLO에 넣고,
+타일 경계를 넘는 박스는 클래스별 NMS로 병합합니다.
+텍스처가 거의 없는 빈 바다 타일은 건너뛰고, 타일 수에 상한을 두어 지연을 제한합니다.
+
+전체 프레임 단일 추론과 처리량 비교:
+    python -m modules.sliced_inference data/Filtered/Val/images --limit 20
+"""
+import glob
+import os
+import time
+import argparse
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from modules.detector import RawBox, extract_boxes
+
+# --- 기본 설정 ---
+SLICE_CONFIG = {
+    "tile_size": 640,         # 타일 한 변 (모델 입력 크기와 동일)
+    "overlap": 0.2,           # 인접 타일 겹침 비율
+    "max_tiles": 12,          # 프레임당 최대 타일 수 (지연 상한)
+    "empty_threshold": 12.0,  # 라플라시안 분산이 이 값 미만인 타일은 '빈 바다'로 간주
+    "match_threshold": 0.6,   # 병합 기준 (IoS: 작은 박스 대비 교집합 비율)
+}
+
+# (x1, y1, x2, y2) 타일 영역
+Tile = Tuple[int, int, int, int]
+
+
+def _axis_starts(length: int, tile: int, stride: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)  # 마지막 타일은 가장자리에 맞춤
+    return starts
+
+
+def make_tiles(img_h: int, img_w: int, tile_size: int = 640, overlap: float = 0.2) -> List[Tile]:
+    """이미지를 겹치는 정사각 타일 좌표 목록으로 분할"""
+    stride = max(1, int(tile_size * (1 - overlap)))
+    return [
+        (x, y, min(x + tile_size, img_w), min(y + tile_size, img_h))
+        for y in _axis_starts(img_h, tile_size, stride)
+        for x in _axis_starts(img_w, tile_size, stride)
+    ]
+
+
+def score_tiles(img: np.ndarray, tiles: List[Tile], downscale: int = 4) -> List[float]:
+    """
+    타일별 텍스처 점수(라플라시안 분산)를 축소 이미지에서 계산합니다.
+    잔잔한 바다/하늘은 점수가 낮고, 선박·인원 등 경계가 뚜렷한 영역은 높습니다.
+    """
+    small = cv2.resize(img, None, fx=1 / downscale, fy=1 / downscale, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    lap = cv2.Laplacian(gray, cv2.CV_32F)
+
+    scores = []
+    for x1, y1, x2, y2 in tiles:
+        region = lap[y1 // downscale:max(y1 // downscale + 1, y2 // downscale),
+                     x1 // downscale:max(x1 // downscale + 1, x2 // downscale)]
+        scores.append(float(region.var()) if region.size else 0.0)
+    return scores
+
+
+def plan_slices(img: np.ndarray, config: dict = SLICE_CONFIG) -> Tuple[List[np.ndarray], List[Tile]]:
+    """
+    추론 배치를 구성합니다. 첫 항목은 항상 전체 프레임(큰 객체용)이며,
+    이어서 빈 바다가 아닌 타일들이 점수 순으로 최대 max_tiles개 붙습니다.
+    반환: (크롭 이미지 리스트, 각 크롭의 원본 내 영역)
+    """
+    img_h, img_w = img.shape[:2]
+    full = (0, 0, img_w, img_h)
+
+    tiles = make_tiles(img_h, img_w, config["tile_size"], config["overlap"])
+    if len(tiles) <= 1:
+        return [img], [full]
+
+    scores = score_tiles(img, tiles)
+    candidates = [(s, t) for t, s in zip(tiles, scores) if s >= config["empty_threshold"]]
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    ranked = [t for _, t in candidates[:config["max_tiles"]]]
+
+    crops = [img] + [img[y1:y2, x1:x2] for x1, y1, x2, y2 in ranked]
+    return crops, [full] + ranked
+
+
+def _nms(boxes: np.ndarray, scores: np.ndarray, threshold: float) -> List[List[int]]:
+    """
+    IoS(작은 박스 대비 교집합) 기준 greedy NMS. 반환: [[대표 인덱스, 흡수된 인덱스...], ...]
+    타일 경계에서 잘린 박스도 같은 그룹으로 묶입니다.
+    """
+    x1, y1, x2, y2 = boxes.T
+    areas = np.maximum(0, x2 - x1) * np.maximum(0, y2 - y1)
+    order = scores.argsort()[::-1]
+    groups = []
+    while order.size:
+        i = order[0]
+        rest = order[1:]
+        iw = np.maximum(0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        ih = np.maximum(0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = iw * ih
+        ios = inter / np.maximum(np.minimum(areas[i], areas[rest]), 1e-6)
+        groups.append([int(i)] + [int(j) for j in rest[ios >= threshold]])
+        order = rest[ios < threshold]
+    return groups
+
+
+def merge_slice_boxes(per_crop_boxes: List[List[RawBox]], regions: List[Tile],
+                      threshold: float = SLICE_CONFIG["match_threshold"]) -> List[RawBox]:
+    """
+    타일 좌표의 박스를 원본 좌표로 옮긴 뒤 클래스별 NMS로 병합
+    겹치는 박스 묶음은 가장 높은 신뢰도에 합집합 박스를 사용 → 타일 경계에서 잘린 조각의 신뢰도가 더 높아도
+    전체 프레임 박스(또는 인접 타일의 나머지 조각)만큼의 크기가 유지되어 box_size/거리 판정이 줄어들지 않음
+    """
+    merged: List[RawBox] = []
+    for boxes, (ox, oy, _, _) in zip(per_crop_boxes, regions):
+        for cls_id, conf, (x1, y1, x2, y2) in boxes:
+            merged.append((cls_id, conf, [x1 + ox, y1 + oy, x2 + ox, y2 + oy]))
+
+    if len(merged) <= 1:
+        return merged
+
+    result: List[RawBox] = []
+    for cls_id in sorted({b[0] for b in merged}):
+        group = [b for b in merged if b[0] == cls_id]
+        coords = np.array([b[2] for b in group], dtype=np.float32)
+        confs = np.array([b[1] for b in group], dtype=np.float32)
+        for members in _nms(coords, confs, threshold):
+            box = coords[members]
+            union = [float(box[:, 0].min()), float(box[:, 1].min()), float(box[:, 2].max()), float(box[:, 3].max())]
+            result.append((cls_id, group[members[0]][1], union))
+
+    result.sort(key=lambda b: b[1], reverse=True)
+    return result
+
+
+def sliced_predict(model, img: np.ndarray, config: dict = SLICE_CONFIG, **predict_kwargs) -> List[RawBox]:
+    """전체 프레임 + 타일을 한 번의 배치로 추론하고 병합된 원시 박스를 반환"""
+    crops, regions = plan_slices(img, config)
+    results = model.predict(crops, verbose=False, **predict_kwargs)
+    return merge_slice_boxes([extract_boxes(r) for r in results], regions, config["match_threshold"])
+
+
+# ==================== 처리량 비교 벤치마크 ====================
+if __name__ == "__main__":
+    from modules.detector import load_yolo
+
+    parser = argparse.ArgumentParser(description="슬라이스 추론 vs 전체 프레임 추론 처리량 비교")
+    parser.add_argument("image_dir")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--conf", type=float, default=0.25)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.image_dir, "*.jpg")))[:args.limit]
+    if not paths:
+        print(f"❌ {args.image_dir}에 JPG 파일이 없습니다.")
+        raise SystemExit(1)
+
+    model = load_yolo()
+    frames = [cv2.imread(p) for p in paths]
+    model.predict(frames[0], verbose=False)  # 워밍업
+
+    stats = {"full": [0.0, 0], "sliced": [0.0, 0]}
+    tile_count = 0
+    for img in frames:
+        t0 = time.perf_counter()
+        boxes = extract_boxes(model.predict(img, verbose=False, conf=args.conf)[0])
+        stats["full"][0] += time.perf_counter() - t0
+        stats["full"][1] += len(boxes)
+
+        t0 = time.perf_counter()
+        boxes = sliced_predict(model, img, conf=args.conf)
+        stats["sliced"][0] += time.perf_counter() - t0
+        stats["sliced"][1] += len(boxes)
+        tile_count += len(plan_slices(img)[0]) - 1
+
+    print(f"📊 {len(frames)}개 이미지 (평균 타일 {tile_count / len(frames):.1f}개)")
+    for mode, (elapsed, n_boxes) in stats.items():
+        print(
+            f"   {mode:>6}: {len(frames) / elapsed:.2f} img/s | "
+            f"{elapsed / len(frames) * 1000:.1f} ms/img | 탐지 {n_boxes}개"
+        )
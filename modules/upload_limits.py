@@ -0,0 +1,137 @@
+"""
+업로드/디코딩 메모리 상한
+
+20MB 드론 사진 50장이 동시에 들어오면 압축 바이트 + 디코딩 이미지가 응답 직전까지 살아 있어
+메모리가 수 GB 튈 수 있습니다. /detect는 요청마다 Reservation으로 '지금 쥐고 있는 바이트'를
+전역 예산(max_inflight_bytes)에서 빌리고, 다 쓴 버퍼는 바로 반납합니다.
+
+- 업로드 크기 상한(max_upload_bytes), 픽셀 수 상한(max_pixels) 초과 → 413
+- 예산이 빌 때까지 wait_timeout 초 대기, 초과 시 503 (Retry-After)
+- 압축 바이트는 디코딩 직후, 디코딩 이미지는 후처리 직후(LLM 대기 전) 반납
+"""
+import os
+import asyncio
+from collections import deque
+from typing import Optional
+
+from modules.metrics import Counter, Gauge
+
+UPLOAD_LIMITS = {
+    "max_upload_bytes": int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024))),
+    "max_pixels": int(os.getenv("MAX_IMAGE_PIXELS", str(60_000_000))),
+    "max_inflight_bytes": int(os.getenv("MAX_INFLIGHT_BYTES", str(512 * 1024 * 1024))),
+    "wait_timeout": float(os.getenv("UPLOAD_WAIT_TIMEOUT", "5.0")),
+}
+
+INFLIGHT_BYTES = Gauge("upload_inflight_bytes", "처리 중인 업로드/디코딩 버퍼 바이트 (예약 기준)")
+UPLOAD_REJECTIONS = Counter("upload_rejections_total", "업로드 거절 수 (too_large/too_many_pixels/busy)", ["reason"])
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, reason: str, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = retry_after
+        UPLOAD_REJECTIONS.inc(reason=reason)
+
+
+def check_upload_size(size: Optional[int], limits: dict = UPLOAD_LIMITS):
+    if size is not None and size > limits["max_upload_bytes"]:
+        raise UploadRejected(
+            413, "too_large",
+            f"업로드 크기 초과: {size / 1e6:.1f}MB (최대 {limits['max_upload_bytes'] / 1e6:.0f}MB)"
+        )
+
+
+def check_pixels(height: int, width: int, limits: dict = UPLOAD_LIMITS):
+    if height * width > limits["max_pixels"]:
+        raise UploadRejected(
+            413, "too_many_pixels",
+            f"이미지 해상도 초과: {width}x{height} (최대 {limits['max_pixels'] / 1e6:.0f}MP)"
+        )
+
+
+class MemoryBudget:
+    """요청 간 공유하는 바이트 예산 (선착순 대기, 이벤트 루프 안에서만 사용)"""
+
+    def __init__(self, limit: int = UPLOAD_LIMITS["max_inflight_bytes"]):
+        self.limit = limit
+        self.used = 0
+        self._waiters: deque = deque()  # (바이트, Future)
+
+    async def acquire(self, n: int, timeout: float):
+        if n > self.limit:
+            raise UploadRejected(413, "too_large", f"요청 하나가 메모리 예산({self.limit / 1e6:.0f}MB)을 넘습니다")
+        if not self._waiters and self.used + n <= self.limit:
+            self._take(n)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        entry = (n, fut)
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except BaseException as e:
+            # 시간 초과뿐 아니라 요청 취소(클라이언트 연결 끊김)에서도 대기열에서 빼야
+            # 이후 _wake()가 죽은 요청에 예산을 넘기지 않음
+            if not fut.cancel():
+                # 취소 직전에 예산을 받음
+                if isinstance(e, asyncio.TimeoutError):
+                    return
+                self.release(n)
+                raise
+            try:
+                self._waiters.remove(entry)
+            except ValueError:
+                pass
+            self._wake()  # 맨 앞 대기자가 빠졌으니 뒤 요청이 들어갈 수 있는지 확인
+            if isinstance(e, asyncio.TimeoutError):
+                raise UploadRejected(503, "busy", "처리 중인 이미지가 많습니다. 잠시 후 다시 시도하세요", retry_after=1)
+            raise
+
+    def release(self, n: int):
+        self.used -= n
+        INFLIGHT_BYTES.set(self.used)
+        self._wake()
+
+    def _take(self, n: int):
+        self.used += n
+        INFLIGHT_BYTES.set(self.used)
+
+    def _wake(self):
+        while self._waiters:
+            n, fut = self._waiters[0]
+            if fut.done():
+                self._waiters.popleft()
+                continue
+            if self.used + n > self.limit:
+                break
+            self._waiters.popleft()
+            self._take(n)
+            fut.set_result(True)
+
+
+class Reservation:
+    """요청 1건이 예산에서 빌린 바이트 (단계별로 늘리고 줄임)"""
+
+    def __init__(self, budget: MemoryBudget, timeout: float = UPLOAD_LIMITS["wait_timeout"]):
+        self.budget = budget
+        self.timeout = timeout
+        self.size = 0
+
+    async def grow(self, n: int):
+        if n <= 0:
+            return
+        await self.budget.acquire(n, self.timeout)
+        self.size += n
+
+    def shrink(self, n: int):
+        n = min(max(n, 0), self.size)
+        if n:
+            self.size -= n
+            self.budget.release(n)
+
+    def close(self):
+        self.shrink(self.size)